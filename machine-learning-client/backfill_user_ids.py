@@ -0,0 +1,99 @@
+"""One-shot backfill that normalizes ``user_id`` on existing sensor_data documents.
+
+Older predictions were stored without a ``user_id`` (or, from other writers,
+with the id as a plain string), so per-user history queries could not use
+the (user_id, _id) index. This walks the collection in _id order and fixes
+documents in bulk batches:
+
+- string ids that are valid ObjectIds are converted to ObjectId
+- invalid string ids and missing ids are set to ``--assign-to`` if given,
+  otherwise to null, so every document carries the indexed field
+
+    python backfill_user_ids.py --batch-size 1000 [--assign-to <id>] [--dry-run]
+"""
+
+# pylint: disable=import-error
+
+import argparse
+import logging
+
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from dotenv import load_dotenv
+from pymongo import ASCENDING
+
+from db import get_database, make_client
+
+NEEDS_BACKFILL = {
+    "$or": [{"user_id": {"$exists": False}}, {"user_id": {"$type": "string"}}]
+}
+
+
+def normalized_user_id(value, default=None):
+    """Return the ObjectId a stored user_id should become."""
+    if isinstance(value, str):
+        try:
+            return ObjectId(value)
+        except InvalidId:
+            return default
+    return default
+
+
+def backfill(collection, batch_size=1000, assign_to=None, dry_run=False):
+    """Fix user_id on every document that needs it. Returns the update count."""
+    updated = 0
+    last_id = None
+    while True:
+        query = dict(NEEDS_BACKFILL)
+        if last_id is not None:
+            query = {"$and": [NEEDS_BACKFILL, {"_id": {"$gt": last_id}}]}
+        docs = list(
+            collection.find(
+                query, {"user_id": 1}, sort=[("_id", ASCENDING)], limit=batch_size
+            )
+        )
+        if not docs:
+            return updated
+
+        last_id = docs[-1]["_id"]
+        # One update_many per distinct target id keeps each batch to a few ops
+        targets = {}
+        for doc in docs:
+            target = normalized_user_id(doc.get("user_id"), assign_to)
+            targets.setdefault(target, []).append(doc["_id"])
+        if not dry_run:
+            for target, ids in targets.items():
+                collection.update_many(
+                    {"_id": {"$in": ids}}, {"$set": {"user_id": target}}
+                )
+        updated += len(docs)
+        logging.info("🔁 Backfilled %d documents (up to _id %s)", updated, last_id)
+
+
+def main():
+    """Parse arguments and run the backfill against the configured database."""
+    parser = argparse.ArgumentParser(description="Normalize sensor_data user_id")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--assign-to", help="ObjectId to give documents with no usable user_id"
+    )
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    load_dotenv()
+    collection = get_database(make_client(appname="backfill-user-ids"))["sensor_data"]
+    assign_to = ObjectId(args.assign_to) if args.assign_to else None
+
+    total = backfill(
+        collection,
+        batch_size=args.batch_size,
+        assign_to=assign_to,
+        dry_run=args.dry_run,
+    )
+    verb = "Would update" if args.dry_run else "Updated"
+    print(f"✅ {verb} {total} documents.")
+
+
+if __name__ == "__main__":
+    main()
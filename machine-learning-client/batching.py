@@ -0,0 +1,136 @@
+"""Dynamic micro-batching for model inference.
+
+Frames submitted from concurrent requests are queued and run through the
+model together in a single forward pass. Each caller gets its own row of
+the batched output back.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+_STOP = object()  # Queued by close() to end the worker loop
+
+
+class MicroBatcher:  # pylint: disable=too-many-instance-attributes
+    """Collects single inputs into batches and runs them on one worker thread.
+
+    A batch is dispatched as soon as ``max_batch_size`` inputs are queued or
+    ``max_wait_ms`` has passed since the first input of the batch arrived,
+    whichever happens first.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=5):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max(max_wait_ms, 0) / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._batches = 0
+        self._items = 0
+        self._largest_batch = 0
+        self._batch_sizes = {}
+
+    def submit(self, array):
+        """Queue one preprocessed input and return a Future for its output row."""
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((array, future))
+        return future
+
+    def predict(self, array, timeout=None):
+        """Queue one input and block until its prediction row is ready."""
+        return self.submit(array).result(timeout=timeout)
+
+    def close(self):
+        """Stop the worker thread once the inputs already queued have run.
+
+        A later ``submit`` starts a new worker.
+        """
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.put((_STOP, None))
+
+    def stats(self):
+        """Return queue depth and batch-size metrics."""
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": (
+                    self._items / self._batches if self._batches else 0.0
+                ),
+                "largest_batch": self._largest_batch,
+                "batch_size_histogram": {
+                    str(size): count
+                    for size, count in sorted(self._batch_sizes.items())
+                },
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+            }
+
+    def _ensure_worker(self):
+        """Start the worker thread on first use."""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="micro-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def _collect(self):
+        """Block for the first item, then gather more until full or timed out."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _record(self, size):
+        """Update batch-size counters."""
+        with self._lock:
+            self._batches += 1
+            self._items += size
+            self._largest_batch = max(self._largest_batch, size)
+            self._batch_sizes[size] = self._batch_sizes.get(size, 0) + 1
+
+    def _run(self):
+        """Worker loop: collect a batch, run it, hand each row to its waiter."""
+        while True:
+            batch = self._collect()
+            stop = any(array is _STOP for array, _ in batch)
+            batch = [item for item in batch if item[0] is not _STOP]
+            if batch:
+                self._run_batch(batch)
+            if stop:
+                return
+
+    def _run_batch(self, batch):
+        """Run one batch and hand each row to its waiter."""
+        futures = [future for _, future in batch]
+        self._record(len(batch))
+        try:
+            outputs = self.predict_fn(np.stack([array for array, _ in batch]))
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logging.exception("❗ Batched inference failed")
+            for future in futures:
+                future.set_exception(e)
+            return
+        for i, future in enumerate(futures):
+            future.set_result(outputs[i])
@@ -0,0 +1,110 @@
+"""Compare inference backends for accuracy parity and CPU speed.
+
+Runs the Keras model and each export from export_model.py on the same
+sample of dataset images (``--dataset`` may also be a pack from
+pack_dataset.py). Reports each backend's top-1 agreement with
+Keras, its largest probability difference and its accuracy, then the
+median latency and throughput per batch size. Throughput is measured on one
+thread by default, so the numbers read as predictions per core:
+
+    python bench_backends.py --samples 500 --batch-sizes 1 8 32 --threads 1
+"""
+
+# pylint: disable=import-error, too-many-locals
+
+import argparse
+import os
+import statistics
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from export_model import EXPORT_PATHS, sample_frames
+from inference_backends import load_backend
+from preprocessing import INPUT_SHAPE
+
+CANDIDATES = [
+    ("tflite", EXPORT_PATHS["fp16"]),
+    ("tflite", EXPORT_PATHS["int8"]),
+    ("onnx", EXPORT_PATHS["onnx"]),
+]
+
+
+def load_frames(dataset_path, samples):
+    """Return (frames, labels); random frames and no labels without a dataset."""
+    if os.path.isdir(dataset_path):
+        return sample_frames(dataset_path, samples)
+    print(f"⚠️ {dataset_path} not found, comparing on random frames")
+    rng = np.random.default_rng(0)
+    return rng.random((samples, *INPUT_SHAPE), dtype=np.float32), None
+
+
+def predict_all(backend, frames, batch_size=32):
+    """Run every frame through a backend in fixed-size batches."""
+    return np.concatenate(
+        [
+            backend.predict(frames[i : i + batch_size])
+            for i in range(0, len(frames), batch_size)
+        ]
+    )
+
+
+def time_batches(backend, frames, batch_size, repeat):
+    """Median milliseconds per ``predict`` call at one batch size."""
+    batch = frames[:batch_size]
+    backend.predict(batch)  # Warm up (and resize TFLite tensors)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        backend.predict(batch)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    """Parse arguments, run every backend and print both comparisons."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="sign_model.h5")
+    parser.add_argument("--dataset", default="dataset/asl_alphabet_train")
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    # Hold Keras to the same thread budget as the exported backends
+    tf.config.threading.set_intra_op_parallelism_threads(args.threads)
+    tf.config.threading.set_inter_op_parallelism_threads(args.threads)
+
+    frames, labels = load_frames(args.dataset, args.samples)
+    backends = [load_backend("keras", args.model)]
+    for name, path in CANDIDATES:
+        try:
+            backends.append(load_backend(name, path, num_threads=args.threads))
+        except (FileNotFoundError, ImportError) as e:
+            print(f"⚠️ Skipping {path}: {e}")
+
+    reference = predict_all(backends[0], frames)
+    print(f"\n{len(frames)} frames\n")
+    print(f"{'backend':<28}{'agreement':>10}{'max diff':>10}{'accuracy':>10}")
+    for backend in backends:
+        output = predict_all(backend, frames)
+        top = output.argmax(axis=1)
+        agreement = np.mean(top == reference.argmax(axis=1))
+        max_diff = np.abs(output - reference).max()
+        accuracy = f"{np.mean(top == labels):.3f}" if labels is not None else "-"
+        print(f"{backend.path:<28}{agreement:>10.3f}{max_diff:>10.4f}{accuracy:>10}")
+
+    print(f"\n{'backend':<28}{'batch':>6}{'ms/call':>10}{'frames/s':>10}")
+    for backend in backends:
+        for batch_size in args.batch_sizes:
+            ms = time_batches(backend, frames, batch_size, args.repeat)
+            print(
+                f"{backend.path:<28}{batch_size:>6}{ms:>10.2f}"
+                f"{batch_size / ms * 1000:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
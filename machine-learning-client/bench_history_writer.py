@@ -0,0 +1,110 @@
+"""Benchmark /predict latency with inline versus buffered history writes.
+
+Drives the Flask app in-process from several client threads and reports
+p50/p99 request latency for each write mode. By default the writes go to
+mongomock with an artificial per-call delay that stands in for a MongoDB
+round trip; pass --uri to use a real mongod instead.
+
+    python bench_history_writer.py --requests 500 --threads 8 --delay-ms 5
+"""
+
+# pylint: disable=import-error
+
+import argparse
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mongomock
+from pymongo import MongoClient
+
+import main
+from history_writer import BufferedWriter
+
+FRAME_PATH = os.path.join(os.path.dirname(__file__), "received_frame_processed.jpg")
+
+
+class SlowCollection:
+    """Wraps a collection and sleeps before every write, like a network hop."""
+
+    def __init__(self, collection, delay_ms):
+        self.collection = collection
+        self.delay = delay_ms / 1000.0
+        self._lock = threading.Lock()
+
+    def insert_many(self, docs, ordered=True):
+        """Delayed insert_many (serialized like a single connection)."""
+        with self._lock:
+            time.sleep(self.delay)
+            return self.collection.insert_many(docs, ordered=ordered)
+
+    def count_documents(self, query):
+        """Pass-through count."""
+        return self.collection.count_documents(query)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run(mode, collection, frame, args):
+    """Send the requests for one write mode and return latencies in ms."""
+    main.SENSOR_DATA = collection
+    main.HISTORY_WRITE_MODE = mode
+    main.history_writer = BufferedWriter(collection) if mode == "buffered" else None
+    app_client = main.app.test_client()
+
+    def one_request(_):
+        start = time.perf_counter()
+        response = app_client.post("/predict", data=frame, content_type="image/jpeg")
+        elapsed = (time.perf_counter() - start) * 1000
+        assert response.status_code == 200, response.data
+        return elapsed
+
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(one_request, range(args.warmup)))
+        latencies = list(pool.map(one_request, range(args.requests)))
+
+    if main.history_writer is not None:
+        main.history_writer.close()
+    return latencies
+
+
+def main_cli():
+    """Parse arguments, run both modes and print a comparison."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--delay-ms", type=float, default=5.0)
+    parser.add_argument("--uri", help="MongoDB URI (default: mongomock)")
+    args = parser.parse_args()
+
+    if args.uri:
+        base = MongoClient(args.uri)["ml_benchmark"]["sensor_data"]
+        base.drop()
+        collection = base
+    else:
+        base = mongomock.MongoClient()["ml_benchmark"]["sensor_data"]
+        collection = SlowCollection(base, args.delay_ms)
+
+    with open(FRAME_PATH, "rb") as frame_file:
+        frame = frame_file.read()
+
+    print(f"{'mode':<10}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for mode in ("inline", "buffered"):
+        latencies = run(mode, collection, frame, args)
+        print(
+            f"{mode:<10}{percentile(latencies, 50):>10.2f}"
+            f"{percentile(latencies, 99):>10.2f}{statistics.mean(latencies):>10.2f}"
+        )
+    print("documents written:", collection.count_documents({}))
+
+
+if __name__ == "__main__":
+    main_cli()
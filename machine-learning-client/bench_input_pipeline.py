@@ -0,0 +1,128 @@
+"""Compare training input throughput of the old and new pipelines.
+
+Reads the training split for several epochs through the old
+ImageDataGenerator and through the tf.data pipeline (memory cache, file
+cache and, with ``--packed``, a pack from pack_dataset.py), with the same
+augmentation and batch size but no model, and prints images/sec per epoch.
+The first cached tf.data epoch includes decoding and filling the cache:
+
+    python bench_input_pipeline.py --epochs 3 --limit 5200 \
+        --packed dataset/asl_alphabet_packed
+"""
+
+# pylint: disable=import-error, no-name-in-module
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from tensorflow.keras.preprocessing.image import ImageDataGenerator
+
+from dataset_listing import list_dataset, split_dataset
+from input_pipeline import (
+    GENERATOR_AUGMENTATION,
+    make_dataset,
+    make_packed_dataset,
+)
+from packed_dataset import PackedDataset
+from preprocessing import IMG_SIZE
+
+
+def time_epochs(batches_per_epoch, epochs):
+    """Return images/sec for each epoch of ``batches_per_epoch()``."""
+    rates = []
+    for _ in range(epochs):
+        start = time.perf_counter()
+        images = 0
+        for _, batch_targets in batches_per_epoch():
+            images += len(batch_targets)
+        rates.append(images / (time.perf_counter() - start))
+    return rates
+
+
+def generator_epochs(dataset_path, batch_size, limit):
+    """Epochs of the old ImageDataGenerator, cut to about ``limit`` images."""
+    datagen = ImageDataGenerator(**GENERATOR_AUGMENTATION, validation_split=0.2)
+    flow = datagen.flow_from_directory(
+        dataset_path,
+        target_size=(IMG_SIZE, IMG_SIZE),
+        batch_size=batch_size,
+        class_mode="categorical",
+        subset="training",
+        shuffle=True,
+    )
+    steps = min(len(flow), -(-limit // batch_size))
+    return lambda: (flow[i] for i in range(steps))
+
+
+def packed_epochs(args, train_paths, num_classes):
+    """Epochs of the tf.data pipeline over the same images, read from the pack."""
+    packed = PackedDataset(args.packed)
+    position = {key: i for i, key in enumerate(packed.keys)}
+    indices = [
+        position[os.path.relpath(path, args.dataset).replace(os.sep, "/")]
+        for path in train_paths
+    ]
+    dataset = make_packed_dataset(
+        packed, indices, num_classes, batch_size=args.batch_size, training=True
+    )
+    return lambda: iter(dataset)
+
+
+def main():
+    """Parse arguments and print one row per pipeline."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", default="dataset/asl_alphabet_train")
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--limit", type=int, default=5200)
+    parser.add_argument(
+        "--packed", help="also read this pack of the dataset (pack_dataset.py)"
+    )
+    args = parser.parse_args()
+
+    paths, targets, labels = list_dataset(args.dataset)
+    (train_paths, train_targets), _ = split_dataset(paths, targets)
+    # Small or partial datasets have fewer training images than --limit
+    args.limit = min(args.limit, len(train_paths))
+    chosen = sorted(random.Random(0).sample(range(len(train_paths)), args.limit))
+    train_paths = [train_paths[i] for i in chosen]
+    train_targets = [train_targets[i] for i in chosen]
+
+    runs = [("generator", generator_epochs(args.dataset, args.batch_size, args.limit))]
+    print(f"\n{os.cpu_count()} CPU cores, {len(train_paths)} training images\n")
+    print(
+        f"{'pipeline':<18}"
+        + "".join(f"{f'epoch {i + 1}':>12}" for i in range(args.epochs))
+    )
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for name, cache in (
+            ("tf.data memory", "memory"),
+            ("tf.data file", os.path.join(cache_dir, "train")),
+        ):
+            dataset = make_dataset(
+                train_paths,
+                train_targets,
+                len(labels),
+                batch_size=args.batch_size,
+                training=True,
+                cache=cache,
+            )
+            runs.append((name, lambda dataset=dataset: iter(dataset)))
+        if args.packed:
+            runs.append(
+                (
+                    "tf.data packed",
+                    packed_epochs(args, train_paths, len(labels)),
+                )
+            )
+
+        for name, epochs in runs:
+            rates = time_epochs(epochs, args.epochs)
+            print(f"{name:<18}" + "".join(f"{rate:>12.1f}" for rate in rates))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Load test the gunicorn serving mode at several worker counts.
+
+For each worker count, starts ``gunicorn -c gunicorn.conf.py main:app``,
+waits for the model to load, then drives ``/predict_login`` with raw
+100x100 RGB frames from concurrent keep-alive clients for a fixed time.
+Prints throughput and p50/p99 latency per worker count (the
+throughput-vs-workers curve). The prediction cache is off so every request
+runs the model:
+
+    python bench_serving.py --workers 1 2 4 --concurrency 16 --duration 20
+"""
+
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+FRAME = bytes(100 * 100 * 3)
+
+
+def wait_until_ready(port, timeout=180):
+    """Poll /metrics until enough consecutive answers report a warm model."""
+    deadline = time.monotonic() + timeout
+    ready_in_a_row = 0
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/metrics")
+            ready = json.loads(conn.getresponse().read())["model"]["ready"]
+            ready_in_a_row = ready_in_a_row + 1 if ready else 0
+            if ready_in_a_row >= 10:
+                return
+        except (OSError, ValueError, KeyError):
+            ready_in_a_row = 0
+        time.sleep(0.5)
+    raise TimeoutError("gunicorn workers did not become ready")
+
+
+def client_loop(port, stop, latencies, errors):
+    """Send frames back to back on one connection until ``stop`` is set."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    headers = {"Content-Type": "application/x-rgb24"}
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            conn.request("POST", "/predict_login", body=FRAME, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+                continue
+        except (OSError, http.client.HTTPException):
+            errors.append("connection")
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+def load_test(port, concurrency, duration):
+    """Return (requests/s, p50 ms, p99 ms, errors) for one run."""
+    stop = threading.Event()
+    latencies, errors = [], []
+    clients = [
+        threading.Thread(target=client_loop, args=(port, stop, latencies, errors))
+        for _ in range(concurrency)
+    ]
+    for client in clients:
+        client.start()
+    time.sleep(duration)
+    stop.set()
+    for client in clients:
+        client.join()
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)] if latencies else float("nan")
+    p50 = statistics.median(latencies) if latencies else float("nan")
+    return len(latencies) / duration, p50, p99, len(errors)
+
+
+def main():
+    """Parse arguments and print one row per worker count."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--port", type=int, default=5051)
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    print(f"{os.cpu_count()} CPU cores, {args.concurrency} concurrent clients\n")
+    print(f"{'workers':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for workers in args.workers:
+        env = dict(
+            os.environ,
+            WEB_CONCURRENCY=str(workers),
+            GUNICORN_THREADS=str(args.threads),
+            PORT=str(args.port),
+            PREDICTION_CACHE_SIZE="0",
+        )
+        with subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+            cwd=here,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        ) as server:
+            try:
+                wait_until_ready(args.port)
+                load_test(args.port, args.concurrency, 2)  # Settle before measuring
+                rate, p50, p99, errors = load_test(
+                    args.port, args.concurrency, args.duration
+                )
+                print(f"{workers:>8}{rate:>10.1f}{p50:>10.1f}{p99:>10.1f}{errors:>8}")
+            finally:
+                server.terminate()
+                server.wait(timeout=60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark ML client cold start, with and without model warm-up.
+
+Starts a fresh Python process per run and reports how long ``import main``
+takes, when the model is ready (loaded and warmed up), and the latency of
+the first and second ``/predict_login`` calls and the first full batch.
+With warm-up on, the first calls should cost about the same as the second:
+
+    python bench_startup.py --runs 3
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+CHILD = """
+import json, time
+start = time.perf_counter()
+import main
+import numpy as np
+imported = time.perf_counter() - start
+main.registry.active.model.wait()
+ready = time.perf_counter() - start
+
+client = main.app.test_client()
+calls = []
+for _ in range(2):
+    t = time.perf_counter()
+    client.post("/predict_login", data=bytes(30000), content_type="application/x-rgb24")
+    calls.append(time.perf_counter() - t)
+t = time.perf_counter()
+main.run_model(np.zeros((main.BATCH_MAX_SIZE, 100, 100, 3), dtype=np.float32))
+batch = time.perf_counter() - t
+print(json.dumps({"import_s": imported, "ready_s": ready, "first_ms": calls[0] * 1000,
+                  "second_ms": calls[1] * 1000, "full_batch_ms": batch * 1000}))
+"""
+
+COLUMNS = ("process_s", "import_s", "ready_s", "first_ms", "second_ms", "full_batch_ms")
+
+
+def run_once(warmup):
+    """Start one fresh process and return its timings."""
+    env = dict(os.environ, PREDICTION_CACHE_SIZE="0", HISTORY_WRITE_MODE="inline")
+    if not warmup:
+        env["MODEL_WARMUP_BATCH_SIZES"] = ""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["process_s"] = time.perf_counter() - start
+    return timings
+
+
+def main():
+    """Parse arguments, run both configurations and print median timings."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'warm-up':<10}" + "".join(f"{column:>15}" for column in COLUMNS))
+    for warmup in (False, True):
+        runs = [run_once(warmup) for _ in range(args.runs)]
+        medians = [statistics.median(run[column] for run in runs) for column in COLUMNS]
+        print(
+            f"{'on' if warmup else 'off':<10}"
+            + "".join(f"{value:>15.2f}" for value in medians)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Benchmark storage size and history-query latency for each storage layout.
+
+Seeds the same synthetic predictions into the documents, time-series and
+bucket layouts (written through storage.py, exactly as the ML client does),
+then reports each layout's data/storage/index size and the latency of the
+web app's history queries: the first page and a page deep into history.
+Needs a real MongoDB (5.0+ for time-series collections):
+
+    python bench_storage.py --uri mongodb://localhost:27017 --users 20 --per-user 5000
+"""
+
+# pylint: disable=import-error, wrong-import-position, wrong-import-order
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+from pymongo import MongoClient
+
+from storage import STORAGE_MODES, open_history
+
+# The readers live in the web app; import them so the queries timed here
+# are the ones the web app actually runs.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "web-app"))
+from history_store import make_history_store  # noqa: E402
+
+LETTERS = [chr(c) for c in range(ord("A"), ord("Z") + 1)]
+
+
+def synthetic_history(user_ids, per_user, start):
+    """Yield predictions for each user, a couple of seconds apart."""
+    for user_id in user_ids:
+        timestamp = start
+        for _ in range(per_user):
+            timestamp += timedelta(seconds=random.randint(1, 4))
+            yield {
+                "user_id": user_id,
+                "timestamp": timestamp,
+                "prediction": random.choice(LETTERS),
+                "confidence": random.random(),
+            }
+
+
+def seed(db, mode, docs, batch_size=1000):
+    """Write the predictions into one layout in batches."""
+    store = open_history(db, mode)
+    for i in range(0, len(docs), batch_size):
+        # insert_many adds _id to the dicts, so hand each layout fresh copies
+        store.insert_many([dict(doc) for doc in docs[i : i + batch_size]])
+
+
+def storage_stats(db, mode):
+    """Return (data size, storage size, index size) in bytes for a layout."""
+    name = make_history_store(db, mode).collection.name
+    stats = next(db[name].aggregate([{"$collStats": {"storageStats": {}}}]))[
+        "storageStats"
+    ]
+    return stats.get("size", 0), stats["storageSize"], stats["totalIndexSize"]
+
+
+def time_query(fn, repeat):
+    """Median wall time of ``fn`` in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def deep_cursor(store, user_id, pages, limit):
+    """Follow ``pages`` cursors and return the one that starts the next page."""
+    cursor = None
+    for _ in range(pages):
+        _, cursor = store.page(user_id, before=cursor, limit=limit)
+    return cursor
+
+
+def main():
+    """Parse arguments, seed every layout and print the comparison."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uri", required=True)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--per-user", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--deep-pages", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    client = MongoClient(args.uri)
+    client.drop_database("ml_storage_benchmark")
+    db = client["ml_storage_benchmark"]
+
+    user_ids = [ObjectId() for _ in range(args.users)]
+    docs = list(synthetic_history(user_ids, args.per_user, datetime(2025, 4, 1)))
+    probe = user_ids[len(user_ids) // 2]
+    print(f"{len(docs)} predictions for {len(user_ids)} users\n")
+
+    print(
+        f"{'layout':<12}{'data MB':>10}{'storage MB':>12}{'index MB':>10}"
+        f"{'page 1 ms':>11}{'deep page ms':>14}"
+    )
+    for mode in STORAGE_MODES:
+        seed(db, mode, docs)
+        store = make_history_store(db, mode)
+        store.ensure_indexes()
+        size, storage_size, index_size = storage_stats(db, mode)
+        cursor = deep_cursor(store, probe, args.deep_pages, args.page_size)
+
+        first_ms = time_query(
+            lambda s=store: s.page(probe, limit=args.page_size), args.repeat
+        )
+        deep_ms = time_query(
+            lambda s=store, c=cursor: s.page(probe, before=c, limit=args.page_size),
+            args.repeat,
+        )
+        print(
+            f"{mode:<12}{size / 2**20:>10.2f}{storage_size / 2**20:>12.2f}"
+            f"{index_size / 2**20:>10.2f}{first_ms:>11.2f}{deep_ms:>14.2f}"
+        )
+
+    client.drop_database("ml_storage_benchmark")
+
+
+if __name__ == "__main__":
+    main()
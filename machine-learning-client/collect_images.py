@@ -1,66 +1,314 @@
-"""Capture ASL alphabet training images using webcam."""
+"""Capture ASL alphabet training images using webcam.
 
-# pylint: disable=no-member, invalid-name
+The capture loop only reads frames, crops them square and hands them to a
+bounded queue. A pool of writer threads resizes each frame to 100x100,
+encodes it as JPEG and writes it, so a slow disk or encoder never holds up
+the camera. Letters and counts come from the command line, and one session
+can record several letters in turn:
 
+    python collect_images.py --labels A B C --count 2000
+
+Press 'c' to start each letter and 'q' to quit. ``--packed`` also appends
+every frame to a pack (see packed_dataset.py), and ``--no-files`` writes
+only the pack. ``--source`` takes a camera index or a video file; a video
+file runs headless, filling the letters from consecutive frames.
+"""
+
+# pylint: disable=no-member, import-error
+
+import argparse
 import os
+import queue
+import re
+import threading
 import time
-import cv2  # pylint: disable=import-error
+
+import cv2
+
+from packed_dataset import PackWriter, decode_frame
 
 # === CONFIG ===
-LABEL = "Z"  # Change this to the letter you're recording
 IMG_SIZE = 100
 NUM_IMAGES = 2000
-
 SAVE_DIR = os.path.abspath(
-    os.path.join(os.path.dirname(__file__), "dataset", "asl_alphabet_train", LABEL)
+    os.path.join(os.path.dirname(__file__), "dataset", "asl_alphabet_train")
 )
-os.makedirs(SAVE_DIR, exist_ok=True)
-
-# === Setup webcam ===
-cap = cv2.VideoCapture(0)
-count = 0
-collecting = False
-
-print("📸 Press 'c' to start capturing images.")
-print("❌ Press 'q' to quit anytime.")
-print("🗂️ Saving images to:", os.path.abspath(SAVE_DIR))
-
-while True:
-    ret, frame = cap.read()
-    if not ret or frame is None:
-        print("⚠️ Frame not captured. Retrying...")
-        continue
-
-    height, width, _ = frame.shape
-    min_dim = min(height, width)
-    start_x = (width - min_dim) // 2
-    start_y = (height - min_dim) // 2
-    square_frame = frame[start_y : start_y + min_dim, start_x : start_x + min_dim]
-
-    cv2.imshow("Capture Window", square_frame)  # pylint: disable=no-member
-    key = cv2.waitKey(1)  # pylint: disable=no-member
-
-    if key == ord("c") and not collecting:
-        print("🚀 Starting capture...")
-        collecting = True
-        start_time = time.time()
-
-    if key == ord("q"):
-        print("👋 Quit requested.")
-        break
-
-    if collecting and count < NUM_IMAGES:
-        resized_frame = cv2.resize(
-            square_frame, (IMG_SIZE, IMG_SIZE)
-        )  # pylint: disable=no-member
-        filename = os.path.join(SAVE_DIR, f"{LABEL}_{count}.jpg")
-        cv2.imwrite(filename, resized_frame)  # pylint: disable=no-member
-        print(f"📁 Saved: {filename}")
-        count += 1
-        time.sleep(0.01)
-    elif collecting and count >= NUM_IMAGES:
-        print(f"✅ Done capturing {NUM_IMAGES} images.")
-        break
-
-cap.release()
-cv2.destroyAllWindows()  # pylint: disable=no-member
+JPEG_QUALITY = 95
+
+_STOP = object()  # Queued by close() once per writer thread
+
+
+def square_crop(frame):
+    """Return the centered square of a frame (a view, nothing is copied)."""
+    height, width = frame.shape[:2]
+    size = min(height, width)
+    top, left = (height - size) // 2, (width - size) // 2
+    return frame[top : top + size, left : left + size]
+
+
+def next_index(label, save_dir=None, pack=None):
+    """Return the first unused image number for ``label``.
+
+    Numbering continues after the images already in the folder and in the
+    pack, so a second session never overwrites the first.
+    """
+    pattern = re.compile(rf"{re.escape(label)}_(\d+)\.jpg$")
+    names = []
+    folder = os.path.join(save_dir, label) if save_dir else None
+    if folder and os.path.isdir(folder):
+        names.extend(os.listdir(folder))
+    if pack is not None:
+        prefix = f"{label}/"
+        names.extend(
+            entry[0][len(prefix) :]
+            for entry in pack.entries
+            if entry[0].startswith(prefix)
+        )
+    numbers = [int(match.group(1)) for match in map(pattern.match, names) if match]
+    return max(numbers, default=-1) + 1
+
+
+class FrameWriter:  # pylint: disable=too-many-instance-attributes
+    """Resizes, encodes and stores captured frames on background threads.
+
+    Frames go to ``<save_dir>/<LABEL>/<LABEL>_<n>.jpg`` and/or to a pack.
+    Packed frames are decoded back from the JPEG bytes, so they match what
+    pack_dataset.py would read from the file. Encoding runs in parallel, but
+    each frame carries its capture number and is appended to the pack only
+    after every earlier frame, so the pack is always in capture order.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+        self, save_dir=None, pack=None, workers=2, queue_size=64, quality=JPEG_QUALITY
+    ):
+        if save_dir is None and pack is None:
+            raise ValueError("Nowhere to write frames: give a folder, a pack or both")
+        self.save_dir = save_dir
+        self.pack = pack
+        self.quality = quality
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+        self._queue = queue.Queue(maxsize=max(1, queue_size))
+        self._lock = threading.Lock()
+        self._submitted = 0  # Capture number of the next queued frame
+        self._pack_turn = threading.Condition()
+        self._next_packed = 0  # Capture number the pack takes next
+        self._threads = [
+            threading.Thread(target=self._work, daemon=True)
+            for _ in range(max(1, workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, label, name, frame, block=True):
+        """Queue one BGR frame; without ``block``, drop it if the queue is full.
+
+        Returns False for a dropped frame.
+        """
+        try:
+            # One capture thread submits, so numbers follow the queue order
+            self._queue.put((self._submitted, label, name, frame), block=block)
+            self._submitted += 1
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def _store(self, label, name, frame):
+        """Resize, encode and write one frame; return its pack entry or None."""
+        resized = cv2.resize(frame, (IMG_SIZE, IMG_SIZE))
+        ok, encoded = cv2.imencode(
+            ".jpg", resized, [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        )
+        if not ok:
+            raise ValueError(f"Could not encode {label}/{name}")
+        data = encoded.tobytes()
+        size = mtime_ns = 0
+        if self.save_dir:
+            path = os.path.join(self.save_dir, label, name)
+            with open(path, "wb") as f:
+                f.write(data)
+            stat = os.stat(path)
+            size, mtime_ns = stat.st_size, stat.st_mtime_ns
+        if self.pack is None:
+            return None
+        return f"{label}/{name}", label, decode_frame(data), size, mtime_ns
+
+    def _pack_in_order(self, number, entry):
+        """Wait for every earlier frame, then append ``entry`` (None: skip)."""
+        with self._pack_turn:
+            self._pack_turn.wait_for(lambda: self._next_packed == number)
+            try:
+                if entry is not None:
+                    self.pack.write(*entry)
+            finally:
+                self._next_packed += 1
+                self._pack_turn.notify_all()
+
+    def _work(self):
+        """Writer thread: store queued frames until told to stop."""
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            number, label, name, frame = item
+            entry, failed = None, None
+            try:
+                entry = self._store(label, name, frame)
+            except (OSError, ValueError, cv2.error) as e:
+                failed = e
+            if self.pack is not None:
+                try:
+                    self._pack_in_order(number, entry)
+                except ValueError as e:
+                    failed = e
+            if failed is not None:
+                print(f"❗ Could not save {label}/{name}: {failed}")
+            with self._lock:
+                if failed is None:
+                    self.written += 1
+                else:
+                    self.errors += 1
+
+    def close(self):
+        """Finish every queued frame, then commit the pack."""
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        if self.pack is not None:
+            self.pack.commit()
+
+
+def open_source(source):
+    """Open a camera index ("0") or a video file; return (capture, is_file)."""
+    if str(source).isdigit():
+        return cv2.VideoCapture(int(source)), False
+    if not os.path.isfile(source):
+        raise FileNotFoundError(f"No camera index or video file {source!r}")
+    return cv2.VideoCapture(source), True
+
+
+def capture(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+    cap, labels, count, writer, headless=False, from_file=False, interval_s=0.0
+):
+    """Record ``count`` frames for each label in turn; return {label: frames}.
+
+    Live cameras never wait for the writers: if the queue is full the frame
+    is dropped and another is taken. Video files are read no faster than
+    the writers keep up, so every frame is used.
+    """
+    captured = {}
+    for label in labels:
+        if writer.save_dir:
+            os.makedirs(os.path.join(writer.save_dir, label), exist_ok=True)
+        start = next_index(label, writer.save_dir, writer.pack)
+        captured[label], finished = collect_label(
+            cap, label, start, count, writer, headless, from_file, interval_s
+        )
+        if not finished:
+            break
+    return captured
+
+
+def collect_label(  # pylint: disable=too-many-arguments, too-many-positional-arguments, too-many-locals
+    cap, label, start, count, writer, headless, from_file, interval_s
+):
+    """Capture one letter; return (frames queued, whether the session goes on)."""
+    collecting = headless
+    queued, last, began = 0, 0.0, time.perf_counter()
+    if collecting:
+        print(f"🚀 Capturing {count} images of {label}...")
+    else:
+        print(f"📸 Show '{label}' and press 'c' to start capturing, 'q' to quit.")
+
+    while queued < count:
+        ret, frame = cap.read()
+        if not ret or frame is None:
+            if from_file:
+                print(f"⚠️ Video ended after {queued} images of {label}.")
+                return queued, False
+            print("⚠️ Frame not captured. Retrying...")
+            continue
+        square = square_crop(frame)
+
+        if not headless:
+            cv2.imshow("Capture Window", square)
+            key = cv2.waitKey(1)
+            if key == ord("q"):
+                print("👋 Quit requested.")
+                return queued, False
+            if key == ord("c") and not collecting:
+                print(f"🚀 Capturing {count} images of {label}...")
+                collecting, began = True, time.perf_counter()
+
+        now = time.perf_counter()
+        if not collecting or now - last < interval_s:
+            continue
+        name = f"{label}_{start + queued}.jpg"
+        if writer.submit(label, name, square, block=from_file):
+            queued += 1
+            last = now
+            if queued % 100 == 0:
+                print(f"📁 {label}: {queued}/{count}")
+
+    elapsed = time.perf_counter() - began
+    print(f"✅ {label}: {queued} images in {elapsed:.1f}s ({queued / elapsed:.1f}/s)")
+    return queued, True
+
+
+def main():
+    """Parse arguments and run a capture session."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--labels", nargs="+", required=True, help="letters in order")
+    parser.add_argument("--count", type=int, default=NUM_IMAGES, help="per letter")
+    parser.add_argument("--source", default="0", help="camera index or video file")
+    parser.add_argument("--out", default=SAVE_DIR, help="dataset folder")
+    parser.add_argument("--packed", help="also append frames to this pack")
+    parser.add_argument("--no-files", action="store_true", help="only write the pack")
+    parser.add_argument("--headless", action="store_true", help="no preview window")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--queue-size", type=int, default=64)
+    parser.add_argument("--quality", type=int, default=JPEG_QUALITY)
+    parser.add_argument(
+        "--interval-ms", type=float, default=0, help="least time between saved frames"
+    )
+    args = parser.parse_args()
+    if args.no_files and not args.packed:
+        parser.error("--no-files needs --packed")
+
+    cap, from_file = open_source(args.source)
+    pack = PackWriter(args.packed) if args.packed else None
+    save_dir = None if args.no_files else os.path.abspath(args.out)
+    writer = FrameWriter(
+        save_dir, pack, args.workers, args.queue_size, quality=args.quality
+    )
+    print("🗂️ Saving images to:", ", ".join(filter(None, [save_dir, args.packed])))
+    try:
+        captured = capture(
+            cap,
+            args.labels,
+            args.count,
+            writer,
+            headless=args.headless or from_file,
+            from_file=from_file,
+            interval_s=args.interval_ms / 1000,
+        )
+    finally:
+        cap.release()
+        if not (args.headless or from_file):
+            cv2.destroyAllWindows()
+        writer.close()
+        if pack is not None:
+            pack.close()
+    print(
+        f"✅ Saved {writer.written} images "
+        f"({writer.dropped} dropped while the writers were busy, "
+        f"{writer.errors} failed): {captured}"
+    )
+
+
+if __name__ == "__main__":
+    main()
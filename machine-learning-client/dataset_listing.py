@@ -0,0 +1,54 @@
+"""List and split the folder-per-letter ASL image datasets.
+
+Kept free of TensorFlow so the capture, packing and evaluation tools can
+use it without importing the framework. The training/validation split is
+made per class from a seeded shuffle of the sorted file names, so it is the
+same on every run and machine, for the folders and for a pack of them.
+"""
+
+import os
+import random
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def list_dataset(dataset_path):
+    """Return (paths, label indices, labels) for a folder-per-class dataset.
+
+    Classes are the sorted subdirectory names, as in train_model.py.
+    """
+    labels = sorted(
+        d
+        for d in os.listdir(dataset_path)
+        if os.path.isdir(os.path.join(dataset_path, d))
+    )
+    paths, targets = [], []
+    for index, label in enumerate(labels):
+        folder = os.path.join(dataset_path, label)
+        for name in sorted(os.listdir(folder)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(folder, name))
+                targets.append(index)
+    return paths, targets, labels
+
+
+def split_dataset(paths, targets, validation_split=0.2, seed=0):
+    """Split into ((train paths, targets), (validation paths, targets)).
+
+    Every class keeps the same share of validation images, chosen by a
+    seeded shuffle, so the split never depends on listing order or time.
+    """
+    by_class = {}
+    for path, target in zip(paths, targets):
+        by_class.setdefault(target, []).append(path)
+
+    rng = random.Random(seed)
+    train, validation = ([], []), ([], [])
+    for target in sorted(by_class):
+        files = sorted(by_class[target])
+        rng.shuffle(files)
+        count = int(round(len(files) * validation_split))
+        for subset, chosen in ((validation, files[:count]), (train, files[count:])):
+            subset[0].extend(chosen)
+            subset[1].extend([target] * len(chosen))
+    return train, validation
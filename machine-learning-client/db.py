@@ -0,0 +1,214 @@
+"""MongoDB client factory and connection-pool settings.
+
+The ML client and the web app each keep an identical copy of this module,
+so both services build their client the same way from the environment:
+
+- ``APP_DB_NAME``: database name (default ``ml_database``)
+- ``MONGO_MAX_POOL_SIZE`` / ``MONGO_MIN_POOL_SIZE``: connections per server
+  per process (default ``100`` / ``0``)
+- ``MONGO_WAIT_QUEUE_TIMEOUT_MS``: how long a request waits for a free
+  connection before failing (default ``0``, wait as long as server selection
+  allows)
+- ``MONGO_TIMEOUT_MS``: server selection timeout (default ``5000``)
+- ``MONGO_COMPRESSORS``: wire compression in order of preference (default
+  ``zstd,snappy,zlib``); compressors whose package is not installed are
+  skipped. ``zstandard`` is in the Pipfile, ``python-snappy`` is not.
+- ``MONGO_HISTORY_W`` / ``MONGO_HISTORY_JOURNAL``: write concern for the
+  prediction history collections (default ``1`` / ``false``). Other
+  collections keep the server's default.
+
+A pool listener counts connections and check-outs for the metrics endpoint.
+A check-out only counts as waiting when it starts while every connection
+to its server is in use, so ``max_waiting`` stays at zero until the pool
+is too small for the load.
+"""
+
+import os
+import threading
+
+from pymongo import MongoClient, WriteConcern, compression_support
+from pymongo.monitoring import ConnectionPoolListener
+
+DEFAULT_DB_NAME = "ml_database"
+
+
+def available_compressors(names):
+    """Return the compressors in ``names`` that pymongo can use here.
+
+    Which package a compressor needs depends on the pymongo version, so
+    pymongo's own check is asked.
+    """
+    return [
+        name
+        for name in names
+        if getattr(compression_support, f"_have_{name}", lambda: False)()
+    ]
+
+
+def client_options():
+    """Return the MongoClient keyword arguments set by the environment."""
+    options = {
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", "100")),
+        "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+        "serverSelectionTimeoutMS": int(os.getenv("MONGO_TIMEOUT_MS", "5000")),
+    }
+    wait_ms = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "0"))
+    if wait_ms > 0:
+        options["waitQueueTimeoutMS"] = wait_ms
+    compressors = available_compressors(
+        name.strip()
+        for name in os.getenv("MONGO_COMPRESSORS", "zstd,snappy,zlib").split(",")
+    )
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+    return options
+
+
+def history_write_concern():
+    """Write concern for the prediction history: acknowledged, not journaled."""
+    w = os.getenv("MONGO_HISTORY_W", "1")
+    return WriteConcern(
+        w=int(w) if w.isdigit() else w,
+        j=os.getenv("MONGO_HISTORY_JOURNAL", "false").lower() == "true",
+    )
+
+
+class PoolStats(ConnectionPoolListener):
+    """Counts pool connections and check-outs across every server.
+
+    ``max_pool_size`` is the per-server limit (``0``: no limit); a check-out
+    that starts with that many connections in use is counted as waiting.
+    """
+
+    def __init__(self, max_pool_size=0):
+        self.max_pool_size = max_pool_size
+        self._lock = threading.Lock()
+        # Per server address: connections in use and check-outs blocked on them
+        self._in_use = {}
+        self._blocked = {}
+        self._counts = dict.fromkeys(
+            (
+                "open",
+                "in_use",
+                "waiting",
+                "max_in_use",
+                "max_waiting",
+                "created",
+                "closed",
+                "checkouts",
+                "checkout_failures",
+                "pool_clears",
+            ),
+            0,
+        )
+        self._checkout_ms = 0.0
+
+    def _add(self, **deltas):
+        """Apply counter changes and track the peaks."""
+        with self._lock:
+            for key, delta in deltas.items():
+                self._counts[key] += delta
+            counts = self._counts
+            counts["max_in_use"] = max(counts["max_in_use"], counts["in_use"])
+            counts["max_waiting"] = max(counts["max_waiting"], counts["waiting"])
+
+    def pool_created(self, event):
+        """Not counted."""
+
+    def pool_ready(self, event):
+        """Not counted."""
+
+    def pool_cleared(self, event):
+        """Count a pool reset after a network error or failover."""
+        self._add(pool_clears=1)
+
+    def pool_closed(self, event):
+        """Not counted."""
+
+    def connection_created(self, event):
+        """Count a new connection."""
+        self._add(open=1, created=1)
+
+    def connection_ready(self, event):
+        """Not counted."""
+
+    def connection_closed(self, event):
+        """Count a closed connection."""
+        self._add(open=-1, closed=1)
+
+    def _unblock(self, address):
+        """Return -1 if a check-out to ``address`` was counted as waiting."""
+        with self._lock:
+            if self._blocked.get(address, 0) == 0:
+                return 0
+            self._blocked[address] -= 1
+            return -1
+
+    def connection_check_out_started(self, event):
+        """Count a request that has to wait because the pool is full."""
+        with self._lock:
+            full = 0 < self.max_pool_size <= self._in_use.get(event.address, 0)
+            if full:
+                self._blocked[event.address] = self._blocked.get(event.address, 0) + 1
+        if full:
+            self._add(waiting=1)
+
+    def connection_check_out_failed(self, event):
+        """Count a request that gave up on getting a connection."""
+        self._add(waiting=self._unblock(event.address), checkout_failures=1)
+
+    def connection_checked_out(self, event):
+        """Count a request that got a connection, and how long it waited."""
+        waiting = self._unblock(event.address)
+        with self._lock:
+            self._in_use[event.address] = self._in_use.get(event.address, 0) + 1
+            duration = getattr(event, "duration", None)  # pymongo 4.7+
+            if duration is not None:
+                self._checkout_ms += duration * 1000
+        self._add(waiting=waiting, in_use=1, checkouts=1)
+
+    def connection_checked_in(self, event):
+        """Count a connection going back to the pool."""
+        with self._lock:
+            self._in_use[event.address] = self._in_use.get(event.address, 1) - 1
+        self._add(in_use=-1)
+
+    def stats(self):
+        """Return the counters, peaks and mean check-out wait."""
+        with self._lock:
+            checkouts = self._counts["checkouts"]
+            return {
+                **self._counts,
+                "mean_checkout_ms": self._checkout_ms / checkouts if checkouts else 0.0,
+            }
+
+
+pool_stats = PoolStats()
+
+
+def make_client(uri=None, appname=None):
+    """Build a MongoClient with this module's pool, timeout and compression."""
+    options = client_options()
+    pool_stats.max_pool_size = options["maxPoolSize"]
+    return MongoClient(
+        uri or os.getenv("URI"),
+        appname=appname,
+        event_listeners=[pool_stats],
+        **options,
+    )
+
+
+def get_database(client):
+    """Return the application database on ``client``."""
+    return client[os.getenv("APP_DB_NAME") or DEFAULT_DB_NAME]
+
+
+def metrics():
+    """Pool settings and counters for a metrics endpoint."""
+    options = client_options()
+    return {
+        "max_pool_size": options["maxPoolSize"],
+        "min_pool_size": options["minPoolSize"],
+        "compressors": options.get("compressors", ""),
+        **pool_stats.stats(),
+    }
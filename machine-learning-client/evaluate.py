@@ -0,0 +1,270 @@
+"""Evaluate a model on a held-out dataset in large batches.
+
+Streams an image folder tree (one folder per letter) or a pack from
+pack_dataset.py through any inference backend. Frames are decoded and
+scaled on a background thread while the model runs the previous batch.
+Writes a JSON report with overall and top-k accuracy, per-letter
+precision and recall, the confusion matrix and the measured throughput:
+
+    python evaluate.py --dataset dataset/asl_alphabet_test --out report.json
+
+``--split validation`` evaluates only the images train_model.py held out
+of a training folder or pack. ``--min-accuracy`` and ``--min-throughput``
+make the command exit with status 1 when the model falls short, so a
+deploy can be gated on it.
+"""
+
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from inference_backends import BACKENDS, load_backend
+from dataset_listing import list_dataset, split_dataset
+from model_registry import load_labels
+from packed_dataset import PackedDataset, decode_frame, is_packed
+from preprocessing import normalize
+
+_DONE = object()  # Queued by the loader thread after the last batch
+
+
+def open_dataset(dataset_path, split="all", validation_split=0.2, seed=0):
+    """Return (labels, batch source) for a folder tree or a pack.
+
+    The batch source takes a batch size and a worker count and yields
+    (uint8 frames, label indices) batches. ``split`` is ``all`` or
+    ``validation``, the held-out share train_model.py uses.
+    """
+    if is_packed(dataset_path):
+        packed = PackedDataset(dataset_path)
+        indices = None
+        if split == "validation":
+            indices = packed.split(validation_split, seed)[1]
+
+        def packed_batches(batch_size, workers):  # pylint: disable=unused-argument
+            yield from packed.batches(indices, batch_size=batch_size)
+
+        return packed.labels, packed_batches
+
+    paths, targets, labels = list_dataset(dataset_path)
+    if split == "validation":
+        paths, targets = split_dataset(paths, targets, validation_split, seed)[1]
+
+    def folder_batches(batch_size, workers):
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for start in range(0, len(paths), batch_size):
+                chunk = paths[start : start + batch_size]
+                frames = np.stack(list(pool.map(decode_frame, chunk)))
+                yield frames, np.asarray(targets[start : start + batch_size])
+
+    return labels, folder_batches
+
+
+def prefetch(batches, depth=2):
+    """Run ``batches`` on a background thread, ``depth`` batches ahead.
+
+    Each uint8 batch is scaled to float32 on that thread too, so the caller
+    only has to run the model.
+    """
+    ready = queue.Queue(maxsize=max(1, depth))
+
+    def load():
+        try:
+            for frames, targets in batches:
+                ready.put((normalize(frames), targets))
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            ready.put(e)
+        ready.put(_DONE)
+
+    threading.Thread(target=load, daemon=True).start()
+    while True:
+        item = ready.get()
+        if item is _DONE:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+class Evaluation:
+    """Accumulates a confusion matrix and top-k hits one batch at a time.
+
+    Rows of the confusion matrix are true labels and columns predicted
+    labels, both in the model's label order.
+    """
+
+    def __init__(self, labels, top_k=(1, 3, 5)):
+        self.labels = labels
+        self.top_k = sorted({k for k in top_k if 0 < k <= len(labels)} | {1})
+        self.confusion = np.zeros((len(labels), len(labels)), dtype=np.int64)
+        self.top_hits = dict.fromkeys(self.top_k, 0)
+        self.images = 0
+
+    def add(self, probabilities, targets):
+        """Count one batch of model outputs against its true label indices."""
+        probabilities = np.asarray(probabilities)
+        targets = np.asarray(targets)
+        np.add.at(self.confusion, (targets, probabilities.argmax(axis=1)), 1)
+        # Rank of the true label: how many classes scored strictly higher
+        true_scores = probabilities[np.arange(len(targets)), targets]
+        ranks = (probabilities > true_scores[:, np.newaxis]).sum(axis=1)
+        for k in self.top_k:
+            self.top_hits[k] += int((ranks < k).sum())
+        self.images += len(targets)
+
+    def report(self):
+        """Return accuracy, top-k accuracy, per-label scores and the matrix."""
+        hits = np.diag(self.confusion)
+        predicted = self.confusion.sum(axis=0)
+        support = self.confusion.sum(axis=1)
+        per_label = {}
+        for i, label in enumerate(self.labels):
+            precision = hits[i] / predicted[i] if predicted[i] else 0.0
+            recall = hits[i] / support[i] if support[i] else 0.0
+            f1 = 2 * precision * recall / (precision + recall) if hits[i] else 0.0
+            per_label[label] = {
+                "precision": round(float(precision), 4),
+                "recall": round(float(recall), 4),
+                "f1": round(float(f1), 4),
+                "support": int(support[i]),
+            }
+        images = max(self.images, 1)
+        return {
+            "images": self.images,
+            "accuracy": round(float(hits.sum() / images), 4),
+            "top_k_accuracy": {
+                str(k): round(self.top_hits[k] / images, 4) for k in self.top_k
+            },
+            "per_label": per_label,
+            "labels": self.labels,
+            "confusion_matrix": self.confusion.tolist(),
+        }
+
+
+def label_map(dataset_labels, model_labels):
+    """Return an array turning dataset label indices into the model's."""
+    missing = sorted(set(dataset_labels) - set(model_labels))
+    if missing:
+        raise ValueError(f"Labels not known to the model: {', '.join(missing)}")
+    return np.array([model_labels.index(label) for label in dataset_labels])
+
+
+def evaluate(predict, batches, dataset_labels, model_labels, top_k=(1, 3, 5)):
+    """Run every batch through ``predict`` and return the report.
+
+    Dataset label indices are mapped to the model's by name. Throughput is
+    reported end to end and for the model calls alone.
+    """
+    to_model = label_map(dataset_labels, model_labels)
+    evaluation = Evaluation(model_labels, top_k)
+
+    model_seconds = 0.0
+    start = time.perf_counter()
+    for frames, targets in batches:
+        model_start = time.perf_counter()
+        probabilities = predict(frames)
+        model_seconds += time.perf_counter() - model_start
+        evaluation.add(probabilities, to_model[targets])
+    seconds = time.perf_counter() - start
+
+    report = evaluation.report()
+    report["throughput"] = {
+        "seconds": round(seconds, 3),
+        "images_per_sec": round(evaluation.images / seconds, 1) if seconds else 0.0,
+        "model_images_per_sec": (
+            round(evaluation.images / model_seconds, 1) if model_seconds else 0.0
+        ),
+    }
+    return report
+
+
+def gate_failures(report, min_accuracy=None, min_throughput=None):
+    """Return a message for every deploy gate the report falls short of."""
+    failures = []
+    if min_accuracy is not None and report["accuracy"] < min_accuracy:
+        failures.append(f"accuracy {report['accuracy']} < {min_accuracy}")
+    speed = report["throughput"]["images_per_sec"]
+    if min_throughput is not None and speed < min_throughput:
+        failures.append(f"throughput {speed} < {min_throughput} images/sec")
+    return failures
+
+
+def print_summary(report):
+    """Print the headline numbers and the weakest letters."""
+    throughput = report["throughput"]
+    print(f"✅ {report['images']} images, accuracy {report['accuracy']:.4f}")
+    print(
+        "   top-k: "
+        + ", ".join(f"top-{k} {v:.4f}" for k, v in report["top_k_accuracy"].items())
+    )
+    print(
+        f"📈 {throughput['images_per_sec']} images/sec end to end, "
+        f"{throughput['model_images_per_sec']} in the model"
+    )
+    scored = [item for item in report["per_label"].items() if item[1]["support"]]
+    for label, scores in sorted(scored, key=lambda item: item[1]["recall"])[:3]:
+        print(
+            f"⚠️ {label}: recall {scores['recall']:.3f}, "
+            f"precision {scores['precision']:.3f} ({scores['support']} images)"
+        )
+
+
+def main():
+    """Parse arguments, evaluate, write the report and apply the gates."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", default="dataset/asl_alphabet_test")
+    parser.add_argument("--split", choices=("all", "validation"), default="all")
+    parser.add_argument("--backend", choices=BACKENDS, default="keras")
+    parser.add_argument("--model", help="model file (default: the backend's)")
+    parser.add_argument("--labels", default="labels.txt")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--prefetch", type=int, default=2)
+    parser.add_argument("--top-k", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--min-accuracy", type=float)
+    parser.add_argument("--min-throughput", type=float, help="images/sec end to end")
+    args = parser.parse_args()
+
+    load_start = time.perf_counter()
+    backend = load_backend(args.backend, args.model)
+    load_seconds = time.perf_counter() - load_start
+    dataset_labels, batches = open_dataset(args.dataset, args.split)
+
+    report = evaluate(
+        backend.predict,
+        prefetch(batches(args.batch_size, args.workers), args.prefetch),
+        dataset_labels,
+        load_labels(args.labels),
+        args.top_k,
+    )
+    report["throughput"].update(
+        batch_size=args.batch_size, model_load_seconds=round(load_seconds, 3)
+    )
+    report = {
+        "model": backend.path,
+        "backend": args.backend,
+        "dataset": args.dataset,
+        "split": args.split,
+        **report,
+    }
+    print_summary(report)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Report written to {args.out}")
+
+    failures = gate_failures(report, args.min_accuracy, args.min_throughput)
+    for failure in failures:
+        print(f"❌ {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Export the trained model for faster CPU inference.
+
+Converts ``sign_model.h5`` to TFLite (float16 and/or full int8 post-training
+quantization) and, if tf2onnx is installed, to ONNX. The int8 export is
+calibrated on a sample of the training images (the folders, or a pack from
+pack_dataset.py), so its quantization ranges match real frames. Select an
+export in main.py with ``MODEL_BACKEND`` and ``MODEL_PATH``, and check it
+against Keras with bench_backends.py:
+
+    python export_model.py --formats fp16 int8 onnx --calibration-samples 300
+"""
+
+# pylint: disable=import-error, no-name-in-module, import-outside-toplevel
+
+import argparse
+import os
+import random
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.models import load_model
+
+from dataset_listing import list_dataset
+from packed_dataset import PackedDataset, is_packed
+from preprocessing import normalize, preprocess_batch
+
+EXPORT_FORMATS = ("fp16", "int8", "onnx")
+EXPORT_PATHS = {
+    "fp16": "sign_model_fp16.tflite",
+    "int8": "sign_model_int8.tflite",
+    "onnx": "sign_model.onnx",
+}
+
+
+def sample_dataset(dataset_path, count, seed=0):
+    """Return (paths, label indices) for up to ``count`` images drawn evenly across classes.
+
+    Classes are the sorted subdirectory names, as in train_model.py. The
+    same seed always gives the same sample.
+    """
+    all_paths, all_targets, labels = list_dataset(dataset_path)
+    rng = random.Random(seed)
+    per_class = max(1, count // max(len(labels), 1))
+    paths, targets = [], []
+    for index in range(len(labels)):
+        files = [p for p, t in zip(all_paths, all_targets) if t == index]
+        chosen = rng.sample(files, min(per_class, len(files)))
+        paths.extend(chosen)
+        targets.extend([index] * len(chosen))
+    return paths[:count], targets[:count]
+
+
+def sample_frames(dataset_path, count, seed=0):
+    """Return (float32 frames, label indices) for an even sample of a dataset.
+
+    ``dataset_path`` is an image folder tree or a pack from pack_dataset.py.
+    """
+    if is_packed(dataset_path):
+        packed = PackedDataset(dataset_path)
+        images, targets = packed.gather(packed.sample(count, seed))
+        return normalize(images), targets
+    paths, targets = sample_dataset(dataset_path, count, seed)
+    return preprocess_batch(paths), np.array(targets)
+
+
+def representative_dataset(frames):
+    """Calibration generator for the TFLite converter, one frame at a time."""
+
+    def generator():
+        for frame in frames:
+            yield [frame[np.newaxis]]
+
+    return generator
+
+
+def export_tflite(model, path, quantization, calibration=None):
+    """Write a TFLite export of ``model``.
+
+    ``quantization`` is ``"fp16"`` (float16 weights) or ``"int8"`` (integer
+    weights and activations, calibrated on ``calibration`` frames; input and
+    output stay float32 so callers pass the same arrays as to Keras).
+    """
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "fp16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == "int8":
+        if calibration is None or len(calibration) == 0:
+            raise ValueError("int8 export needs calibration frames")
+        converter.representative_dataset = representative_dataset(calibration)
+        converter.target_spec.supported_ops = [
+            tf.lite.OpsSet.TFLITE_BUILTINS_INT8,
+            tf.lite.OpsSet.TFLITE_BUILTINS,
+        ]
+    else:
+        raise ValueError(f"Unknown quantization {quantization!r}")
+
+    with open(path, "wb") as f:
+        f.write(converter.convert())
+    return path
+
+
+def export_onnx(model, path):
+    """Write an ONNX export of ``model`` (needs tf2onnx)."""
+    try:
+        import tf2onnx
+    except ImportError as e:
+        raise ImportError("ONNX export needs tf2onnx: pip install tf2onnx") from e
+
+    spec = (tf.TensorSpec((None, *model.input_shape[1:]), tf.float32, name="input"),)
+    tf2onnx.convert.from_keras(model, input_signature=spec, output_path=path)
+    return path
+
+
+def main():
+    """Parse arguments and write the requested exports."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="sign_model.h5")
+    parser.add_argument(
+        "--formats", nargs="+", choices=EXPORT_FORMATS, default=["int8"]
+    )
+    parser.add_argument("--dataset", default="dataset/asl_alphabet_train")
+    parser.add_argument("--calibration-samples", type=int, default=300)
+    parser.add_argument("--out-dir", default=".")
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    calibration = None
+    if "int8" in args.formats:
+        calibration, _ = sample_frames(args.dataset, args.calibration_samples)
+        print(f"📦 Calibrating int8 on {len(calibration)} images from {args.dataset}")
+
+    for fmt in args.formats:
+        path = os.path.join(args.out_dir, EXPORT_PATHS[fmt])
+        if fmt == "onnx":
+            export_onnx(model, path)
+        else:
+            export_tflite(model, path, fmt, calibration)
+        print(f"✅ Wrote {path} ({os.path.getsize(path) / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
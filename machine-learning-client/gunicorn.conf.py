@@ -0,0 +1,55 @@
+"""Gunicorn settings for serving the ML client in production.
+
+Each worker is one process with a pool of request threads (``gthread``).
+Inference in a worker goes through a single micro-batching thread, so one
+slow forward pass no longer blocks every other request the way the
+Werkzeug dev server does. The model is loaded in each worker after the fork,
+because TensorFlow's thread pools do not survive ``fork()``. Use the TFLite
+backend (``MODEL_BACKEND=tflite``) to share one copy of the weights: the
+interpreter memory-maps the model file, so every worker reads the same
+page-cache pages.
+
+The CPU cores are split between workers, and the per-worker TensorFlow
+and TFLite/ONNX Runtime thread counts are set to match, so N workers do not
+each start one thread per core.
+
+Video-stream sessions (``/stream/sessions``) and the prediction cache live
+in one worker's memory. With more than one worker, a session's later
+frames can reach a worker that never saw it and get a 404, so streaming
+needs ``WEB_CONCURRENCY=1`` or one single-worker gunicorn per port behind
+a proxy that routes each session id to the same one. The ``/ws/predict``
+WebSocket is not affected: a connection stays on one worker.
+
+    gunicorn -c gunicorn.conf.py main:app
+"""
+
+# pylint: disable=invalid-name
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5001')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+# Long enough for the first request to wait out the model warm-up
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+accesslog = "-"
+
+# Split the cores between workers. Workers inherit these variables, and
+# TensorFlow and main.py read them when they load the model.
+cores_per_worker = str(max(1, (os.cpu_count() or 1) // workers))
+os.environ.setdefault("MODEL_THREADS", cores_per_worker)
+os.environ.setdefault("TF_NUM_INTRAOP_THREADS", os.environ["MODEL_THREADS"])
+os.environ.setdefault("TF_NUM_INTEROP_THREADS", "1")
+os.environ.setdefault("OMP_NUM_THREADS", os.environ["MODEL_THREADS"])
+
+
+def when_ready(server):
+    """Warn at startup that stream sessions are per worker."""
+    if workers > 1:
+        server.log.warning(
+            "%d workers: /stream/sessions need WEB_CONCURRENCY=1 or sticky "
+            "routing by session id; see gunicorn.conf.py",
+            workers,
+        )
@@ -0,0 +1,165 @@
+"""Write-behind buffer for prediction history.
+
+Prediction documents are queued in memory and written to MongoDB from a
+background thread with ``insert_many(ordered=False)``, so request latency
+no longer includes a database round trip and a slow MongoDB cannot stall
+inference.
+"""
+
+import logging
+import queue
+import threading
+import time
+
+from pymongo.errors import BulkWriteError, PyMongoError
+
+
+def written_documents(batch, error):
+    """Return the documents of ``batch`` an unordered bulk insert still wrote.
+
+    With ``ordered=False`` MongoDB writes every document except those listed
+    in ``writeErrors``. Any other error leaves it unknown, so none are
+    assumed written.
+    """
+    if not isinstance(error, BulkWriteError):
+        return []
+    failed = {e["index"] for e in (error.details or {}).get("writeErrors", [])}
+    return [doc for i, doc in enumerate(batch) if i not in failed]
+
+
+class BufferedWriter:  # pylint: disable=too-many-instance-attributes
+    """Buffers documents and flushes them in bulk on a size or time threshold.
+
+    When the buffer is full, ``write`` waits up to ``put_timeout_ms`` for room
+    (backpressure) and then drops the document, counting it in ``dropped``.
+    ``on_flush``, if given, is called with the documents of each batch that
+    were written, including those of a partly failed batch.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+        self,
+        collection,
+        max_buffer=10000,
+        flush_size=500,
+        flush_interval_ms=200,
+        put_timeout_ms=0,
+        on_flush=None,
+    ):
+        self.collection = collection
+        self.on_flush = on_flush
+        self.flush_size = max(flush_size, 1)
+        self.flush_interval = max(flush_interval_ms, 0) / 1000.0
+        self.put_timeout = max(put_timeout_ms, 0) / 1000.0
+        self._queue = queue.Queue(maxsize=max_buffer)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = None
+        self._written = 0
+        self._dropped = 0
+        self._failed = 0
+        self._flushes = 0
+
+    def write(self, doc):
+        """Queue one document. Returns False if it was dropped."""
+        self._ensure_worker()
+        try:
+            if self.put_timeout:
+                self._queue.put(doc, timeout=self.put_timeout)
+            else:
+                self._queue.put_nowait(doc)
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            logging.warning("⚠️ History buffer full, dropping prediction write.")
+            return False
+        return True
+
+    def write_many(self, docs):
+        """Queue several documents. Returns how many were accepted."""
+        return sum(self.write(doc) for doc in docs)
+
+    def flush(self):
+        """Write everything currently buffered, on the calling thread."""
+        while True:
+            batch = self._drain(self.flush_size)
+            if not batch:
+                return
+            self._insert(batch)
+
+    def close(self, timeout=5.0):
+        """Stop the background thread and flush whatever is left."""
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join(timeout=timeout)
+        self.flush()
+
+    def stats(self):
+        """Return buffer depth and write counters."""
+        with self._lock:
+            return {
+                "buffered": self._queue.qsize(),
+                "capacity": self._queue.maxsize,
+                "written": self._written,
+                "dropped": self._dropped,
+                "failed": self._failed,
+                "flushes": self._flushes,
+            }
+
+    def _ensure_worker(self):
+        """Start the flush thread on first use."""
+        if self._worker is not None or self._stop.is_set():
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="history-writer", daemon=True
+                )
+                self._worker.start()
+
+    def _drain(self, limit):
+        """Take up to ``limit`` documents off the buffer without waiting."""
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _insert(self, batch):
+        """Bulk-insert one batch, counting successes and failures."""
+        written = batch
+        try:
+            self.collection.insert_many(batch, ordered=False)
+        except PyMongoError as e:
+            # With ordered=False, MongoDB still writes every document it can
+            written = written_documents(batch, e)
+            logging.error("❌ History flush failed: %s", e)
+        with self._lock:
+            self._written += len(written)
+            self._failed += len(batch) - len(written)
+            self._flushes += 1
+        if self.on_flush is not None and written:
+            try:
+                self.on_flush(written)
+            except Exception:  # pylint: disable=broad-exception-caught
+                logging.exception("❗ History on_flush hook failed")
+
+    def _run(self):
+        """Flush loop: wait for a document, then gather until full or timed out."""
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.flush_size and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._insert(batch)
@@ -0,0 +1,149 @@
+"""Interchangeable inference backends for the sign model.
+
+``MODEL_BACKEND`` selects how ``main.py`` runs the model:
+
+- ``keras`` (default): the trained ``sign_model.h5`` through Keras
+- ``tflite``: a TFLite export (see export_model.py), float16 or int8
+- ``onnx``: an ONNX export run with ONNX Runtime (optional dependency)
+
+Every backend takes a float32 (N, 100, 100, 3) batch and returns an
+(N, num_classes) array of class probabilities, so callers do not need to
+know which one is in use.
+"""
+
+# pylint: disable=import-outside-toplevel, import-error, no-name-in-module
+# pylint: disable=too-few-public-methods, invalid-name
+
+import os
+import threading
+
+import numpy as np
+
+BACKENDS = ("keras", "tflite", "onnx")
+DEFAULT_MODEL_PATHS = {
+    "keras": "sign_model.h5",
+    "tflite": "sign_model_int8.tflite",
+    "onnx": "sign_model.onnx",
+}
+
+
+class KerasBackend:
+    """Runs the Keras model directly, on ``num_threads`` intra-op threads if given."""
+
+    name = "keras"
+
+    def __init__(self, path, num_threads=None):
+        import tensorflow as tf
+        from tensorflow.keras.models import load_model
+
+        if num_threads:
+            # Only takes effect before TensorFlow's first op runs
+            try:
+                tf.config.threading.set_intra_op_parallelism_threads(num_threads)
+            except RuntimeError:
+                pass
+        self.path = path
+        self.model = load_model(path)
+
+    def predict(self, batch):
+        """Return class probabilities for a batch."""
+        return self.model.predict(batch, verbose=0)
+
+
+def _tflite_interpreter(path, num_threads):
+    """Create a TFLite interpreter, preferring the standalone LiteRT runtime."""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+
+        Interpreter = tf.lite.Interpreter
+    return Interpreter(model_path=path, num_threads=num_threads)
+
+
+class TFLiteBackend:
+    """Runs a TFLite export, resizing its input to each batch size.
+
+    Quantized inputs and outputs are converted with the model's own scale and
+    zero point. The interpreter is not thread-safe, so calls are serialized.
+    """
+
+    name = "tflite"
+
+    def __init__(self, path, num_threads=None):
+        self.path = path
+        self.interpreter = _tflite_interpreter(path, num_threads)
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self._lock = threading.Lock()
+        self._batch_size = None
+
+    def predict(self, batch):
+        """Return class probabilities for a batch."""
+        batch = np.asarray(batch, dtype=np.float32)
+        scale, zero_point = self.input["quantization"]
+        if scale:
+            batch = np.round(batch / scale + zero_point)
+        batch = batch.astype(self.input["dtype"])
+
+        with self._lock:
+            if self._batch_size != len(batch):
+                self.interpreter.resize_tensor_input(
+                    self.input["index"], [len(batch), *self.input["shape"][1:]]
+                )
+                self.interpreter.allocate_tensors()
+                self._batch_size = len(batch)
+            self.interpreter.set_tensor(self.input["index"], batch)
+            self.interpreter.invoke()
+            output = self.interpreter.get_tensor(self.output["index"])
+
+        scale, zero_point = self.output["quantization"]
+        if scale:
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output
+
+
+class OnnxBackend:
+    """Runs an ONNX export with ONNX Runtime on the CPU."""
+
+    name = "onnx"
+
+    def __init__(self, path, num_threads=None):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError(
+                "MODEL_BACKEND=onnx needs onnxruntime: pip install onnxruntime"
+            ) from e
+
+        options = onnxruntime.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.path = path
+        self.session = onnxruntime.InferenceSession(
+            path, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch):
+        """Return class probabilities for a batch."""
+        batch = np.asarray(batch, dtype=np.float32)
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+def load_backend(name="keras", path=None, num_threads=None):
+    """Load the model with the named backend.
+
+    ``path`` defaults to the file export_model.py writes for that backend.
+    ``num_threads`` caps the backend's intra-op threads.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown MODEL_BACKEND {name!r}, expected {BACKENDS}")
+    path = path or DEFAULT_MODEL_PATHS[name]
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No {name} model at {path}")
+    if name == "tflite":
+        return TFLiteBackend(path, num_threads)
+    if name == "onnx":
+        return OnnxBackend(path, num_threads)
+    return KerasBackend(path, num_threads)
@@ -0,0 +1,166 @@
+"""tf.data input pipeline for training on the ASL image folders.
+
+Each image is decoded once, with the same ``load_image`` the API uses, so
+the model trains on exactly what it will be served. The decoded 100x100
+uint8 frames are then cached in memory or in a cache file on disk, and
+later epochs read them from there instead of decoding the JPEGs again.
+Augmentation runs after the cache on whole batches with parallel map calls,
+and batches are prefetched while the model trains on the previous one.
+``make_packed_dataset`` feeds the same steps from a pack built by
+pack_dataset.py, which skips decoding and caching altogether.
+
+Listing the folders and the training/validation split live in
+dataset_listing.py.
+"""
+
+# pylint: disable=no-name-in-module, import-error
+
+import time
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import Sequential, layers
+from tensorflow.keras.callbacks import Callback
+
+from preprocessing import INPUT_SHAPE, load_image
+
+# ImageDataGenerator settings of the old pipeline; augmentation() matches them
+GENERATOR_AUGMENTATION = {
+    "rescale": 1.0 / 255,
+    "rotation_range": 30,
+    "width_shift_range": 0.2,
+    "height_shift_range": 0.2,
+    "zoom_range": 0.2,
+    "horizontal_flip": True,
+}
+
+
+def decode(path):
+    """Decode one image file into a uint8 (100, 100, 3) tensor."""
+    frame = tf.numpy_function(
+        lambda p: np.asarray(load_image(p.decode("utf-8")), dtype=np.uint8),
+        [path],
+        tf.uint8,
+    )
+    frame.set_shape(INPUT_SHAPE)
+    return frame
+
+
+def augmentation(seed=0):
+    """Random transforms matching the old ImageDataGenerator settings.
+
+    Rotation up to 30 degrees, 20% shifts, 20% zoom and horizontal flips,
+    filling new pixels from the nearest edge.
+    """
+    return Sequential(
+        [
+            layers.RandomRotation(30 / 360, fill_mode="nearest", seed=seed),
+            layers.RandomTranslation(0.2, 0.2, fill_mode="nearest", seed=seed),
+            layers.RandomZoom(0.2, fill_mode="nearest", seed=seed),
+            layers.RandomFlip("horizontal", seed=seed),
+        ]
+    )
+
+
+def make_dataset(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+    paths,
+    targets,
+    num_classes,
+    batch_size=32,
+    training=False,
+    cache="memory",
+    seed=0,
+):
+    """Build the batched ``(images, one-hot labels)`` dataset.
+
+    ``cache`` is ``"memory"``, a cache file path, or None to decode every
+    epoch. Training datasets are reshuffled every epoch and augmented;
+    validation datasets are neither.
+    """
+    dataset = tf.data.Dataset.from_tensor_slices(
+        (tf.constant(paths, dtype=tf.string), tf.constant(targets, dtype=tf.int32))
+    )
+    dataset = dataset.map(
+        lambda path, target: (decode(path), target),
+        num_parallel_calls=tf.data.AUTOTUNE,
+    )
+    if cache == "memory":
+        dataset = dataset.cache()
+    elif cache:
+        dataset = dataset.cache(cache)
+
+    if training:
+        dataset = dataset.shuffle(len(paths), seed=seed, reshuffle_each_iteration=True)
+    return finish(dataset.batch(batch_size), num_classes, training, seed)
+
+
+def make_packed_dataset(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+    packed, indices, num_classes, batch_size=32, training=False, seed=0
+):
+    """Build the same dataset from frames ``indices`` of a PackedDataset.
+
+    The pack is already decoded and memory-mapped, so there is no cache
+    step: each batch of indices is read straight from the map.
+    """
+    dataset = tf.data.Dataset.from_tensor_slices(np.asarray(indices, dtype=np.int64))
+    if training:
+        dataset = dataset.shuffle(
+            len(indices), seed=seed, reshuffle_each_iteration=True
+        )
+
+    def read(batch_indices):
+        images, batch_targets = tf.numpy_function(
+            packed.gather, [batch_indices], (tf.uint8, tf.int32)
+        )
+        images.set_shape((None, *INPUT_SHAPE))
+        batch_targets.set_shape((None,))
+        return images, batch_targets
+
+    dataset = dataset.batch(batch_size).map(read, num_parallel_calls=tf.data.AUTOTUNE)
+    return finish(dataset, num_classes, training, seed)
+
+
+def finish(dataset, num_classes, training, seed):
+    """Augment (training only), scale and one-hot batches of uint8 frames."""
+    transform = augmentation(seed) if training else None
+
+    def prepare(images, batch_targets):
+        images = tf.cast(images, tf.float32)
+        if transform is not None:
+            images = transform(images, training=True)
+        return images / 255.0, tf.one_hot(batch_targets, num_classes)
+
+    dataset = dataset.map(prepare, num_parallel_calls=tf.data.AUTOTUNE)
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+class ThroughputLogger(Callback):
+    """Prints and records training images per second for every epoch.
+
+    Only the training part of the epoch is timed, not the validation pass.
+    """
+
+    # pylint: disable=unused-argument
+
+    def __init__(self, images_per_epoch):
+        super().__init__()
+        self.images_per_epoch = images_per_epoch
+        self.rates = []
+        self._start = None
+        self._end = None
+
+    def on_epoch_begin(self, epoch, logs=None):
+        """Start the epoch clock."""
+        self._start, self._end = time.perf_counter(), None
+
+    def on_test_begin(self, logs=None):
+        """Stop the clock when validation starts."""
+        if self._start is not None and self._end is None:
+            self._end = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        """Record and print this epoch's images per second."""
+        elapsed = (self._end or time.perf_counter()) - self._start
+        rate = self.images_per_epoch / elapsed
+        self.rates.append(rate)
+        print(f"📈 Epoch {epoch + 1}: {rate:.1f} images/sec")
@@ -4,57 +4,390 @@
 # pylint: disable=broad-exception-caught
 
 import os
+import atexit
 import base64
+import hmac
+import json
 import logging
+import time
 from datetime import datetime
-from io import BytesIO
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS, cross_origin
-from pymongo import MongoClient
+from flask_sock import Sock
+from werkzeug.exceptions import RequestEntityTooLarge
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import PyMongoError
 from dotenv import load_dotenv
-import numpy as np
-from PIL import Image  # pylint: disable=import-error
-# fmt: off
-from tensorflow.keras.models import load_model  # pylint: disable=no-name-in-module, import-error
-# fmt: on
-
+import db as mongo
+from history_writer import BufferedWriter, written_documents
+from rollups import STATS_COLLECTION, apply_rollups
+from storage import open_history
+from preprocessing import preprocess_batch, preprocess_image, preprocess_rgb_bytes
+from streaming import SessionRegistry
+from prediction_cache import PredictionCache
+from inference_backends import DEFAULT_MODEL_PATHS, load_backend
+from model_loader import BackgroundModel, warmup_batch_sizes
+from model_registry import ModelRegistry, ModelVersion
 
 # === Initialize Flask app ===
 app = Flask(__name__)
 CORS(app)
+sock = Sock(app)
 logging.basicConfig(level=logging.DEBUG)
 
 # === Load environment variables ===
 load_dotenv()
 
-# === Load trained model (expects 100x100 input) ===
-try:
-    model = load_model("sign_model.h5")
-    logging.info("✅ Model loaded successfully.")
-except Exception as e:
-    logging.error("❌ Failed to load model: %s", e)
-    raise
+# === Load trained model versions (expect 100x100 input) ===
+# MODEL_BACKEND: "keras" (default), "tflite" or "onnx" (see inference_backends.py).
+# TensorFlow is imported, the model loaded and every batch size warmed up on a
+# background thread, so MongoDB setup below runs in parallel with it.
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "keras")
+MODEL_THREADS = int(os.getenv("MODEL_THREADS", "0")) or None
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "5"))
+BATCH_TIMEOUT_S = float(os.getenv("BATCH_TIMEOUT_S", "30"))
+# How long a batch waits for a model that is still loading; a request waits
+# that long on top of BATCH_TIMEOUT_S until the model is ready
+MODEL_LOAD_TIMEOUT_S = float(os.getenv("MODEL_LOAD_TIMEOUT_S", "60"))
+MODEL_WARMUP_BATCH_SIZES = [
+    int(size)
+    for size in os.getenv(
+        "MODEL_WARMUP_BATCH_SIZES",
+        ",".join(map(str, warmup_batch_sizes(BATCH_MAX_SIZE))),
+    ).split(",")
+    if size.strip()
+]
+
+
+def make_version(name, model_path, labels):
+    """Start loading one model version, with its own micro-batching thread."""
+    model = BackgroundModel(
+        lambda: load_backend(MODEL_BACKEND, model_path, MODEL_THREADS),
+        warmup_sizes=MODEL_WARMUP_BATCH_SIZES,
+        predict_timeout=MODEL_LOAD_TIMEOUT_S,
+    ).start()
+    return ModelVersion(
+        name,
+        labels,
+        model,
+        max_batch_size=BATCH_MAX_SIZE,
+        max_wait_ms=BATCH_MAX_WAIT_MS,
+    )
+
+
+def clear_prediction_cache():
+    """Drop cached results after a model swap; they may be the old model's."""
+    if prediction_cache is not None:
+        prediction_cache.clear()
+
+
+# Versioned models live in MODEL_REGISTRY_DIR (see model_registry.py); without
+# it the single MODEL_PATH model and labels.txt are served as "default".
+registry = ModelRegistry(
+    os.getenv("MODEL_REGISTRY_DIR", "models"),
+    make_version,
+    backend=MODEL_BACKEND,
+    default_path=os.getenv("MODEL_PATH") or DEFAULT_MODEL_PATHS.get(MODEL_BACKEND),
+    on_swap=clear_prediction_cache,
+).start()
+# MODEL_WATCH_INTERVAL_S=0 turns the file watch off (reload from /admin only)
+MODEL_WATCH_INTERVAL_S = float(os.getenv("MODEL_WATCH_INTERVAL_S", "5"))
+if MODEL_WATCH_INTERVAL_S > 0:
+    registry.watch(MODEL_WATCH_INTERVAL_S)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
 
 # === Setup MongoDB ===
+# Pool, timeout, compression and write concern settings are in db.py.
+# Prediction history layout: "documents", "timeseries" or "buckets" (see storage.py)
+STORAGE_MODE = os.getenv("STORAGE_MODE", "documents")
 try:
-    client = MongoClient(os.getenv("URI"))
-    db = client["ml_database"]
-    SENSOR_DATA = db["sensor_data"]
+    client = mongo.make_client(appname="ml-client")
+    db = mongo.get_database(client)
+    SENSOR_DATA = open_history(
+        db.with_options(write_concern=mongo.history_write_concern()), STORAGE_MODE
+    )
+    USER_STATS = db[STATS_COLLECTION]
     logging.info("✅ Connected to MongoDB.")
 except Exception as e:
     logging.error("❌ MongoDB connection failed: %s", e)
     SENSOR_DATA = None
+    USER_STATS = None
+
+
+def update_rollups(docs):
+    """Fold newly written predictions into the per-user stats collection."""
+    if USER_STATS is not None:
+        apply_rollups(USER_STATS, docs)
+
+
+# === Prediction history writes ===
+# "buffered" queues documents and bulk-writes them off the request thread,
+# "inline" writes them before the response is returned.
+HISTORY_WRITE_MODE = os.getenv("HISTORY_WRITE_MODE", "buffered")
+history_writer = None
+if SENSOR_DATA is not None and HISTORY_WRITE_MODE == "buffered":
+    history_writer = BufferedWriter(
+        SENSOR_DATA,
+        max_buffer=int(os.getenv("HISTORY_BUFFER_SIZE", "10000")),
+        flush_size=int(os.getenv("HISTORY_FLUSH_SIZE", "500")),
+        flush_interval_ms=float(os.getenv("HISTORY_FLUSH_INTERVAL_MS", "200")),
+        put_timeout_ms=float(os.getenv("HISTORY_PUT_TIMEOUT_MS", "0")),
+        on_flush=update_rollups,
+    )
+    atexit.register(history_writer.close)
+
+
+def save_predictions(docs):
+    """Store prediction documents through the configured write path."""
+    if SENSOR_DATA is None or not docs:
+        return
+    if history_writer is not None:
+        history_writer.write_many(docs)
+    else:
+        try:
+            SENSOR_DATA.insert_many(docs, ordered=False)
+        except PyMongoError as e:
+            update_rollups(written_documents(docs, e))
+            raise
+        update_rollups(docs)
+
+
+def run_model(batch, version=None):
+    """Run one forward pass over a stacked batch on a version (default: active)."""
+    return (version or registry.active).run(batch)
+
+
+# Upper bound on frames accepted by one /predict_batch request
+PREDICT_BATCH_MAX_IMAGES = int(os.getenv("PREDICT_BATCH_MAX_IMAGES", "256"))
+
+
+def decode_base64_image(image):
+    """Decode a base64 string or data URL into raw image bytes."""
+    return base64.b64decode(image.split(",")[1] if "," in image else image)
+
+
+# Request body types that carry the frame itself instead of JSON
+RAW_IMAGE_TYPES = ("application/octet-stream", "image/jpeg", "image/png")
+RAW_TENSOR_TYPE = "application/x-rgb24"
+
+# === Upload limits ===
+# Largest frame a single-frame request or WebSocket message may carry. The
+# web app uploads 100x100 JPEGs of a few KB, so this only stops oversize input
+MAX_FRAME_BYTES = int(os.getenv("MAX_FRAME_BYTES", str(1024 * 1024)))
+# Largest request body on any other route, batches included (0: no limit)
+app.config["MAX_CONTENT_LENGTH"] = (
+    int(os.getenv("MAX_REQUEST_BYTES", str(32 * 1024 * 1024))) or None
+)
+SINGLE_FRAME_ENDPOINTS = ("predict", "predict_login")
+
+
+def base64_size(size):
+    """Length of ``size`` bytes once base64 encoded."""
+    return 4 * -(-size // 3)
+
+
+app.config["SOCK_SERVER_OPTIONS"] = {"max_message_size": base64_size(MAX_FRAME_BYTES)}
+
+
+def body_limit():
+    """Return the largest body the current request may send."""
+    if request.endpoint not in SINGLE_FRAME_ENDPOINTS:
+        return app.config["MAX_CONTENT_LENGTH"]
+    if request.mimetype in (*RAW_IMAGE_TYPES, RAW_TENSOR_TYPE):
+        return MAX_FRAME_BYTES
+    # Base64 JSON: room for the data-URL prefix, the braces and a user_id
+    return base64_size(MAX_FRAME_BYTES) + 1024
+
+
+def payload_too_large(limit):
+    """413 response for a body over ``limit`` bytes."""
+    return jsonify({"error": f"Request body over {limit} bytes"}), 413
+
 
-# === Load label list ===
-LABELS_FILE = "labels.txt"
-if os.path.exists(LABELS_FILE):
-    with open(LABELS_FILE, "r", encoding="utf-8") as f:
-        LABELS = [line.strip() for line in f.readlines()]
-    logging.info("✅ Loaded labels from labels.txt.")
-else:
-    logging.warning("⚠️ labels.txt not found. Using fallback.")
-    LABELS = [chr(c) for c in range(ord("A"), ord("Z") + 1)]
+@app.before_request
+def limit_upload_size():
+    """Turn oversize uploads away from their Content-Length, unread.
+
+    Bodies without a length are cut off at the same limit while being read.
+    """
+    limit = body_limit()
+    request.max_content_length = limit
+    if limit and request.content_length and request.content_length > limit:
+        return payload_too_large(limit)
+    return None
+
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(_error):
+    """JSON 413 for a body that went over its limit while being read."""
+    return payload_too_large(request.max_content_length)
+
+
+# === Prediction cache for repeated frames ===
+# PREDICTION_CACHE_SIZE=0 turns the cache off
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "1024"))
+prediction_cache = None
+if PREDICTION_CACHE_SIZE > 0:
+    prediction_cache = PredictionCache(
+        max_entries=PREDICTION_CACHE_SIZE,
+        ttl_s=float(os.getenv("PREDICTION_CACHE_TTL_S", "300")),
+        perceptual=os.getenv("PREDICTION_CACHE_PERCEPTUAL", "false").lower() == "true",
+    )
+
+
+def cached_result(version, result):
+    """Count a result answered from the cache and tag it with its version."""
+    version.record(result)
+    return {**result, "model_version": version.name}
+
+
+def classify(raw, decode, version):
+    """Predict one frame from its raw bytes, answering repeats from the cache.
+
+    ``decode`` turns the bytes into a preprocessed array and only runs on an
+    exact-bytes cache miss. Raises IndexError if the model's top class has no
+    label.
+    """
+    namespace = version.name + ":"
+    if prediction_cache is not None:
+        result = prediction_cache.get(raw, namespace)
+        if result is not None:
+            return cached_result(version, result)
+
+    frame = decode(raw)
+    if prediction_cache is not None:
+        result = prediction_cache.get_similar(frame, namespace)
+        if result is not None:
+            return cached_result(version, result)
+
+    timeout = BATCH_TIMEOUT_S
+    if not version.model.ready:
+        timeout += MODEL_LOAD_TIMEOUT_S
+    result = version.predict(frame, timeout=timeout)
+    if prediction_cache is not None:
+        prediction_cache.put(raw, frame, result, namespace)
+    return {**result, "model_version": version.name}
+
+
+def classify_batch(raw_images, version):
+    """Predict many frames from their raw bytes in one forward pass.
+
+    Only exact-bytes cache misses are decoded, and only frames the
+    perceptual lookup did not answer either go through the model.
+    """
+    namespace = version.name + ":"
+    results = [None] * len(raw_images)
+    if prediction_cache is not None:
+        results = [prediction_cache.get(raw, namespace) for raw in raw_images]
+
+    misses = [i for i, result in enumerate(results) if result is None]
+    if misses:
+        batch = preprocess_batch([raw_images[i] for i in misses])
+        if prediction_cache is not None:
+            for i, frame in zip(misses, batch):
+                results[i] = prediction_cache.get_similar(frame, namespace)
+        pending = [j for j, i in enumerate(misses) if results[i] is None]
+        if pending:
+            start = time.perf_counter()
+            rows = run_model(batch[pending], version)
+            latency_ms = (time.perf_counter() - start) * 1000
+            for j, row in zip(pending, rows):
+                result = results[misses[j]] = version.label(row)
+                version.record(result, latency_ms)
+                if prediction_cache is not None:
+                    prediction_cache.put(
+                        raw_images[misses[j]], batch[j], result, namespace
+                    )
+    return [{**result, "model_version": version.name} for result in results]
+
+
+# === Video-stream sessions (frame skipping + temporal smoothing) ===
+STREAM_WINDOW = int(os.getenv("STREAM_WINDOW", "5"))
+STREAM_STABLE_FRAMES = int(os.getenv("STREAM_STABLE_FRAMES", "3"))
+STREAM_MIN_CONFIDENCE = float(os.getenv("STREAM_MIN_CONFIDENCE", "0.6"))
+STREAM_DIFF_THRESHOLD = float(os.getenv("STREAM_DIFF_THRESHOLD", "0.02"))
+stream_sessions = SessionRegistry(
+    ttl_s=float(os.getenv("STREAM_SESSION_TTL_S", "300")),
+    max_sessions=int(os.getenv("STREAM_MAX_SESSIONS", "1000")),
+)
+
+
+def read_request_frame():
+    """Read the frame from the current request in whichever form it was sent.
+
+    Returns ``(raw, decode)``: the frame's bytes and the function that turns
+    them into a preprocessed array. Raw image bodies are image bytes, raw
+    ``application/x-rgb24`` bodies (100x100x3 uint8) are viewed in place
+    without any image decode, and anything else is treated as the JSON
+    ``{"image": <base64>}`` form. Returns ``(None, None)`` when no frame was
+    sent.
+    """
+    if request.mimetype in RAW_IMAGE_TYPES:
+        body = request.get_data(cache=False)
+        return (body, preprocess_image) if body else (None, None)
+
+    if request.mimetype == RAW_TENSOR_TYPE:
+        body = request.get_data(cache=False)
+        return (body, preprocess_rgb_bytes) if body else (None, None)
+
+    data = request.get_json(silent=True)
+    if not data or "image" not in data:
+        return None, None
+    return decode_base64_image(data["image"]), preprocess_image
+
+
+def read_request_images():
+    """Return the raw frames of a multi-frame request, undecoded.
+
+    Frames come from the ``images`` parts of a multipart form, a JSON body
+    ``{"images": [<base64>, ...]}``, or a single raw image body. Returns
+    None when none were sent.
+    """
+    if request.files:
+        return request.files.getlist("images") or None
+    if request.mimetype in RAW_IMAGE_TYPES:
+        return [request.get_data(cache=False)] if request.content_length else None
+    images = (request.get_json(silent=True) or {}).get("images")
+    return images if images and isinstance(images, list) else None
+
+
+def decode_request_images(images):
+    """Return the image bytes of frames from ``read_request_images``."""
+    if request.files:
+        return [part.read() for part in images]
+    if request.mimetype in RAW_IMAGE_TYPES:
+        return images
+    return [decode_base64_image(image) for image in images]
+
+
+def too_many_images():
+    """413 response for a request with more than PREDICT_BATCH_MAX_IMAGES frames."""
+    return (
+        jsonify({"error": f"At most {PREDICT_BATCH_MAX_IMAGES} images per batch"}),
+        413,
+    )
+
+
+def request_user_id():
+    """Return the requesting user's id as an ObjectId, or None if anonymous.
+
+    The id is taken from the ``user_id`` query parameter (used by binary
+    uploads), form field or JSON body field. Raises ValueError if one was
+    given but is not a valid ObjectId.
+    """
+    value = request.args.get("user_id") or request.form.get("user_id")
+    if not value:
+        data = request.get_json(silent=True)
+        value = data.get("user_id") if isinstance(data, dict) else None
+    if not value or value == "None":
+        return None
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError) as e:
+        raise ValueError("Invalid user_id") from e
 
 
 @app.route("/", methods=["GET"])
@@ -63,40 +396,69 @@ def home():
     return "Welcome to the ASL Prediction API!"
 
 
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    """Liveness probe: the process is up and serving requests."""
+    return jsonify({"status": "ok"})
+
+
+def mongo_reachable():
+    """Return True if MongoDB answers a ping."""
+    if SENSOR_DATA is None:
+        return False
+    try:
+        client.admin.command("ping")
+        return True
+    except Exception as e:
+        logging.warning("⚠️ MongoDB ping failed: %s", e)
+        return False
+
+
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    """Readiness probe: the model is loaded and warm and MongoDB is reachable."""
+    checks = {"model": registry.ready, "mongo": mongo_reachable()}
+    status = 200 if all(checks.values()) else 503
+    return jsonify({"ready": status == 200, **checks}), status
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Inference queue, model version and history-write buffer metrics."""
+    active = registry.active
+    return jsonify(
+        {
+            "model": active.model.stats(),
+            "batcher": active.batcher.stats(),
+            "models": registry.stats(),
+            "history_writer": history_writer.stats() if history_writer else None,
+            "stream_sessions": stream_sessions.stats(),
+            "prediction_cache": prediction_cache.stats() if prediction_cache else None,
+            "mongo": mongo.metrics(),
+        }
+    )
+
+
 @app.route("/predict", methods=["POST"])
 def predict():
-    """Prediction endpoint using uploaded base64 image."""
+    """Prediction endpoint for a base64 JSON image or a raw binary upload."""
     try:
-        data = request.get_json()
-        if not data or "image" not in data:
-            return jsonify({"error": "No image provided"}), 400
+        try:
+            user_id = request_user_id()
+            raw, decode = read_request_frame()
+            if raw is None:
+                return jsonify({"error": "No image provided"}), 400
+            result = classify(raw, decode, registry.choose(user_id))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except IndexError as e:
+            return jsonify({"error": str(e)}), 500
 
-        image_data = base64.b64decode(
-            data["image"].split(",")[1] if "," in data["image"] else data["image"]
+        save_predictions(
+            [{"user_id": user_id, "timestamp": datetime.utcnow(), **result}]
         )
-        img = Image.open(BytesIO(image_data)).convert("RGB")
-        img = img.resize((100, 100))  # pylint: disable=no-member
-        img_array = np.expand_dims(np.array(img) / 255.0, axis=0)
-
-        prediction = model.predict(img_array)
-        top_index = np.argmax(prediction)
-
-        if top_index >= len(LABELS):
-            return jsonify({"error": "Prediction index out of range"}), 500
-
-        predicted_label = LABELS[top_index]
-        confidence = float(prediction[0][top_index])
-
-        if SENSOR_DATA is not None:
-            SENSOR_DATA.insert_one(
-                {
-                    "timestamp": datetime.utcnow(),
-                    "prediction": predicted_label,
-                    "confidence": confidence,
-                }
-            )
 
-        return jsonify({"prediction": predicted_label, "confidence": confidence})
+        return jsonify(result)
 
     except Exception as e:
         logging.exception("❗ Error during prediction")
@@ -108,31 +470,274 @@ def predict():
 def predict_login():
     """Prediction endpoint for login page (image-only)."""
     try:
-        data = request.get_json()
-        if not data or "image" not in data:
-            return jsonify({"error": "No image provided"}), 400
+        try:
+            raw, decode = read_request_frame()
+            if raw is None:
+                return jsonify({"error": "No image provided"}), 400
+            return jsonify(classify(raw, decode, registry.choose()))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except IndexError as e:
+            return jsonify({"error": str(e)}), 500
+
+    except Exception as e:
+        logging.exception("❗ Error during predict_login")
+        return jsonify({"error": str(e)}), 500
+
 
-        image_data = base64.b64decode(
-            data["image"].split(",")[1] if "," in data["image"] else data["image"]
+@app.route("/predict_batch", methods=["POST"])
+def predict_batch():
+    """Prediction endpoint for many frames in one request.
+
+    Accepts either a JSON body ``{"images": [<base64>, ...]}`` or a multipart
+    form with one file part per frame. All frames run through the model in a
+    single forward pass and are stored with one bulk insert.
+    """
+    try:
+        try:
+            user_id = request_user_id()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        images = read_request_images()
+        if not images:
+            return jsonify({"error": "No images provided"}), 400
+        if len(images) > PREDICT_BATCH_MAX_IMAGES:
+            return too_many_images()
+
+        version = registry.choose(user_id)
+        results = classify_batch(decode_request_images(images), version)
+
+        timestamp = datetime.utcnow()
+        save_predictions(
+            [
+                {"user_id": user_id, "timestamp": timestamp, **result}
+                for result in results
+            ]
         )
-        img = Image.open(BytesIO(image_data)).convert("RGB")
-        img = img.resize((100, 100))  # pylint: disable=no-member
-        img_array = np.expand_dims(np.array(img) / 255.0, axis=0)
 
-        prediction = model.predict(img_array)
-        top_index = np.argmax(prediction)
+        return jsonify({"predictions": results})
+
+    except Exception as e:
+        logging.exception("❗ Error during batch prediction")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/stream/sessions", methods=["POST"])
+def open_stream_session():
+    """Open a video-stream session for ``/stream/sessions/<id>/frames``.
+
+    Takes an optional ``user_id`` and ``"save": false`` to keep the letters
+    out of the history (the login page uses this).
+    """
+    try:
+        user_id = request_user_id()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    data = request.get_json(silent=True) or {}
+
+    version = registry.choose(user_id)
+    session = stream_sessions.create(
+        version.labels,
+        user_id=user_id,
+        save=bool(data.get("save", True)),
+        window=STREAM_WINDOW,
+        stable_frames=STREAM_STABLE_FRAMES,
+        min_confidence=STREAM_MIN_CONFIDENCE,
+        diff_threshold=STREAM_DIFF_THRESHOLD,
+        model_version=version.name,
+    )
+    return jsonify({"session_id": session.id, "model_version": version.name}), 201
+
 
-        if top_index >= len(LABELS):
-            return jsonify({"error": "Prediction index out of range"}), 500
+@app.route("/stream/sessions/<session_id>/frames", methods=["POST"])
+def stream_frames(session_id):
+    """Feed the next frames of a video stream, in capture order.
 
-        predicted_label = LABELS[top_index]
-        confidence = float(prediction[0][top_index])
+    Accepts the same bodies as ``/predict_batch`` or one raw image. Near
+    duplicate frames are skipped, the rest run in one batch, and the
+    response carries the smoothed prediction plus any letters that became
+    stable. Stable letters are saved to the history unless disabled.
+    """
+    session = stream_sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "Unknown or expired session"}), 404
+
+    try:
+        images = read_request_images()
+        if not images:
+            return jsonify({"error": "No images provided"}), 400
+        if len(images) > PREDICT_BATCH_MAX_IMAGES:
+            return too_many_images()
+        frames = preprocess_batch(decode_request_images(images))
 
-        return jsonify({"prediction": predicted_label, "confidence": confidence})
+        with session.lock:
+            # A session stays on its version; if that version was retired,
+            # it moves to the active one
+            version = registry.get(session.model_version)
+            if version is None:
+                version = registry.active
+                session.model_version, session.labels = version.name, version.labels
+            skipped = session.skipped
+            letters = session.process(frames, version.run)
+            result = {
+                "frames": len(frames),
+                "skipped": session.skipped - skipped,
+                "prediction": session.prediction,
+                "confidence": session.confidence,
+                "stable": session.stable,
+                "letters": letters,
+                "sequence": "".join(session.letters),
+                "model_version": version.name,
+            }
+
+        if session.save and letters:
+            timestamp = datetime.utcnow()
+            save_predictions(
+                [
+                    {
+                        "user_id": session.user_id,
+                        "timestamp": timestamp,
+                        "prediction": letter,
+                        "confidence": result["confidence"],
+                        "model_version": version.name,
+                    }
+                    for letter in letters
+                ]
+            )
+
+        return jsonify(result)
 
     except Exception as e:
-        logging.exception("❗ Error during predict_login")
+        logging.exception("❗ Error during stream prediction")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/stream/sessions/<session_id>", methods=["DELETE"])
+def close_stream_session(session_id):
+    """Close a video-stream session and return its letter sequence."""
+    session = stream_sessions.close(session_id)
+    if session is None:
+        return jsonify({"error": "Unknown or expired session"}), 404
+    return jsonify(
+        {
+            "sequence": "".join(session.letters),
+            "frames": session.frames,
+            "skipped": session.skipped,
+        }
+    )
+
+
+@app.route("/feedback", methods=["POST"])
+def feedback():
+    """Record the true label of a served prediction for per-version accuracy.
+
+    Takes ``{"model_version": ..., "prediction": ..., "label": ...}`` with the
+    version and prediction from a prediction response.
+    """
+    data = request.get_json(silent=True) or {}
+    if not all(data.get(key) for key in ("model_version", "prediction", "label")):
+        return (
+            jsonify({"error": "model_version, prediction and label are required"}),
+            400,
+        )
+    version = registry.get(data["model_version"])
+    if version is None:
+        return jsonify({"error": "Model version is not being served"}), 404
+    version.record_feedback(data["prediction"], data["label"])
+    return jsonify({"status": "ok"})
+
+
+# === Model admin (requires ADMIN_TOKEN in the X-Admin-Token header) ===
+def admin_denied():
+    """Return an error response unless the request carries the admin token."""
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Admin endpoints are disabled"}), 404
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN):
+        return jsonify({"error": "Unauthorized"}), 401
+    return None
+
+
+@app.route("/admin/models", methods=["GET"])
+def list_models():
+    """Served model versions, traffic split and per-version counters."""
+    return admin_denied() or jsonify(registry.stats())
+
+
+@app.route("/admin/models/reload", methods=["POST"])
+def reload_models():
+    """Load new or changed model versions, then swap them in.
+
+    Returns once the new versions are warm; requests keep going to the
+    current versions meanwhile.
+    """
+    denied = admin_denied()
+    if denied:
+        return denied
+    try:
+        registry.reload()
+    except Exception as e:
+        logging.exception("❗ Model reload failed")
+        return jsonify({"error": str(e)}), 500
+    return jsonify(registry.stats())
+
+
+@app.route("/admin/models/activate", methods=["POST"])
+def activate_models():
+    """Serve ``{"active": ..., "canary": ..., "canary_percent": ...}``."""
+    denied = admin_denied()
+    if denied:
+        return denied
+    data = request.get_json(silent=True) or {}
+    if not data.get("active"):
+        return jsonify({"error": "active is required"}), 400
+    try:
+        registry.activate(
+            data["active"],
+            canary=data.get("canary"),
+            canary_percent=float(data.get("canary_percent", 0)),
+        )
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        logging.exception("❗ Model activation failed")
         return jsonify({"error": str(e)}), 500
+    return jsonify(registry.stats())
+
+
+@sock.route("/ws/predict")
+def predict_stream(ws):
+    """Continuous-capture channel: one persistent WebSocket for many frames.
+
+    Each binary message is one JPEG/PNG frame (a text message may carry a
+    base64 frame instead) and gets one JSON reply with the prediction. The
+    caller's ``user_id`` is given once, as a query parameter, when connecting.
+    The connection stays on one model version while that version is served.
+    """
+    try:
+        user_id = request_user_id()
+    except ValueError as e:
+        ws.send(json.dumps({"error": str(e)}))
+        return
+
+    version = registry.choose(user_id)
+    while True:
+        message = ws.receive()
+        try:
+            if isinstance(message, str):
+                message = decode_base64_image(message)
+            if registry.get(version.name) is not version:
+                version = registry.choose(user_id)
+            result = classify(message, preprocess_image, version)
+            save_predictions(
+                [{"user_id": user_id, "timestamp": datetime.utcnow(), **result}]
+            )
+            ws.send(json.dumps(result))
+        except Exception as e:
+            logging.exception("❗ Error during streamed prediction")
+            ws.send(json.dumps({"error": str(e)}))
 
 
 if __name__ == "__main__":
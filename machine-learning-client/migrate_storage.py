@@ -0,0 +1,60 @@
+"""Copy existing sensor_data documents into another history storage layout.
+
+Walks ``sensor_data`` in _id order and writes each batch through the same
+store the ML client uses for the target ``STORAGE_MODE`` (see storage.py).
+The source collection is left untouched; switch ``STORAGE_MODE`` for both
+services once the copy has finished.
+
+    python migrate_storage.py --to timeseries [--batch-size 1000] [--after <_id>]
+"""
+
+# pylint: disable=import-error
+
+import argparse
+import logging
+
+from bson.objectid import ObjectId
+from dotenv import load_dotenv
+from pymongo import ASCENDING
+
+from db import get_database, make_client
+from storage import DOCUMENTS_COLLECTION, open_history
+
+
+def migrate(db, mode, batch_size=1000, after=None):
+    """Copy every document after ``after`` into ``mode``. Returns the count."""
+    source = db[DOCUMENTS_COLLECTION]
+    target = open_history(db, mode)
+    copied = 0
+    last_id = after
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        docs = list(source.find(query, sort=[("_id", ASCENDING)], limit=batch_size))
+        if not docs:
+            return copied
+        target.insert_many(docs, ordered=False)
+        copied += len(docs)
+        last_id = docs[-1]["_id"]
+        # Logged so an interrupted run can be resumed with --after
+        logging.info("🔁 Copied %d documents (last _id %s)", copied, last_id)
+
+
+def main():
+    """Parse arguments and run the migration against the configured database."""
+    parser = argparse.ArgumentParser(description="Migrate prediction history layout")
+    parser.add_argument("--to", required=True, choices=["timeseries", "buckets"])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--after", help="Resume after this sensor_data _id")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    load_dotenv()
+    db = get_database(make_client(appname="migrate-storage"))
+    after = ObjectId(args.after) if args.after else None
+
+    total = migrate(db, args.to, batch_size=args.batch_size, after=after)
+    print(f"✅ Copied {total} documents into the {args.to} layout.")
+
+
+if __name__ == "__main__":
+    main()
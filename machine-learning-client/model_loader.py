@@ -0,0 +1,109 @@
+"""Background model loading and warm-up.
+
+Importing TensorFlow and loading the model takes seconds, and the first
+forward pass at each batch size pays for graph tracing or tensor allocation
+on top. ``BackgroundModel`` does all of that on a separate thread, so the
+rest of startup (MongoDB, Flask) runs in parallel. Callers of ``predict``
+block until the model is warm, and ``/readyz`` reports when it is.
+"""
+
+import logging
+import threading
+import time
+
+import numpy as np
+
+from preprocessing import DTYPE, INPUT_SHAPE
+
+
+def warmup_batch_sizes(max_batch_size):
+    """Powers of two up to ``max_batch_size``, plus ``max_batch_size`` itself."""
+    sizes, size = [], 1
+    while size < max_batch_size:
+        sizes.append(size)
+        size *= 2
+    return sizes + [max_batch_size]
+
+
+class BackgroundModel:  # pylint: disable=too-many-instance-attributes
+    """Loads a backend with ``load_fn`` and warms it up on a daemon thread.
+
+    ``predict`` waits up to ``predict_timeout`` seconds for a model that is
+    still loading.
+    """
+
+    def __init__(self, load_fn, warmup_sizes=(1,), predict_timeout=60):
+        self.load_fn = load_fn
+        self.warmup_sizes = list(warmup_sizes)
+        self.predict_timeout = predict_timeout
+        self.backend = None
+        self.error = None
+        self.load_s = None
+        self.warmup_s = None
+        self._ready = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start loading; returns immediately."""
+        self._thread = threading.Thread(
+            target=self._load, name="model-loader", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def _load(self):
+        """Load the backend and run one dummy batch at every warm-up size."""
+        start = time.perf_counter()
+        try:
+            self.backend = self.load_fn()
+            self.load_s = time.perf_counter() - start
+            logging.info(
+                "✅ Model loaded (%s: %s) in %.2fs",
+                self.backend.name,
+                self.backend.path,
+                self.load_s,
+            )
+            for size in self.warmup_sizes:
+                self.backend.predict(np.zeros((size, *INPUT_SHAPE), dtype=DTYPE))
+            self.warmup_s = time.perf_counter() - start - self.load_s
+            logging.info(
+                "🔁 Warmed up batch sizes %s in %.2fs", self.warmup_sizes, self.warmup_s
+            )
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            self.error = e
+            logging.error("❌ Failed to load model: %s", e)
+        finally:
+            self._ready.set()
+
+    @property
+    def ready(self):
+        """True once the model is loaded and warm."""
+        return self._ready.is_set() and self.error is None
+
+    def wait(self, timeout=None):
+        """Block until loading finishes; return True if the model is usable."""
+        self._ready.wait(timeout)
+        return self.ready
+
+    def predict(self, batch):
+        """Run a batch, waiting for the model if it is still loading.
+
+        Raises RuntimeError if loading failed or did not finish in time.
+        """
+        if not self._ready.is_set() and not self._ready.wait(self.predict_timeout):
+            raise RuntimeError("Model is still loading")
+        if self.error is not None:
+            raise RuntimeError(f"Model failed to load: {self.error}")
+        return self.backend.predict(batch)
+
+    def stats(self):
+        """Return the loading state and timings."""
+        return {
+            "ready": self.ready,
+            "backend": self.backend.name if self.backend else None,
+            "path": self.backend.path if self.backend else None,
+            "load_s": self.load_s,
+            "warmup_s": self.warmup_s,
+            "warmup_batch_sizes": self.warmup_sizes,
+            "error": str(self.error) if self.error else None,
+        }
@@ -0,0 +1,391 @@
+"""Versioned models with hot reload and optional A/B traffic splitting.
+
+``MODEL_REGISTRY_DIR`` holds one directory per model version, each with a
+model file and the ``labels.txt`` it was trained with, plus a
+``routing.json`` that picks the versions to serve:
+
+    models/
+        routing.json    {"active": "v2", "canary": "v3", "canary_percent": 10}
+        v2/sign_model.h5
+        v2/labels.txt
+        v3/sign_model_int8.tflite
+        v3/labels.txt
+
+Versions are loaded and warmed up in the background and swapped in
+atomically once ready. Requests keep going to the old version until then,
+and a version that fails to load is never swapped in. A reload runs when
+the routing file or a version's files change, or on request from the admin
+endpoint. Without a registry directory the single ``sign_model.h5`` and
+``labels.txt`` next to main.py are served as version ``default`` and
+reloaded when they change.
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+import zlib
+from collections import deque
+
+import numpy as np
+
+from batching import MicroBatcher
+
+ROUTING_FILE = "routing.json"
+MODEL_EXTENSIONS = {
+    "keras": (".h5", ".keras"),
+    "tflite": (".tflite",),
+    "onnx": (".onnx",),
+}
+
+
+def load_labels(path):
+    """Read a label map, one label per line; fall back to A-Z if it is missing."""
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return [line.strip() for line in f.readlines()]
+    logging.warning("⚠️ %s not found. Using fallback labels.", path)
+    return [chr(c) for c in range(ord("A"), ord("Z") + 1)]
+
+
+class ModelVersion:  # pylint: disable=too-many-instance-attributes
+    """One loaded model with its labels, its own batcher and its counters.
+
+    ``model`` is a started BackgroundModel. Accuracy counts come from
+    ``record_feedback`` with the true label of a served prediction.
+    """
+
+    def __init__(self, name, labels, model, max_batch_size=32, max_wait_ms=5):
+        self.name = name
+        self.labels = labels
+        self.model = model
+        self.batcher = MicroBatcher(
+            self.run, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms
+        )
+        self._lock = threading.Lock()
+        self._latencies_ms = deque(maxlen=1000)
+        self._requests = 0
+        self._errors = 0
+        self._confidence_sum = 0.0
+        self._labeled = 0
+        self._correct = 0
+
+    def run(self, batch):
+        """Run one forward pass over a stacked batch of preprocessed frames."""
+        return self.model.predict(batch)
+
+    def label(self, prediction):
+        """Return the (label, confidence) result for one row of model output."""
+        top_index = int(np.argmax(prediction))
+        if top_index >= len(self.labels):
+            raise IndexError("Prediction index out of range")
+        return {
+            "prediction": self.labels[top_index],
+            "confidence": float(prediction[top_index]),
+        }
+
+    def predict(self, frame, timeout=None):
+        """Predict one frame through the batcher and count it."""
+        start = time.perf_counter()
+        try:
+            result = self.label(self.batcher.predict(frame, timeout=timeout))
+        except Exception:
+            with self._lock:
+                self._errors += 1
+            raise
+        self.record(result, (time.perf_counter() - start) * 1000)
+        return result
+
+    def record(self, result, latency_ms=None):
+        """Count one served prediction."""
+        with self._lock:
+            self._requests += 1
+            self._confidence_sum += result["confidence"]
+            if latency_ms is not None:
+                self._latencies_ms.append(latency_ms)
+
+    def record_feedback(self, prediction, label):
+        """Count whether a prediction this version served was correct."""
+        with self._lock:
+            self._labeled += 1
+            self._correct += int(prediction == label)
+
+    def close(self):
+        """Stop the batcher thread once in-flight requests are done."""
+        self.batcher.close()
+
+    def stats(self):
+        """Return request, latency, confidence and accuracy counters."""
+        with self._lock:
+            latencies = sorted(self._latencies_ms)
+            return {
+                "ready": self.model.ready,
+                "requests": self._requests,
+                "errors": self._errors,
+                "latency_p50_ms": latencies[len(latencies) // 2] if latencies else None,
+                "latency_p99_ms": (
+                    latencies[int(len(latencies) * 0.99)] if latencies else None
+                ),
+                "mean_confidence": (
+                    self._confidence_sum / self._requests if self._requests else None
+                ),
+                "labeled": self._labeled,
+                "accuracy": self._correct / self._labeled if self._labeled else None,
+            }
+
+
+class ModelRegistry:  # pylint: disable=too-many-instance-attributes
+    """Serves the active (and optional canary) model version and reloads them.
+
+    ``make_version(name, model_path, labels)`` builds a ModelVersion whose
+    model is already loading. ``on_swap`` is called after every swap.
+    """
+
+    def __init__(
+        self, root, make_version, backend="keras", default_path=None, on_swap=None
+    ):  # pylint: disable=too-many-arguments, too-many-positional-arguments
+        self.root = root
+        self.make_version = make_version
+        self.backend = backend
+        self.default_path = default_path
+        self.on_swap = on_swap
+        self._reload_lock = threading.Lock()
+        # (active, canary, canary_percent), replaced in one assignment
+        self._routing = (None, None, 0)
+        self._signatures = {}
+
+    @property
+    def versioned(self):
+        """True if a registry directory is in use."""
+        return bool(self.root) and os.path.isdir(self.root)
+
+    @property
+    def active(self):
+        """The version that gets all traffic not sent to the canary."""
+        return self._routing[0]
+
+    @property
+    def canary(self):
+        """The version under test, or None."""
+        return self._routing[1]
+
+    @property
+    def ready(self):
+        """True once the active version is loaded and warm."""
+        return self.active is not None and self.active.model.ready
+
+    def _read_routing(self):
+        """Return (active name, canary name, canary percent) from routing.json."""
+        if not self.versioned:
+            return "default", None, 0
+        path = os.path.join(self.root, ROUTING_FILE)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                routing = json.load(f)
+        else:
+            versions = sorted(
+                d
+                for d in os.listdir(self.root)
+                if os.path.isdir(os.path.join(self.root, d))
+            )
+            if not versions:
+                raise FileNotFoundError(f"No model versions in {self.root}")
+            routing = {"active": versions[-1]}
+        percent = (
+            float(routing.get("canary_percent", 0)) if routing.get("canary") else 0
+        )
+        return routing["active"], routing.get("canary"), percent
+
+    def _files(self, name):
+        """Return (model path, labels path) for a version."""
+        if not self.versioned:
+            return self.default_path, "labels.txt"
+        directory = os.path.join(self.root, name)
+        if not os.path.isdir(directory):
+            raise FileNotFoundError(f"No model version {name!r} in {self.root}")
+        models = sorted(
+            f
+            for f in os.listdir(directory)
+            if f.endswith(MODEL_EXTENSIONS.get(self.backend, ()))
+        )
+        if not models:
+            raise FileNotFoundError(f"No {self.backend} model in {directory}")
+        return os.path.join(directory, models[0]), os.path.join(directory, "labels.txt")
+
+    def _signature(self, name):
+        """Modification times of a version's files, to notice a redeploy."""
+        return tuple(
+            os.path.getmtime(path) if path and os.path.exists(path) else None
+            for path in self._files(name)
+        )
+
+    def _build(self, name):
+        """Create a version and return it once it has loaded and warmed up."""
+        model_path, labels_path = self._files(name)
+        version = self.make_version(name, model_path, load_labels(labels_path))
+        if not version.model.wait():
+            raise RuntimeError(f"Model version {name!r} failed to load")
+        return version
+
+    def start(self):
+        """Begin loading the configured versions; requests wait for them."""
+        active, canary, percent = self._read_routing()
+        versions = {}
+        for name in filter(None, {active, canary}):
+            model_path, labels_path = self._files(name)
+            self._signatures[name] = self._signature(name)
+            versions[name] = self.make_version(
+                name, model_path, load_labels(labels_path)
+            )
+        self._routing = (versions[active], versions.get(canary), percent)
+        return self
+
+    def reload(self):
+        """Load whatever the routing file and version files now say, then swap.
+
+        Versions that are already loaded and unchanged are kept. Raises if a
+        new version fails to load, leaving the current ones serving.
+        """
+        with self._reload_lock:
+            active, canary, percent = self._read_routing()
+            current = {v.name: v for v in self._routing[:2] if v is not None}
+            versions = {}
+            for name in filter(None, {active, canary}):
+                signature = self._signature(name)
+                if name in current and self._signatures.get(name) == signature:
+                    versions[name] = current[name]
+                else:
+                    logging.info("🔁 Loading model version %s", name)
+                    versions[name] = self._build(name)
+                    self._signatures[name] = signature
+
+            self._routing = (versions[active], versions.get(canary), percent)
+            for name, version in current.items():
+                if versions.get(name) is not version:
+                    version.close()
+            logging.info(
+                "✅ Serving model %s%s",
+                active,
+                f" with {percent:g}% to {canary}" if canary else "",
+            )
+        if self.on_swap is not None:
+            self.on_swap()
+
+    def _write_routing(self, text):
+        """Replace routing.json in one step so a watcher never reads half of it."""
+        path = os.path.join(self.root, ROUTING_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(path + ".tmp", path)
+
+    def activate(self, active, canary=None, canary_percent=0):
+        """Write a new routing.json and reload it.
+
+        Other processes serving the same directory pick the change up through
+        their file watch. If the new versions fail to load, the previous
+        routing is put back.
+        """
+        if not self.versioned:
+            raise ValueError("No model registry directory configured")
+        if not 0 <= canary_percent <= 100:
+            raise ValueError("canary_percent must be between 0 and 100")
+        for name in filter(None, (active, canary)):
+            self._files(name)
+        routing = {"active": active}
+        if canary:
+            routing.update(canary=canary, canary_percent=canary_percent)
+
+        path = os.path.join(self.root, ROUTING_FILE)
+        previous = None
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                previous = f.read()
+        self._write_routing(json.dumps(routing))
+        try:
+            self.reload()
+        except Exception:
+            if previous is None:
+                os.remove(path)
+            else:
+                self._write_routing(previous)
+            raise
+
+    def choose(self, user_id=None):
+        """Pick the version for a request.
+
+        A user always lands on the same side of the split. Anonymous requests
+        are split at random.
+        """
+        active, canary, percent = self._routing
+        if canary is None or percent <= 0:
+            return active
+        if user_id is not None:
+            bucket = zlib.crc32(str(user_id).encode("utf-8")) % 10000 / 100
+        else:
+            bucket = random.random() * 100
+        return canary if bucket < percent else active
+
+    def get(self, name):
+        """Return a served version by name, or None."""
+        for version in self._routing[:2]:
+            if version is not None and version.name == name:
+                return version
+        return None
+
+    def _state(self):
+        """Routing file and version file times, compared between watch polls."""
+        routing = os.path.join(self.root or "", ROUTING_FILE)
+        try:
+            names = self._read_routing()[:2]
+            files = tuple(self._signature(name) for name in filter(None, names))
+        except (OSError, ValueError, KeyError):
+            return None
+        mtime = os.path.getmtime(routing) if os.path.exists(routing) else None
+        return mtime, names, files
+
+    def watch(self, interval):
+        """Poll for changes every ``interval`` seconds and reload after them.
+
+        A change is acted on once it has held for a full interval, so a
+        model file that is still being written is not loaded half-done.
+        """
+        seen = self._state()
+
+        def poll(seen):
+            pending = None
+            while True:
+                time.sleep(interval)
+                state = self._state()
+                if state is None or state == seen:
+                    pending = None
+                    continue
+                if state != pending:
+                    pending = state
+                    continue
+                try:
+                    self.reload()
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    logging.error("❌ Model reload failed: %s", e)
+                seen, pending = state, None
+
+        thread = threading.Thread(
+            target=poll, args=(seen,), name="model-watch", daemon=True
+        )
+        thread.start()
+        return thread
+
+    def stats(self):
+        """Return the routing and per-version counters."""
+        active, canary, percent = self._routing
+        return {
+            "active": active.name if active else None,
+            "canary": canary.name if canary else None,
+            "canary_percent": percent,
+            "versions": {
+                version.name: {**version.stats(), "model": version.model.stats()}
+                for version in (active, canary)
+                if version is not None
+            },
+        }
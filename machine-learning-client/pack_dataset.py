@@ -0,0 +1,93 @@
+"""Pack the ASL image folders into one memory-mapped file.
+
+Decodes every ``<dataset>/<LABEL>/*.jpg`` to 100x100 RGB and stores it in a
+pack (see packed_dataset.py) that train_model.py, export_model.py and
+bench_backends.py read without opening any JPEG. Re-running only decodes
+images that are new or changed since the last run, so packing after
+capturing another letter takes seconds:
+
+    python pack_dataset.py --dataset dataset/asl_alphabet_train \\
+        --out dataset/asl_alphabet_packed
+"""
+
+import argparse
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dataset_listing import list_dataset
+from packed_dataset import PackWriter, decode_frame
+
+# Frames decoded between commits, so an interrupted run keeps its progress
+COMMIT_EVERY = 4096
+
+
+def plan(dataset_path, writer):
+    """Return (work, removed): images to decode and pack keys with no source.
+
+    ``work`` holds ``(key, label, path, size, mtime_ns)`` for every image
+    that is not in the pack yet or whose size or mtime changed. Frames that
+    collect_images.py wrote only to the pack are not counted as removed.
+    """
+    paths, targets, labels = list_dataset(dataset_path)
+    work, seen = [], set()
+    for path, target in zip(paths, targets):
+        key = os.path.relpath(path, dataset_path).replace(os.sep, "/")
+        seen.add(key)
+        stat = os.stat(path)
+        entry = writer.entry(key)
+        if entry is None or entry[2:] != [stat.st_size, stat.st_mtime_ns]:
+            work.append((key, labels[target], path, stat.st_size, stat.st_mtime_ns))
+    # Frames captured straight into the pack (size 0) never had a file
+    removed = [
+        entry[0] for entry in writer.entries if entry[0] not in seen and entry[2]
+    ]
+    return work, removed
+
+
+def pack(dataset_path, out_path, workers=4, rebuild=False):
+    """Bring the pack at ``out_path`` up to date; return (packed, total, removed)."""
+    if rebuild and os.path.isdir(out_path):
+        shutil.rmtree(out_path)
+    with PackWriter(out_path) as writer:
+        work, removed = plan(dataset_path, writer)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for start in range(0, len(work), COMMIT_EVERY):
+                chunk = work[start : start + COMMIT_EVERY]
+                frames = pool.map(decode_frame, [item[2] for item in chunk])
+                for (key, label, _, *stat), frame in zip(chunk, frames):
+                    writer.write(key, label, frame, *stat)
+                writer.commit()
+                print(f"📦 Packed {start + len(chunk)}/{len(work)} images")
+        return len(work), len(writer), removed
+
+
+def main():
+    """Parse arguments and update the pack."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", default="dataset/asl_alphabet_train")
+    parser.add_argument("--out", default="dataset/asl_alphabet_packed")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="start from an empty pack, dropping images whose files are gone",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    packed, total, removed = pack(args.dataset, args.out, args.workers, args.rebuild)
+    print(
+        f"✅ {args.out}: {total} images, {packed} decoded this run "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+    if removed:
+        print(
+            f"⚠️ {len(removed)} packed images no longer exist in {args.dataset} "
+            "(e.g. " + removed[0] + "); run with --rebuild to drop them"
+        )
+
+
+if __name__ == "__main__":
+    main()
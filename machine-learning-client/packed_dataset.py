@@ -0,0 +1,244 @@
+"""Packed, memory-mapped copy of the ASL image folders.
+
+A pack is a directory holding every image already decoded to 100x100 RGB:
+
+- ``images.u8``: the frames back to back as raw uint8, N x 100 x 100 x 3
+- ``targets.npy``: label index of each frame (int32), for other tools;
+  readers take the labels from the manifest, which is the commit point
+- ``manifest.json``: format version, frame shape, count, the sorted label
+  names, and one ``[key, label, size, mtime_ns]`` entry per frame, where
+  ``key`` is the source path relative to the dataset folder
+
+Readers map ``images.u8`` instead of reading it, so opening a pack costs
+the same for 50 or 50,000 frames, and a batch of consecutive frames is a
+view into the page cache rather than a copy. Frames are decoded with
+``load_image``, as the API and the tf.data pipeline decode them.
+
+Writers only ever append frames (or overwrite a changed one in place) and
+then replace the manifest in one step. The manifest's count is what
+readers trust, so a pack interrupted mid-write still opens as the last
+committed state and the next write trims the partial tail.
+"""
+
+import json
+import os
+import random
+
+import numpy as np
+
+from dataset_listing import split_dataset
+from preprocessing import INPUT_SHAPE, load_image
+
+FORMAT_VERSION = 1
+IMAGES_FILE = "images.u8"
+TARGETS_FILE = "targets.npy"
+MANIFEST_FILE = "manifest.json"
+FRAME_BYTES = int(np.prod(INPUT_SHAPE))
+
+
+def is_packed(path):
+    """True if ``path`` is a pack directory rather than an image folder tree."""
+    return os.path.isfile(os.path.join(path, MANIFEST_FILE))
+
+
+def read_manifest(path):
+    """Return a pack's manifest, or an empty one if there is no pack yet."""
+    if not is_packed(path):
+        return {
+            "version": FORMAT_VERSION,
+            "image_shape": list(INPUT_SHAPE),
+            "count": 0,
+            "labels": [],
+            "entries": [],
+        }
+    with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported pack version in {path}: {manifest.get('version')}"
+        )
+    if tuple(manifest["image_shape"]) != INPUT_SHAPE:
+        raise ValueError(f"Pack {path} holds {manifest['image_shape']} frames")
+    return manifest
+
+
+def decode_frame(source):
+    """Decode an image file or bytes into a uint8 (100, 100, 3) array."""
+    return np.asarray(load_image(source), dtype=np.uint8)
+
+
+class PackedDataset:
+    """Read-only view of a pack.
+
+    ``images`` is a memory map: slicing it reads only the pages touched, and
+    nothing is loaded up front. ``targets`` is a small int32 array.
+    """
+
+    def __init__(self, path):
+        if not is_packed(path):
+            raise FileNotFoundError(f"No packed dataset in {path}")
+        self.path = path
+        manifest = read_manifest(path)
+        self.labels = manifest["labels"]
+        self.keys = [entry[0] for entry in manifest["entries"]]
+        position = {label: i for i, label in enumerate(self.labels)}
+        self.targets = np.array(
+            [position[entry[1]] for entry in manifest["entries"]], dtype=np.int32
+        )
+        if manifest["count"]:
+            self.images = np.memmap(
+                os.path.join(path, IMAGES_FILE),
+                dtype=np.uint8,
+                mode="r",
+                shape=(manifest["count"], *INPUT_SHAPE),
+            )
+        else:
+            self.images = np.empty((0, *INPUT_SHAPE), dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def gather(self, indices):
+        """Return (uint8 frames, targets) for ``indices``, in that order.
+
+        Frames are read in file order so a random batch still scans the map
+        front to back; the result is then put back in the order asked for.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        order = np.argsort(indices, kind="stable")
+        images = np.empty((len(indices), *INPUT_SHAPE), dtype=np.uint8)
+        images[order] = self.images[indices[order]]
+        return images, self.targets[indices]
+
+    def batches(self, indices=None, batch_size=32, shuffle=False, seed=0):
+        """Yield (uint8 frames, targets) batches over ``indices`` (default: all).
+
+        Runs of consecutive indices come back as views into the map, without
+        copying; anything else is gathered.
+        """
+        indices = np.arange(len(self)) if indices is None else np.asarray(indices)
+        if shuffle:
+            indices = np.random.default_rng(seed).permutation(indices)
+        for start in range(0, len(indices), batch_size):
+            chunk = indices[start : start + batch_size]
+            first = int(chunk[0])
+            if np.array_equal(chunk, np.arange(first, first + len(chunk))):
+                end = first + len(chunk)
+                yield self.images[first:end], self.targets[first:end]
+            else:
+                yield self.gather(chunk)
+
+    def split(self, validation_split=0.2, seed=0):
+        """Return (train indices, validation indices).
+
+        The split is made on the source paths with ``split_dataset``, so a
+        pack and the folder it was built from split the same way.
+        """
+        position = {key: index for index, key in enumerate(self.keys)}
+        train, validation = split_dataset(
+            self.keys, self.targets.tolist(), validation_split, seed
+        )
+        return (
+            np.array([position[key] for key in train[0]], dtype=np.int64),
+            np.array([position[key] for key in validation[0]], dtype=np.int64),
+        )
+
+    def sample(self, count, seed=0):
+        """Return up to ``count`` indices drawn evenly across classes."""
+        rng = random.Random(seed)
+        per_class = max(1, count // max(len(self.labels), 1))
+        chosen = []
+        for target in range(len(self.labels)):
+            members = np.flatnonzero(self.targets == target).tolist()
+            chosen.extend(rng.sample(members, min(per_class, len(members))))
+        return np.array(chosen[:count], dtype=np.int64)
+
+
+class PackWriter:
+    """Appends frames to a pack, creating it if needed.
+
+    New frames are invisible to readers until ``commit()``, which leaving a
+    ``with`` block also calls. Overwritten frames change in place.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        manifest = read_manifest(path)
+        self.entries = manifest["entries"]
+        self._index = {entry[0]: i for i, entry in enumerate(self.entries)}
+        images_path = os.path.join(path, IMAGES_FILE)
+        self._images = open(  # pylint: disable=consider-using-with
+            images_path, "r+b" if os.path.exists(images_path) else "w+b"
+        )
+        # Drop frames written after the last commit
+        self._images.truncate(len(self.entries) * FRAME_BYTES)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __len__(self):
+        return len(self.entries)
+
+    def entry(self, key):
+        """Return the ``[key, label, size, mtime_ns]`` entry for ``key``, or None."""
+        index = self._index.get(key)
+        return None if index is None else self.entries[index]
+
+    def write(self, key, label, frame, size=0, mtime_ns=0):
+        """Add a frame, or overwrite the frame already stored under ``key``.
+
+        ``frame`` is a uint8 (100, 100, 3) array. Returns its index.
+        """
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        if frame.shape != INPUT_SHAPE:
+            raise ValueError(f"Expected a {INPUT_SHAPE} frame, got {frame.shape}")
+        index = self._index.get(key)
+        if index is None:
+            index = len(self.entries)
+            self._index[key] = index
+            self.entries.append(None)
+        self.entries[index] = [key, label, int(size), int(mtime_ns)]
+        self._images.seek(index * FRAME_BYTES)
+        self._images.write(frame.tobytes())
+        return index
+
+    def _replace(self, name, write):
+        """Write a pack file to a temporary name, then swap it in."""
+        path = os.path.join(self.path, name)
+        with open(path + ".tmp", "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+    def commit(self):
+        """Make every frame written so far visible to readers."""
+        self._images.flush()
+        os.fsync(self._images.fileno())
+        labels = sorted({entry[1] for entry in self.entries})
+        position = {label: i for i, label in enumerate(labels)}
+        targets = np.array([position[entry[1]] for entry in self.entries], np.int32)
+        self._replace(TARGETS_FILE, lambda f: np.save(f, targets))
+        manifest = {
+            "version": FORMAT_VERSION,
+            "image_shape": list(INPUT_SHAPE),
+            "count": len(self.entries),
+            "labels": labels,
+            "entries": self.entries,
+        }
+        self._replace(
+            MANIFEST_FILE, lambda f: f.write(json.dumps(manifest).encode("utf-8"))
+        )
+
+    def close(self):
+        """Commit and close the images file."""
+        if not self._images.closed:
+            self.commit()
+            self._images.close()
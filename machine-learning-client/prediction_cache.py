@@ -0,0 +1,124 @@
+"""Content-addressed cache of prediction results.
+
+Clients often resend the same frame (retries, a hand held still, replayed
+test images). Results are cached under a hash of the raw upload bytes, so
+an exact repeat skips both the decode and the forward pass. Optionally a
+perceptual hash of the preprocessed 100x100 tensor is cached too. Frames
+that encode differently but look the same then also hit, at the cost of a
+decode. Entries are evicted least recently used first, and after a TTL.
+Each model version caches under its own ``namespace``, so an A/B split
+never answers one version's requests with the other's results.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def content_key(raw):
+    """Hash of the raw upload bytes."""
+    return "raw:" + hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def perceptual_key(frame, size=8):
+    """Average hash of a preprocessed (H, W, 3) frame.
+
+    The frame is reduced to ``size`` x ``size`` grayscale blocks and each bit
+    records whether a block is brighter than the mean, so small compression
+    or noise differences map to the same key.
+    """
+    rows, cols = frame.shape[0] // size, frame.shape[1] // size
+    gray = frame[: rows * size, : cols * size].mean(axis=2)
+    blocks = gray.reshape(size, rows, size, cols).mean(axis=(1, 3))
+    return "phash:" + np.packbits(blocks > blocks.mean()).tobytes().hex()
+
+
+class PredictionCache:  # pylint: disable=too-many-instance-attributes
+    """LRU + TTL cache mapping frames to their (label, confidence) result."""
+
+    def __init__(self, max_entries=1024, ttl_s=300, perceptual=False):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.perceptual = perceptual
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._perceptual_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _lookup(self, key):
+        """Return a live entry's result, or None; call with the lock held."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        result, expires = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def get(self, raw, namespace=""):
+        """Return the cached result for these exact upload bytes, or None.
+
+        A miss is only counted here when perceptual lookups are off;
+        otherwise ``get_similar`` decides.
+        """
+        with self._lock:
+            result = self._lookup(namespace + content_key(raw))
+            if result is not None:
+                self._hits += 1
+            elif not self.perceptual:
+                self._misses += 1
+            return result
+
+    def get_similar(self, frame, namespace=""):
+        """Return the cached result for a frame that looks the same, or None."""
+        if not self.perceptual:
+            return None
+        with self._lock:
+            result = self._lookup(namespace + perceptual_key(frame))
+            if result is not None:
+                self._hits += 1
+                self._perceptual_hits += 1
+            else:
+                self._misses += 1
+            return result
+
+    def put(self, raw, frame, result, namespace=""):
+        """Cache the result of a frame under its content (and perceptual) key."""
+        keys = [namespace + content_key(raw)]
+        if self.perceptual:
+            keys.append(namespace + perceptual_key(frame))
+        expires = time.monotonic() + self.ttl_s
+        with self._lock:
+            for key in keys:
+                self._entries[key] = (result, expires)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._perceptual_hits = self._misses = self._evictions = 0
+
+    def stats(self):
+        """Return the hit/miss counters and current size."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "perceptual_hits": self._perceptual_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
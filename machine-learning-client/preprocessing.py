@@ -0,0 +1,74 @@
+"""Shared image preprocessing for the ASL model.
+
+Used by the prediction API and the offline scripts so that training,
+evaluation and serving all feed the model the same float32 100x100 RGB
+tensors scaled to [0, 1].
+"""
+
+from io import BytesIO
+
+import numpy as np
+from PIL import Image  # pylint: disable=import-error
+
+IMG_SIZE = 100
+INPUT_SHAPE = (IMG_SIZE, IMG_SIZE, 3)
+DTYPE = np.float32
+
+
+def load_image(source):
+    """Open an image and return it as a 100x100 RGB PIL image.
+
+    ``source`` may be raw bytes, a binary file object or a file path. Large
+    JPEGs are decoded at a reduced scale (draft mode) so only about as many
+    pixels as the model needs are ever decompressed, and inputs that are
+    already 100x100 skip the resize entirely.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = BytesIO(source)
+    img = Image.open(source)
+    # No-op for formats other than JPEG
+    img.draft("RGB", (IMG_SIZE, IMG_SIZE))
+    img = img.convert("RGB")
+    if img.size != (IMG_SIZE, IMG_SIZE):
+        img = img.resize((IMG_SIZE, IMG_SIZE))  # pylint: disable=no-member
+    return img
+
+
+def normalize(pixels, out=None):
+    """Scale uint8 pixels to float32 in [0, 1], writing into ``out`` if given."""
+    if out is None:
+        out = np.empty(np.shape(pixels), dtype=DTYPE)
+    out[...] = pixels
+    np.divide(out, 255.0, out=out)
+    return out
+
+
+def preprocess_image(source):
+    """Decode one image into a float32 (100, 100, 3) array."""
+    return normalize(np.asarray(load_image(source)))
+
+
+def preprocess_rgb_bytes(buffer):
+    """View a raw 100x100x3 uint8 buffer as a normalized float32 array.
+
+    Raises ValueError if the buffer is not exactly one 100x100 RGB frame.
+    """
+    expected = int(np.prod(INPUT_SHAPE))
+    if len(buffer) != expected:
+        raise ValueError(
+            f"Raw tensor body must be {expected} bytes of 100x100 RGB uint8"
+        )
+    return normalize(np.frombuffer(buffer, dtype=np.uint8).reshape(INPUT_SHAPE))
+
+
+def preprocess_batch(sources):
+    """Decode a list of images into one float32 (N, 100, 100, 3) array.
+
+    The output is allocated once and each frame is written into its slot, so
+    no per-frame float arrays are created.
+    """
+    batch = np.empty((len(sources), *INPUT_SHAPE), dtype=DTYPE)
+    for i, source in enumerate(sources):
+        batch[i] = np.asarray(load_image(source))
+    np.divide(batch, 255.0, out=batch)
+    return batch
@@ -0,0 +1,86 @@
+"""Incremental per-user prediction statistics.
+
+Every batch of prediction documents written to sensor_data is folded into
+counters in the ``user_stats`` collection with ``$inc``/``$min``/``$max``
+upserts, so dashboards can read a user's totals without aggregating over
+their whole history. Each user has one document per scope:
+
+- ``{"scope": "total", "key": None}``: all predictions
+- ``{"scope": "letter", "key": "A"}``: predictions of one letter
+- ``{"scope": "day", "key": "2025-04-08"}``: predictions made on one UTC day
+"""
+
+import logging
+
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+STATS_COLLECTION = "user_stats"
+
+
+def _keys(doc):
+    """Return the (scope, key) counters one prediction contributes to."""
+    return [
+        ("total", None),
+        ("letter", doc["prediction"]),
+        ("day", doc["timestamp"].strftime("%Y-%m-%d")),
+    ]
+
+
+def rollup_updates(docs):
+    """Fold prediction documents into one (filter, update) pair per counter.
+
+    Anonymous predictions (no user_id) are skipped.
+    """
+    totals = {}
+    for doc in docs:
+        if doc.get("user_id") is None:
+            continue
+        confidence = doc["confidence"]
+        for scope, key in _keys(doc):
+            counter = totals.setdefault(
+                (doc["user_id"], scope, key),
+                {
+                    "count": 0,
+                    "confidence_sum": 0.0,
+                    "confidence_min": confidence,
+                    "confidence_max": confidence,
+                    "last_seen": doc["timestamp"],
+                },
+            )
+            counter["count"] += 1
+            counter["confidence_sum"] += confidence
+            counter["confidence_min"] = min(counter["confidence_min"], confidence)
+            counter["confidence_max"] = max(counter["confidence_max"], confidence)
+            counter["last_seen"] = max(counter["last_seen"], doc["timestamp"])
+
+    return [
+        (
+            {"user_id": user_id, "scope": scope, "key": key},
+            {
+                "$inc": {
+                    "count": counter["count"],
+                    "confidence_sum": counter["confidence_sum"],
+                },
+                "$min": {"confidence_min": counter["confidence_min"]},
+                "$max": {
+                    "confidence_max": counter["confidence_max"],
+                    "last_seen": counter["last_seen"],
+                },
+            },
+        )
+        for (user_id, scope, key), counter in totals.items()
+    ]
+
+
+def apply_rollups(collection, docs):
+    """Upsert the counters for a batch of predictions in one bulk write."""
+    ops = [
+        UpdateOne(query, update, upsert=True) for query, update in rollup_updates(docs)
+    ]
+    if not ops:
+        return
+    try:
+        collection.bulk_write(ops, ordered=False)
+    except PyMongoError as e:
+        logging.error("❌ Stats rollup failed: %s", e)
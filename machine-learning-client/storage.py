@@ -0,0 +1,206 @@
+"""Storage layouts for prediction history.
+
+``STORAGE_MODE`` picks how predictions are laid out in MongoDB:
+
+- ``documents`` (default): one document per prediction in ``sensor_data``
+- ``timeseries``: a MongoDB time-series collection ``sensor_data_ts`` with
+  ``timestamp`` as the timeField and ``user_id`` as the metaField, so the
+  server packs predictions into compressed buckets itself
+- ``buckets``: documents in ``sensor_data_buckets`` holding a ``samples``
+  array, maintained with ``$push`` upserts. Each user's hour starts at
+  bucket ``seq`` 0 and overflows into the next ``seq`` once a bucket holds
+  ``BUCKET_MAX_SAMPLES`` predictions
+
+Every layout is exposed through an object with ``insert_many(docs,
+ordered=False)`` so the history writer does not need to know which is used.
+"""
+
+import os
+import threading
+
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, CollectionInvalid
+
+STORAGE_MODES = ("documents", "timeseries", "buckets")
+DOCUMENTS_COLLECTION = "sensor_data"
+TIMESERIES_COLLECTION = "sensor_data_ts"
+BUCKETS_COLLECTION = "sensor_data_buckets"
+# Predictions per bucket document; keeps each document and each history page
+# read small however long a user signs within one hour
+BUCKET_MAX_SAMPLES = int(os.getenv("BUCKET_MAX_SAMPLES", "200"))
+DUPLICATE_KEY = 11000
+# Index that made (user_id, hour) unique before buckets could overflow
+LEGACY_BUCKET_INDEX = "user_id_1_hour_-1"
+
+
+def bucket_start(timestamp):
+    """Return the start of the hour a timestamp falls in."""
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+class BucketStore:
+    """Writes predictions into per-user hourly bucket documents.
+
+    A bucket takes a chunk of samples only while it has room for all of
+    them: the upsert filters on ``count``, so a full bucket makes it insert
+    a new document with the same ``(user_id, hour, seq)``, which the unique
+    index rejects. The chunk is then retried on the next ``seq``.
+    """
+
+    def __init__(self, collection, max_samples=BUCKET_MAX_SAMPLES):
+        self.collection = collection
+        self.max_samples = max(max_samples, 1)
+        self._lock = threading.Lock()
+        self._seq = {}  # (user_id, hour) -> bucket this process writes to
+
+    def ensure_indexes(self):
+        """Create the unique (user_id, hour, seq) index buckets are upserted on."""
+        if LEGACY_BUCKET_INDEX in self.collection.index_information():
+            self.collection.drop_index(LEGACY_BUCKET_INDEX)
+        self.collection.create_index(
+            [("user_id", ASCENDING), ("hour", DESCENDING), ("seq", DESCENDING)],
+            unique=True,
+        )
+
+    def _current_seq(self, key):
+        """Return the newest bucket of a (user_id, hour), looked up once."""
+        with self._lock:
+            if key in self._seq:
+                return self._seq[key]
+        newest = self.collection.find_one(
+            {"user_id": key[0], "hour": key[1]},
+            projection={"seq": True},
+            sort=[("seq", DESCENDING)],
+        )
+        seq = (newest or {}).get("seq") or 0
+        with self._lock:
+            if len(self._seq) > 10000:
+                self._seq.clear()  # Old hours are never written again
+            return self._seq.setdefault(key, seq)
+
+    def _overflow(self, key, seq):
+        """Move a (user_id, hour) past bucket ``seq``, which is full."""
+        with self._lock:
+            self._seq[key] = max(self._seq.get(key, 0), seq + 1)
+
+    def _push(self, key, seq, samples):
+        """Upsert that appends ``samples`` to bucket ``seq`` if they fit."""
+        user_id, hour = key
+        return UpdateOne(
+            {
+                "user_id": user_id,
+                "hour": hour,
+                "seq": seq,
+                "count": {"$lte": self.max_samples - len(samples)},
+            },
+            {
+                "$push": {"samples": {"$each": samples}},
+                "$inc": {"count": len(samples)},
+                "$min": {"first": min(s["timestamp"] for s in samples)},
+                "$max": {"last": max(s["timestamp"] for s in samples)},
+            },
+            upsert=True,
+        )
+
+    def _write_round(self, docs, chunks):
+        """Upsert each chunk into its current bucket.
+
+        Returns (samples written, write errors by doc position, chunks that
+        hit a full bucket and go to the next one).
+        """
+        seqs = [self._current_seq(key) for key, _ in chunks]
+        ops = [
+            self._push(key, seq, [sample(docs[i]) for i in positions])
+            for (key, positions), seq in zip(chunks, seqs)
+        ]
+        try:
+            self.collection.bulk_write(ops, ordered=False)
+            failures = []
+        except BulkWriteError as e:
+            failures = e.details.get("writeErrors", [])
+
+        errors, retry = [], []
+        for error in failures:
+            key, positions = chunks[error["index"]]
+            if error.get("code") == DUPLICATE_KEY:
+                self._overflow(key, seqs[error["index"]])
+                retry.append(chunks[error["index"]])
+            else:
+                errors.extend({**error, "index": i} for i in positions)
+        failed = {error["index"] for error in failures}
+        written = sum(
+            len(positions) for n, (_, positions) in enumerate(chunks) if n not in failed
+        )
+        return written, errors, retry
+
+    def insert_many(self, docs, ordered=False):  # pylint: disable=unused-argument
+        """Append predictions to their buckets, one upsert per bucket chunk.
+
+        Writes are always unordered. Like ``Collection.insert_many``, a
+        failure raises BulkWriteError whose ``writeErrors`` indexes are
+        positions in ``docs`` and whose ``nInserted`` counts the written ones.
+        """
+        groups = {}
+        for i, doc in enumerate(docs):
+            key = (doc.get("user_id"), bucket_start(doc["timestamp"]))
+            groups.setdefault(key, []).append(i)
+        # (key, doc positions) of at most max_samples each
+        chunks = [
+            (key, positions[start : start + self.max_samples])
+            for key, positions in groups.items()
+            for start in range(0, len(positions), self.max_samples)
+        ]
+
+        written, errors = 0, []
+        while chunks:
+            done, failed, chunks = self._write_round(docs, chunks)
+            written += done
+            errors.extend(failed)
+
+        if errors:
+            raise BulkWriteError({"nInserted": written, "writeErrors": errors})
+
+    def count_documents(self, query):
+        """Count bucket documents (used by tooling)."""
+        return self.collection.count_documents(query)
+
+
+def sample(doc):
+    """The fields of a prediction kept in a bucket's ``samples`` array."""
+    return {
+        "timestamp": doc["timestamp"],
+        "prediction": doc["prediction"],
+        "confidence": doc["confidence"],
+    }
+
+
+def ensure_timeseries(db):
+    """Create the time-series collection if it does not exist yet."""
+    try:
+        db.create_collection(
+            TIMESERIES_COLLECTION,
+            timeseries={
+                "timeField": "timestamp",
+                "metaField": "user_id",
+                "granularity": "seconds",
+            },
+        )
+    except CollectionInvalid:
+        pass  # Already exists
+    db[TIMESERIES_COLLECTION].create_index(
+        [("user_id", ASCENDING), ("timestamp", DESCENDING)]
+    )
+
+
+def open_history(db, mode="documents"):
+    """Return the write target for prediction history in the given layout."""
+    if mode not in STORAGE_MODES:
+        raise ValueError(f"Unknown STORAGE_MODE {mode!r}, expected {STORAGE_MODES}")
+    if mode == "timeseries":
+        ensure_timeseries(db)
+        return db[TIMESERIES_COLLECTION]
+    if mode == "buckets":
+        store = BucketStore(db[BUCKETS_COLLECTION])
+        store.ensure_indexes()
+        return store
+    return db[DOCUMENTS_COLLECTION]
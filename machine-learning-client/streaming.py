@@ -0,0 +1,195 @@
+"""Session state for continuous video-stream recognition.
+
+A client opens a session and posts its frames to it in order. Frames that
+barely differ from the last frame the model saw are skipped, using a cheap
+check on a downsampled grayscale copy, and reuse that frame's output. The
+class probabilities are averaged over a sliding window, and a letter is
+emitted only once the smoothed prediction has held steady. A live signer
+then yields a clean letter sequence instead of one noisy prediction per
+frame.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+import numpy as np
+
+
+def thumbnail(frame, factor=10):
+    """Downsample a (H, W, 3) frame to a small grayscale array by block averaging."""
+    rows, cols = frame.shape[0] // factor, frame.shape[1] // factor
+    gray = frame[: rows * factor, : cols * factor].mean(axis=2)
+    return gray.reshape(rows, factor, cols, factor).mean(axis=(1, 3))
+
+
+class StreamSession:  # pylint: disable=too-many-instance-attributes
+    """Frame-skipping and temporal smoothing state for one video stream.
+
+    ``diff_threshold`` is the mean absolute difference, on the [0, 1] pixel
+    scale, below which a frame counts as a repeat of the last one run.
+    A letter is emitted once the top class of the probabilities averaged
+    over the last ``window`` frames has stayed the same for ``stable_frames``
+    frames with at least ``min_confidence``. The same letter is only emitted
+    again after the prediction has dropped below ``min_confidence`` in
+    between, so holding one sign yields one letter.
+    """
+
+    def __init__(
+        self,
+        labels,
+        user_id=None,
+        save=True,
+        window=5,
+        stable_frames=3,
+        min_confidence=0.6,
+        diff_threshold=0.02,
+        model_version=None,
+    ):  # pylint: disable=too-many-arguments, too-many-positional-arguments
+        self.id = uuid.uuid4().hex
+        self.labels = labels
+        self.user_id = user_id
+        self.save = save
+        self.stable_frames = stable_frames
+        self.min_confidence = min_confidence
+        self.diff_threshold = diff_threshold
+        self.model_version = model_version  # Every frame runs on one version
+        self.lock = threading.Lock()  # Frames of one session run in order
+        self.last_used = time.monotonic()
+        self.frames = 0
+        self.skipped = 0
+        self.letters = []
+        self.prediction = None
+        self.confidence = 0.0
+        self._last_thumbnail = None
+        self._last_probabilities = None
+        self._window = deque(maxlen=window)
+        self._recent_tops = deque(maxlen=stable_frames)
+        self._emitted = None
+
+    def is_repeat(self, frame):
+        """Return True if ``frame`` is nearly the same as the last frame kept.
+
+        A frame that is not a repeat becomes the new reference.
+        """
+        small = thumbnail(frame)
+        if (
+            self._last_thumbnail is not None
+            and np.abs(small - self._last_thumbnail).mean() < self.diff_threshold
+        ):
+            return True
+        self._last_thumbnail = small
+        return False
+
+    @property
+    def stable(self):
+        """Whether the smoothed prediction currently counts as steady."""
+        return (
+            len(self._recent_tops) == self.stable_frames
+            and len(set(self._recent_tops)) == 1
+            and self.confidence >= self.min_confidence
+        )
+
+    def observe(self, probabilities):
+        """Fold one frame's class probabilities in; return a newly emitted letter or None."""
+        self._window.append(probabilities)
+        smoothed = np.mean(self._window, axis=0)
+        top_index = int(np.argmax(smoothed))
+        if top_index >= len(self.labels):
+            raise IndexError("Prediction index out of range")
+
+        self._recent_tops.append(top_index)
+        self.prediction = self.labels[top_index]
+        self.confidence = float(smoothed[top_index])
+
+        if self.confidence < self.min_confidence:
+            self._emitted = None  # Between signs, so the same letter may follow
+        elif self.stable and top_index != self._emitted:
+            self._emitted = top_index
+            self.letters.append(self.prediction)
+            return self.prediction
+        return None
+
+    def process(self, frames, predict_fn):
+        """Run a chunk of consecutive preprocessed frames; return the letters emitted.
+
+        Only frames that are not repeats go to ``predict_fn``, all in one
+        batch. A skipped frame counts as another observation of the last
+        frame's output, so a hand held still still becomes stable.
+        """
+        self.last_used = time.monotonic()
+        keep = [not self.is_repeat(frame) for frame in frames]
+        kept = [frame for frame, run in zip(frames, keep) if run]
+        outputs = iter(predict_fn(np.stack(kept)) if kept else ())
+
+        emitted = []
+        for run in keep:
+            self.frames += 1
+            if run:
+                self._last_probabilities = next(outputs)
+            else:
+                self.skipped += 1
+            letter = self.observe(self._last_probabilities)
+            if letter is not None:
+                emitted.append(letter)
+        return emitted
+
+
+class SessionRegistry:
+    """Open stream sessions, expired after ``ttl_s`` idle and capped at ``max_sessions``.
+
+    When the cap is reached the least recently used session is dropped.
+    Sessions are held in this process only, so every frame of a session
+    must reach the worker that opened it (see gunicorn.conf.py).
+    """
+
+    def __init__(self, ttl_s=300, max_sessions=1000):
+        self.ttl_s = ttl_s
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()
+
+    def _expire(self, room=0):
+        """Drop idle sessions, and the least recent ones until ``room`` more fit.
+
+        Call with the lock held.
+        """
+        cutoff = time.monotonic() - self.ttl_s
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            full = len(self._sessions) + room > self.max_sessions
+            if oldest.last_used >= cutoff and not full:
+                break
+            self._sessions.popitem(last=False)
+
+    def create(self, labels, **options):
+        """Open a new session and return it."""
+        session = StreamSession(labels, **options)
+        with self._lock:
+            self._expire(room=1)
+            self._sessions[session.id] = session
+        return session
+
+    def get(self, session_id):
+        """Return an open session, or None if it is unknown or expired."""
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_used = time.monotonic()
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def close(self, session_id):
+        """Remove a session and return it, or None if it was not open."""
+        with self._lock:
+            return self._sessions.pop(session_id, None)
+
+    def stats(self):
+        """Return the number of open sessions and the frames they have skipped."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+        frames = sum(session.frames for session in sessions)
+        skipped = sum(session.skipped for session in sessions)
+        return {"sessions": len(sessions), "frames": frames, "skipped": skipped}
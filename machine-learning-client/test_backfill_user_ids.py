@@ -0,0 +1,35 @@
+"""Unit tests for the sensor_data user_id backfill."""
+
+from bson.objectid import ObjectId
+import mongomock
+from backfill_user_ids import backfill
+
+
+def test_backfill_normalizes_user_ids():
+    """String ids become ObjectIds and missing or bad ids get the default."""
+    collection = mongomock.MongoClient().db.sensor_data
+    user_id = ObjectId()
+    default = ObjectId()
+    collection.insert_many(
+        [
+            {"prediction": "A", "user_id": str(user_id)},
+            {"prediction": "B", "user_id": "not-an-id"},
+            {"prediction": "C"},
+            {"prediction": "D", "user_id": user_id},
+        ]
+    )
+
+    updated = backfill(collection, batch_size=2, assign_to=default)
+
+    assert updated == 3
+    by_letter = {doc["prediction"]: doc["user_id"] for doc in collection.find()}
+    assert by_letter == {"A": user_id, "B": default, "C": default, "D": user_id}
+
+
+def test_backfill_dry_run_changes_nothing():
+    """A dry run counts documents without writing."""
+    collection = mongomock.MongoClient().db.sensor_data
+    collection.insert_many([{"prediction": "A"}, {"prediction": "B"}])
+
+    assert backfill(collection, dry_run=True) == 2
+    assert collection.count_documents({"user_id": {"$exists": True}}) == 0
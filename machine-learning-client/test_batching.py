@@ -0,0 +1,72 @@
+"""Unit tests for the micro-batching scheduler."""
+
+import threading
+import numpy as np
+import pytest
+from batching import MicroBatcher
+
+
+def test_single_item_gets_its_row():
+    """A lone submission is run as a batch of one."""
+    batcher = MicroBatcher(lambda batch: batch * 2, max_batch_size=4, max_wait_ms=1)
+    result = batcher.predict(np.array([1.0, 2.0]), timeout=5)
+    assert result.tolist() == [2.0, 4.0]
+    assert batcher.stats()["batches"] == 1
+
+
+def test_concurrent_items_share_a_batch():
+    """Concurrent submissions are grouped into one forward pass."""
+    calls = []
+    release = threading.Event()
+
+    def predict_fn(batch):
+        calls.append(len(batch))
+        release.wait(timeout=5)
+        return batch + 1
+
+    batcher = MicroBatcher(predict_fn, max_batch_size=8, max_wait_ms=0)
+    # The first forward pass blocks the worker so the rest queue up behind it.
+    first = batcher.submit(np.array([0.0]))
+    futures = [batcher.submit(np.array([float(i)])) for i in range(1, 9)]
+    release.set()
+
+    assert first.result(timeout=5).tolist() == [1.0]
+    assert [f.result(timeout=5).tolist() for f in futures] == [
+        [float(i + 1)] for i in range(1, 9)
+    ]
+    assert len(calls) == 2
+    assert sum(calls) == 9
+    stats = batcher.stats()
+    assert stats["items"] == 9
+    assert stats["batches"] == 2
+    assert stats["queue_depth"] == 0
+
+
+def test_errors_propagate_to_every_waiter():
+    """A failed forward pass fails each future in the batch."""
+
+    def predict_fn(batch):
+        raise RuntimeError("boom")
+
+    batcher = MicroBatcher(predict_fn, max_batch_size=2, max_wait_ms=1)
+    with pytest.raises(RuntimeError, match="boom"):
+        batcher.predict(np.zeros(3), timeout=5)
+
+
+def test_invalid_batch_size():
+    """Batch size must be positive."""
+    with pytest.raises(ValueError):
+        MicroBatcher(lambda batch: batch, max_batch_size=0)
+
+
+def test_close_stops_worker_after_queued_items():
+    """Closing finishes the queued inputs, then ends the worker thread."""
+    batcher = MicroBatcher(lambda batch: batch, max_batch_size=4, max_wait_ms=0)
+    future = batcher.submit(np.array([3.0]))
+    worker = batcher._worker  # pylint: disable=protected-access
+    batcher.close()
+    worker.join(timeout=5)
+
+    assert not worker.is_alive()
+    assert future.result(timeout=5).tolist() == [3.0]
+    assert batcher.predict(np.array([1.0]), timeout=5).tolist() == [1.0]
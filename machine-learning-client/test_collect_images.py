@@ -0,0 +1,155 @@
+"""Unit tests for the pipelined capture tool, run headless from a video file."""
+
+# pylint: disable=no-member
+
+import os
+import time
+from unittest.mock import patch
+
+import cv2  # pylint: disable=import-error
+import numpy as np
+import pytest
+
+from collect_images import (
+    FrameWriter,
+    capture,
+    next_index,
+    open_source,
+    square_crop,
+)
+from pack_dataset import pack
+from packed_dataset import PackedDataset, PackWriter, decode_frame
+
+
+@pytest.fixture(name="video")
+def fixture_video(tmp_path):
+    """A 12-frame 160x120 video whose frames get brighter one by one."""
+    path = str(tmp_path / "signs.avi")
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (160, 120))
+    for i in range(12):
+        out.write(np.full((120, 160, 3), 20 * i, dtype=np.uint8))
+    out.release()
+    return path
+
+
+def _run(video, labels, count, save_dir=None, pack_path=None, **kwargs):
+    """Capture from the video into a folder and/or a pack; return the counts."""
+    cap, _ = open_source(video)
+    pack_writer = PackWriter(pack_path) if pack_path else None
+    writer = FrameWriter(save_dir, pack_writer, **kwargs)
+    try:
+        captured = capture(cap, labels, count, writer, headless=True, from_file=True)
+    finally:
+        cap.release()
+        writer.close()
+        if pack_writer is not None:
+            pack_writer.close()
+    return captured, writer
+
+
+def test_square_crop_is_a_centered_view():
+    """Landscape frames lose their sides without copying."""
+    frame = np.arange(120 * 160 * 3, dtype=np.uint8).reshape(120, 160, 3)
+    square = square_crop(frame)
+    assert square.shape == (120, 120, 3)
+    assert np.shares_memory(square, frame)
+    assert np.array_equal(square, frame[:, 20:140])
+
+
+def test_multi_letter_session_writes_numbered_jpegs(video, tmp_path):
+    """Each letter takes its count of consecutive frames as 100x100 JPEGs."""
+    out = tmp_path / "train"
+    captured, writer = _run(video, ["A", "B"], 5, save_dir=str(out))
+    assert captured == {"A": 5, "B": 5}
+    assert (writer.written, writer.dropped, writer.errors) == (10, 0, 0)
+    assert sorted(os.listdir(out / "A")) == [f"A_{i}.jpg" for i in range(5)]
+    first_b = cv2.imread(str(out / "B" / "B_0.jpg"))
+    assert first_b.shape == (100, 100, 3)
+    assert abs(int(first_b.mean()) - 100) <= 3
+
+    # A second session continues the numbering instead of overwriting
+    assert next_index("A", str(out)) == 5
+    captured, _ = _run(video, ["A"], 2, save_dir=str(out))
+    assert sorted(os.listdir(out / "A"))[-2:] == ["A_5.jpg", "A_6.jpg"]
+
+
+def test_video_running_out_ends_the_session(video, tmp_path):
+    """Letters after the end of the video are not started."""
+    captured, writer = _run(video, ["A", "B", "C"], 5, save_dir=str(tmp_path))
+    assert captured == {"A": 5, "B": 5, "C": 2}
+    assert writer.written == 12
+
+
+def test_pack_output_matches_packing_the_files(video, tmp_path):
+    """Frames captured into a pack equal what pack_dataset.py reads from the JPEGs."""
+    out, packed_path = tmp_path / "train", str(tmp_path / "packed")
+    captured, _ = _run(video, ["B", "A"], 3, save_dir=str(out), pack_path=packed_path)
+    assert captured == {"B": 3, "A": 3}
+
+    packed = PackedDataset(packed_path)
+    assert packed.labels == ["A", "B"]
+    assert len(packed) == 6
+    for key, frame in zip(packed.keys, packed.images):
+        assert np.array_equal(frame, decode_frame(str(out / key)))
+    # Already up to date: packing the folder decodes nothing
+    assert pack(str(out), packed_path) == (0, 6, [])
+
+
+def test_pack_only_capture(video, tmp_path):
+    """With no folder, frames go only into the pack and are kept by later packs."""
+    packed_path = str(tmp_path / "packed")
+    _run(video, ["C"], 4, pack_path=packed_path)
+    assert PackedDataset(packed_path).keys == [f"C/C_{i}.jpg" for i in range(4)]
+    _run(video, ["C"], 1, pack_path=packed_path)
+    assert PackedDataset(packed_path).keys[-1] == "C/C_4.jpg"
+
+    folder = tmp_path / "train" / "A"
+    folder.mkdir(parents=True)
+    cv2.imwrite(str(folder / "A_0.jpg"), np.zeros((100, 100, 3), np.uint8))
+    assert pack(str(tmp_path / "train"), packed_path) == (1, 6, [])
+
+
+def test_pack_keeps_capture_order_with_parallel_writers(tmp_path):
+    """Frames that finish encoding out of order still enter the pack in order."""
+    store = FrameWriter._store  # pylint: disable=protected-access
+    delays = iter([0.02, 0.0] * 10)
+
+    def uneven_store(self, label, name, frame):
+        time.sleep(next(delays))
+        return store(self, label, name, frame)
+
+    packed_path = str(tmp_path / "packed")
+    pack_writer = PackWriter(packed_path)
+    with patch.object(FrameWriter, "_store", uneven_store):
+        writer = FrameWriter(pack=pack_writer, workers=4)
+        for i in range(20):
+            frame = np.full((100, 100, 3), i * 10, np.uint8)
+            writer.submit("A", f"A_{i}.jpg", frame)
+        writer.close()
+    pack_writer.close()
+
+    packed = PackedDataset(packed_path)
+    assert packed.keys == [f"A/A_{i}.jpg" for i in range(20)]
+    assert [int(frame.mean()) // 10 for frame in packed.images] == list(range(20))
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    """A live source never waits: frames that do not fit are counted as dropped."""
+    writer = FrameWriter(str(tmp_path), workers=1, queue_size=1)
+    os.makedirs(tmp_path / "A")
+    frame = np.zeros((100, 100, 3), np.uint8)
+    start = time.perf_counter()
+    results = [writer.submit("A", f"A_{i}.jpg", frame, block=False) for i in range(200)]
+    assert time.perf_counter() - start < 1
+    writer.close()
+    assert results.count(False) == writer.dropped
+    assert writer.written == results.count(True)
+    assert len(os.listdir(tmp_path / "A")) == writer.written
+
+
+def test_needs_somewhere_to_write(tmp_path):
+    """A writer without a folder or a pack, or a missing video, is an error."""
+    with pytest.raises(ValueError):
+        FrameWriter()
+    with pytest.raises(FileNotFoundError):
+        open_source(str(tmp_path / "missing.avi"))
@@ -0,0 +1,122 @@
+"""Unit tests for db.py."""
+
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+import db
+from db import (
+    PoolStats,
+    available_compressors,
+    client_options,
+    get_database,
+    history_write_concern,
+    make_client,
+)
+
+WEB_APP_DB = os.path.join(os.path.dirname(__file__), "..", "web-app", "db.py")
+
+
+def test_available_compressors_skips_missing_packages():
+    """Test only compressors pymongo can use are kept, in order."""
+    with patch("pymongo.compression_support._have_zstd", return_value=False), patch(
+        "pymongo.compression_support._have_snappy", return_value=False
+    ):
+        assert available_compressors(["zstd", "snappy", "zlib", "lz4"]) == ["zlib"]
+
+
+def test_client_options_from_environment():
+    """Test pool size, timeouts and compression come from the environment."""
+    env = {
+        "MONGO_MAX_POOL_SIZE": "20",
+        "MONGO_MIN_POOL_SIZE": "2",
+        "MONGO_TIMEOUT_MS": "1500",
+        "MONGO_WAIT_QUEUE_TIMEOUT_MS": "250",
+        "MONGO_COMPRESSORS": "zlib",
+    }
+    with patch.dict("os.environ", env):
+        options = client_options()
+    assert options == {
+        "maxPoolSize": 20,
+        "minPoolSize": 2,
+        "serverSelectionTimeoutMS": 1500,
+        "waitQueueTimeoutMS": 250,
+        "compressors": "zlib",
+    }
+
+
+def test_history_write_concern():
+    """Test the history write concern defaults to w=1 without journaling."""
+    assert history_write_concern().document == {"w": 1, "j": False}
+    with patch.dict("os.environ", {"MONGO_HISTORY_W": "majority"}):
+        assert history_write_concern().document["w"] == "majority"
+
+
+def test_make_client_uses_options():
+    """Test the factory applies the pool settings and database name."""
+    with patch.dict("os.environ", {"MONGO_MAX_POOL_SIZE": "7", "APP_DB_NAME": "x"}):
+        client = make_client("mongodb://localhost:1", appname="test")
+        try:
+            assert client.options.pool_options.max_pool_size == 7
+            assert get_database(client).name == "x"
+        finally:
+            client.close()
+    assert get_database(client).name == "ml_database"
+
+
+def test_pool_stats_counts_checkouts():
+    """Test the listener tracks open and in-use connections and peaks."""
+    stats = PoolStats(max_pool_size=10)
+    event = SimpleNamespace(address=("mongodb", 27017), duration=0.002)
+    for _ in range(2):
+        stats.connection_created(event)
+        stats.connection_check_out_started(event)
+        stats.connection_checked_out(event)
+    stats.connection_checked_in(event)
+    stats.connection_check_out_started(event)
+    stats.connection_check_out_failed(event)
+
+    counts = stats.stats()
+    assert (counts["open"], counts["in_use"], counts["waiting"]) == (2, 1, 0)
+    assert counts["max_in_use"] == 2
+    assert counts["max_waiting"] == 0
+    assert counts["checkouts"] == 2 and counts["checkout_failures"] == 1
+    assert round(counts["mean_checkout_ms"], 6) == 2.0
+
+
+def test_pool_stats_counts_waiting_only_on_a_full_pool():
+    """Test a check-out waits only once every connection to its server is in use."""
+    stats = PoolStats(max_pool_size=1)
+    server, other = SimpleNamespace(address="a"), SimpleNamespace(address="b")
+    stats.connection_check_out_started(server)
+    stats.connection_checked_out(server)
+    assert stats.stats()["max_waiting"] == 0
+
+    # The pool for "a" is full; "b" has its own pool
+    stats.connection_check_out_started(server)
+    stats.connection_check_out_started(other)
+    assert stats.stats()["waiting"] == 1
+    stats.connection_checked_out(other)
+    stats.connection_checked_in(server)
+    stats.connection_checked_out(server)
+    stats.connection_check_out_started(server)
+    stats.connection_check_out_failed(server)
+
+    counts = stats.stats()
+    assert (counts["waiting"], counts["max_waiting"]) == (0, 1)
+    assert counts["checkout_failures"] == 1
+
+    unlimited = PoolStats()
+    for _ in range(3):
+        unlimited.connection_check_out_started(server)
+        unlimited.connection_checked_out(server)
+    assert unlimited.stats()["max_waiting"] == 0
+
+
+@pytest.mark.skipif(not os.path.exists(WEB_APP_DB), reason="web-app not checked out")
+def test_web_app_copy_is_identical():
+    """Test web-app/db.py has not drifted from this copy; only this one is tested."""
+    with open(WEB_APP_DB, "rb") as theirs, open(db.__file__, "rb") as ours:
+        assert theirs.read() == ours.read()
@@ -0,0 +1,117 @@
+"""Unit tests for the batched evaluation tool."""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from evaluate import Evaluation, evaluate, gate_failures, open_dataset, prefetch
+from pack_dataset import pack
+
+
+@pytest.fixture(name="dataset_dir")
+def fixture_dataset_dir(tmp_path):
+    """Five images each of A and B: dark for A, bright for B."""
+    root = tmp_path / "test"
+    for label, value in (("A", 20), ("B", 230)):
+        (root / label).mkdir(parents=True)
+        for i in range(5):
+            image = Image.new("RGB", (100, 100), (value, value, value))
+            image.save(root / label / f"{i}.jpg", "JPEG")
+    return root
+
+
+def brightness_model(frames):
+    """Scores ["C", "A", "B"]: dark frames are A, bright frames B, never C."""
+    mean = frames.mean(axis=(1, 2, 3))
+    return np.stack([np.full_like(mean, 0.01), 1 - mean, mean], axis=1)
+
+
+def test_scores_a_known_confusion():
+    """Precision, recall, top-k and the matrix follow from the predictions."""
+    evaluation = Evaluation(["A", "B", "C"], top_k=(1, 2, 5))
+    probabilities = np.array(
+        [
+            [0.7, 0.2, 0.1],  # A -> A
+            [0.6, 0.3, 0.1],  # B -> A, B second
+            [0.1, 0.8, 0.1],  # B -> B
+            [0.5, 0.4, 0.1],  # C -> A, C last
+        ]
+    )
+    evaluation.add(probabilities[:2], [0, 1])
+    evaluation.add(probabilities[2:], [1, 2])
+    report = evaluation.report()
+
+    assert report["images"] == 4
+    assert report["accuracy"] == 0.5
+    assert report["top_k_accuracy"] == {"1": 0.5, "2": 0.75}
+    assert report["confusion_matrix"] == [[1, 0, 0], [1, 1, 0], [1, 0, 0]]
+    assert report["per_label"]["A"] == {
+        "precision": 0.3333,
+        "recall": 1.0,
+        "f1": 0.5,
+        "support": 1,
+    }
+    assert report["per_label"]["B"]["precision"] == 1.0
+    assert report["per_label"]["B"]["recall"] == 0.5
+    assert report["per_label"]["C"] == {
+        "precision": 0.0,
+        "recall": 0.0,
+        "f1": 0.0,
+        "support": 1,
+    }
+
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_evaluates_a_folder_or_a_pack(dataset_dir, tmp_path, packed):
+    """Both sources stream every image and map labels onto the model's by name."""
+    path = str(dataset_dir)
+    if packed:
+        path = str(tmp_path / "packed")
+        pack(str(dataset_dir), path)
+    labels, batches = open_dataset(path)
+    assert labels == ["A", "B"]
+
+    report = evaluate(
+        brightness_model, prefetch(batches(3, 2)), labels, ["C", "A", "B"], (1, 2)
+    )
+    assert report["images"] == 10
+    assert report["accuracy"] == 1.0
+    assert report["labels"] == ["C", "A", "B"]
+    assert report["confusion_matrix"] == [[0, 0, 0], [0, 5, 0], [0, 0, 5]]
+    assert report["throughput"]["images_per_sec"] > 0
+
+
+def test_validation_split_holds_out_the_training_share(dataset_dir):
+    """``--split validation`` reads only the held-out images."""
+    _, batches = open_dataset(str(dataset_dir), split="validation")
+    targets = np.concatenate([targets for _, targets in batches(4, 1)])
+    assert targets.tolist() == [0, 1]
+
+
+def test_unknown_labels_are_rejected(dataset_dir):
+    """A dataset letter the model has no output for is an error, not a miss."""
+    labels, batches = open_dataset(str(dataset_dir))
+    with pytest.raises(ValueError, match="B"):
+        evaluate(brightness_model, batches(4, 1), labels, ["A"])
+
+
+def test_prefetch_passes_loader_errors_on():
+    """A failure on the loader thread is raised in the caller."""
+
+    def broken():
+        yield np.zeros((1, 100, 100, 3), dtype=np.uint8), np.zeros(1, dtype=int)
+        raise OSError("truncated image")
+
+    batches = prefetch(broken())
+    frames, _ = next(batches)
+    assert frames.dtype == np.float32
+    with pytest.raises(OSError, match="truncated"):
+        next(batches)
+
+
+def test_gates():
+    """Accuracy and throughput gates only fail when set and missed."""
+    report = {"accuracy": 0.9, "throughput": {"images_per_sec": 500.0}}
+    assert not gate_failures(report)
+    assert not gate_failures(report, min_accuracy=0.9, min_throughput=500)
+    assert len(gate_failures(report, min_accuracy=0.95, min_throughput=600)) == 2
@@ -0,0 +1,89 @@
+"""Unit tests for the buffered prediction-history writer."""
+
+import time
+from unittest.mock import MagicMock
+from pymongo.errors import AutoReconnect, BulkWriteError
+from history_writer import BufferedWriter
+
+
+def test_flushes_on_size_threshold():
+    """A full batch is written with one unordered insert_many."""
+    collection = MagicMock()
+    writer = BufferedWriter(collection, flush_size=3, flush_interval_ms=5000)
+    writer.write_many([{"n": i} for i in range(3)])
+
+    deadline = time.monotonic() + 5
+    while not collection.insert_many.called and time.monotonic() < deadline:
+        time.sleep(0.01)
+    collection.insert_many.assert_called_once_with(
+        [{"n": 0}, {"n": 1}, {"n": 2}], ordered=False
+    )
+    writer.close()
+
+
+def test_flushes_on_time_threshold():
+    """A partial batch is written once the flush interval passes."""
+    collection = MagicMock()
+    writer = BufferedWriter(collection, flush_size=100, flush_interval_ms=20)
+    writer.write({"n": 1})
+
+    deadline = time.monotonic() + 5
+    while not collection.insert_many.called and time.monotonic() < deadline:
+        time.sleep(0.01)
+    collection.insert_many.assert_called_once_with([{"n": 1}], ordered=False)
+    writer.close()
+
+
+def test_full_buffer_drops_and_counts():
+    """Writes beyond capacity are dropped and counted."""
+    collection = MagicMock()
+    writer = BufferedWriter(collection, max_buffer=2)
+    writer._stop.set()  # pylint: disable=protected-access
+    accepted = writer.write_many([{"n": i} for i in range(5)])
+
+    assert accepted == 2
+    assert writer.stats()["dropped"] == 3
+
+
+def test_close_flushes_remaining():
+    """Shutdown writes whatever is still buffered."""
+    collection = MagicMock()
+    writer = BufferedWriter(collection, flush_size=10)
+    writer._stop.set()  # pylint: disable=protected-access
+    writer.write_many([{"n": i} for i in range(4)])
+    writer.close()
+
+    collection.insert_many.assert_called_once()
+    assert writer.stats()["written"] == 4
+
+
+def test_partial_bulk_failure_is_counted():
+    """Documents MongoDB rejected are counted as failed; the rest are rolled up."""
+    collection = MagicMock()
+    collection.insert_many.side_effect = BulkWriteError(
+        {"nInserted": 2, "writeErrors": [{"index": 1, "code": 11000}]}
+    )
+    flushed = []
+    writer = BufferedWriter(collection, on_flush=flushed.append)
+    writer._stop.set()  # pylint: disable=protected-access
+    writer.write_many([{"n": 1}, {"n": 2}, {"n": 3}])
+    writer.flush()
+
+    stats = writer.stats()
+    assert stats["written"] == 2
+    assert stats["failed"] == 1
+    assert flushed == [[{"n": 1}, {"n": 3}]]
+
+
+def test_failed_flush_skips_on_flush():
+    """Nothing is rolled up when it is unknown whether anything was written."""
+    collection = MagicMock()
+    collection.insert_many.side_effect = AutoReconnect("connection reset")
+    on_flush = MagicMock()
+    writer = BufferedWriter(collection, on_flush=on_flush)
+    writer._stop.set()  # pylint: disable=protected-access
+    writer.write_many([{"n": 1}, {"n": 2}])
+    writer.flush()
+
+    assert writer.stats()["failed"] == 2
+    on_flush.assert_not_called()
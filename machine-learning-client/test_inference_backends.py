@@ -0,0 +1,67 @@
+"""Unit tests for the model export and inference backends."""
+
+# pylint: disable=import-error, no-name-in-module, redefined-outer-name
+
+import numpy as np
+import pytest
+from tensorflow.keras.layers import Conv2D, Dense, Flatten, Input, MaxPooling2D
+from tensorflow.keras.models import Sequential
+
+from export_model import export_tflite
+from inference_backends import load_backend
+
+
+@pytest.fixture(scope="module")
+def keras_model_path(tmp_path_factory):
+    """A small sign-model-shaped CNN saved as .h5."""
+    model = Sequential(
+        [
+            Input((100, 100, 3)),
+            Conv2D(4, (3, 3), activation="relu"),
+            MaxPooling2D(4, 4),
+            Flatten(),
+            Dense(26, activation="softmax"),
+        ]
+    )
+    path = tmp_path_factory.mktemp("model") / "sign_model.h5"
+    model.save(path)
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def frames():
+    """Deterministic input frames."""
+    return np.random.default_rng(0).random((8, 100, 100, 3), dtype=np.float32)
+
+
+@pytest.mark.parametrize("quantization", ["fp16", "int8"])
+def test_tflite_export_matches_keras(keras_model_path, frames, tmp_path, quantization):
+    """A TFLite export gives the Keras probabilities for any batch size."""
+    keras = load_backend("keras", keras_model_path)
+    path = export_tflite(
+        keras.model, str(tmp_path / f"{quantization}.tflite"), quantization, frames
+    )
+    tflite = load_backend("tflite", path, num_threads=1)
+
+    expected = keras.predict(frames)
+    assert np.abs(tflite.predict(frames) - expected).max() < 0.05
+    assert np.abs(tflite.predict(frames[:1]) - expected[:1]).max() < 0.05
+
+
+def test_int8_export_needs_calibration(keras_model_path, tmp_path):
+    """Full integer quantization refuses to guess activation ranges."""
+    keras = load_backend("keras", keras_model_path)
+    with pytest.raises(ValueError):
+        export_tflite(keras.model, str(tmp_path / "int8.tflite"), "int8")
+
+
+def test_unknown_backend():
+    """An unknown MODEL_BACKEND is rejected."""
+    with pytest.raises(ValueError):
+        load_backend("tensorrt")
+
+
+def test_missing_model_file(tmp_path):
+    """A backend pointed at a missing export fails clearly."""
+    with pytest.raises(FileNotFoundError):
+        load_backend("tflite", str(tmp_path / "missing.tflite"))
@@ -0,0 +1,92 @@
+"""Unit tests for the tf.data training input pipeline."""
+
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from dataset_listing import list_dataset, split_dataset
+from input_pipeline import ThroughputLogger, make_dataset
+
+LABELS = ["A", "B", "C"]
+
+
+@pytest.fixture(name="dataset_dir")
+def fixture_dataset_dir(tmp_path):
+    """Five small solid-color JPEGs per class, plus a stray text file."""
+    for index, label in enumerate(LABELS):
+        folder = tmp_path / label
+        folder.mkdir()
+        for i in range(5):
+            color = (80 * index, 40 * i, 200)
+            Image.new("RGB", (120, 90), color).save(folder / f"{label}{i}.jpg", "JPEG")
+    (tmp_path / "A" / "notes.txt").write_text("not an image", encoding="utf-8")
+    return str(tmp_path)
+
+
+def test_list_dataset_uses_sorted_class_folders(dataset_dir):
+    """Labels are the sorted folder names and only images are listed."""
+    paths, targets, labels = list_dataset(dataset_dir)
+    assert labels == LABELS
+    assert len(paths) == 15
+    assert targets == [0] * 5 + [1] * 5 + [2] * 5
+    assert all(path.endswith(".jpg") for path in paths)
+
+
+def test_split_is_per_class_deterministic_and_disjoint(dataset_dir):
+    """Every class gives the same share to validation, the same way every run."""
+    paths, targets, _ = list_dataset(dataset_dir)
+    train, validation = split_dataset(paths, targets, validation_split=0.4, seed=3)
+    assert split_dataset(list(reversed(paths)), list(reversed(targets)), 0.4, 3) == (
+        train,
+        validation,
+    )
+    assert not set(train[0]) & set(validation[0])
+    assert sorted(train[0] + validation[0]) == sorted(paths)
+    assert validation[1] == [0, 0, 1, 1, 2, 2]
+    assert split_dataset(paths, targets, 0.4, seed=4) != (train, validation)
+
+
+@pytest.mark.parametrize("training", [False, True])
+def test_batches_are_scaled_images_and_one_hot_labels(dataset_dir, training):
+    """Batches hold float32 100x100 images in [0, 1] and one-hot labels."""
+    paths, targets, labels = list_dataset(dataset_dir)
+    dataset = make_dataset(paths, targets, len(labels), batch_size=4, training=training)
+    batches = list(dataset.as_numpy_iterator())
+    assert [len(images) for images, _ in batches] == [4, 4, 4, 3]
+    images = np.concatenate([images for images, _ in batches])
+    one_hot = np.concatenate([labels for _, labels in batches])
+    assert images.shape == (15, 100, 100, 3)
+    assert images.dtype == np.float32
+    assert 0.0 <= images.min() and images.max() <= 1.0
+    assert one_hot.shape == (15, 3)
+    assert np.array_equal(one_hot.sum(axis=1), np.ones(15))
+    if not training:
+        assert np.array_equal(one_hot.argmax(axis=1), targets)
+
+
+def test_file_cache_is_written_and_reused(dataset_dir, tmp_path_factory):
+    """A cache path gets a cache file on the first epoch that later epochs read."""
+    paths, targets, labels = list_dataset(dataset_dir)
+    cache = str(tmp_path_factory.mktemp("cache") / "train")
+    dataset = make_dataset(paths, targets, len(labels), batch_size=8, cache=cache)
+
+    first = list(dataset.as_numpy_iterator())
+    assert any(name.endswith(".index") for name in os.listdir(os.path.dirname(cache)))
+    os.remove(paths[0])
+    second = list(dataset.as_numpy_iterator())
+    for (images, _), (cached, _) in zip(first, second):
+        assert np.array_equal(images, cached)
+
+
+def test_throughput_logger_times_only_training(capsys):
+    """The validation pass is left out of the images/sec figure."""
+    logger = ThroughputLogger(images_per_epoch=100)
+    logger.on_epoch_begin(0)
+    logger.on_test_begin()
+    end = logger._end  # pylint: disable=protected-access
+    logger.on_epoch_end(0)
+    assert logger._end == end  # pylint: disable=protected-access
+    assert len(logger.rates) == 1 and logger.rates[0] > 0
+    assert "Epoch 1:" in capsys.readouterr().out
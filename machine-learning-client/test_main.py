@@ -3,15 +3,29 @@
 """Unit tests for main.py ASL prediction Flask app."""
 
 import base64
-from unittest.mock import patch, MagicMock
+import json
+import threading
+from io import BytesIO
+from unittest.mock import MagicMock, patch
 import pytest
-from main import app
+import simple_websocket
+from PIL import Image
+from werkzeug.serving import make_server
+from bson.objectid import ObjectId
+from pymongo.errors import BulkWriteError
+import main
+from main import app, prediction_cache, save_predictions
+
+# Let the background model load finish importing TensorFlow before other test
+# modules import it during collection
+main.registry.active.model.wait(timeout=120)
 
 
 @pytest.fixture
 def client():
     """Fixture for Flask test client."""
     app.config["TESTING"] = True
+    prediction_cache.clear()
     with app.test_client() as client:
         yield client
 
@@ -23,15 +37,12 @@ def test_home_route(client):
     assert b"Welcome to the ASL Prediction API!" in response.data
 
 
-@patch("main.model.predict")
-@patch("main.Image.open")
-@patch("main.SENSOR_DATA.insert_one")
-def test_predict_success(mock_insert, mock_image_open, mock_model_predict, client):
+@patch("main.registry.active.model.predict")
+@patch("preprocessing.Image.open")
+@patch("main.history_writer")
+def test_predict_success(mock_writer, mock_image_open, mock_model_predict, client):
     """Test successful image prediction."""
-    mock_img = MagicMock()
-    mock_img.resize.return_value = mock_img
-    mock_img.convert.return_value = mock_img
-    mock_image_open.return_value = mock_img
+    mock_image_open.return_value = Image.new("RGB", (100, 100))
     mock_model_predict.return_value = [
         [0.0] * 4 + [0.9] + [0.0] * 21
     ]  # Label index 4 = "E"
@@ -44,6 +55,7 @@ def test_predict_success(mock_insert, mock_image_open, mock_model_predict, clien
     assert response.status_code == 200
     assert b"prediction" in response.data
     assert b"confidence" in response.data
+    mock_writer.write_many.assert_called_once()
 
 
 def test_predict_missing_image(client):
@@ -53,14 +65,11 @@ def test_predict_missing_image(client):
     assert b"No image provided" in response.data
 
 
-@patch("main.model.predict")
-@patch("main.Image.open")
+@patch("main.registry.active.model.predict")
+@patch("preprocessing.Image.open")
 def test_predict_index_out_of_range(mock_image_open, mock_model_predict, client):
     """Test /predict returns 500 if prediction index is invalid."""
-    mock_img = MagicMock()
-    mock_img.resize.return_value = mock_img
-    mock_img.convert.return_value = mock_img
-    mock_image_open.return_value = mock_img
+    mock_image_open.return_value = Image.new("RGB", (100, 100))
 
     mock_model_predict.return_value = [[0.0] * 26 + [1.0]]
 
@@ -69,14 +78,11 @@ def test_predict_index_out_of_range(mock_image_open, mock_model_predict, client)
     assert response.status_code == 500
 
 
-@patch("main.model.predict")
-@patch("main.Image.open")
+@patch("main.registry.active.model.predict")
+@patch("preprocessing.Image.open")
 def test_predict_login_success(mock_image_open, mock_model_predict, client):
     """Test successful login prediction."""
-    mock_img = MagicMock()
-    mock_img.resize.return_value = mock_img
-    mock_img.convert.return_value = mock_img
-    mock_image_open.return_value = mock_img
+    mock_image_open.return_value = Image.new("RGB", (100, 100))
     mock_model_predict.return_value = [[0.1] * 24 + [0.9] + [0.0]]  # Index 25 = "Z"
 
     image_bytes = base64.b64encode(b"another").decode("utf-8")
@@ -94,3 +100,438 @@ def test_predict_login_no_image(client):
     response = client.post("/predict_login", json={})
     assert response.status_code == 400
     assert b"No image provided" in response.data
+
+
+def test_metrics_route(client):
+    """Test /metrics exposes batcher queue depth and batch sizes."""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    stats = response.get_json()["batcher"]
+    assert "queue_depth" in stats
+    assert "batch_size_histogram" in stats
+    assert "max_in_use" in response.get_json()["mongo"]
+
+
+@patch("main.registry.active.model.predict")
+@patch("preprocessing.Image.open")
+@patch("main.history_writer")
+def test_predict_batch_json(mock_writer, mock_image_open, mock_model_predict, client):
+    """Test /predict_batch runs one forward pass and one bulk insert."""
+    mock_image_open.return_value = Image.new("RGB", (100, 100))
+    mock_model_predict.return_value = [
+        [0.9] + [0.0] * 25,  # Index 0 = "A"
+        [0.0] * 25 + [0.8],  # Index 25 = "Z"
+    ]
+
+    image_bytes = base64.b64encode(b"frame").decode("utf-8")
+    response = client.post(
+        "/predict_batch",
+        json={"images": [f"data:image/jpeg;base64,{image_bytes}", image_bytes]},
+    )
+
+    assert response.status_code == 200
+    predictions = response.get_json()["predictions"]
+    assert [p["prediction"] for p in predictions] == ["A", "Z"]
+    mock_model_predict.assert_called_once()
+    mock_writer.write_many.assert_called_once()
+    assert len(mock_writer.write_many.call_args[0][0]) == 2
+
+
+@patch("main.registry.active.model.predict")
+@patch("preprocessing.Image.open")
+@patch("main.history_writer")
+def test_predict_batch_multipart(
+    mock_writer, mock_image_open, mock_model_predict, client
+):
+    """Test /predict_batch accepts binary multipart parts."""
+    mock_image_open.return_value = Image.new("RGB", (100, 100))
+    mock_model_predict.return_value = [[0.0] * 4 + [0.9] + [0.0] * 21] * 3
+
+    response = client.post(
+        "/predict_batch",
+        data={
+            "images": [
+                (BytesIO(b"one"), "one.jpg"),
+                (BytesIO(b"two"), "two.jpg"),
+                (BytesIO(b"three"), "three.jpg"),
+            ]
+        },
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 200
+    assert len(response.get_json()["predictions"]) == 3
+    mock_model_predict.assert_called_once()
+    mock_writer.write_many.assert_called_once()
+
+
+def test_predict_batch_missing_images(client):
+    """Test /predict_batch returns 400 without images."""
+    response = client.post("/predict_batch", json={})
+    assert response.status_code == 400
+    assert b"No images provided" in response.data
+
+
+@patch("main.PREDICT_BATCH_MAX_IMAGES", 1)
+def test_predict_batch_too_many_images(client):
+    """Test /predict_batch rejects batches over the configured limit."""
+    response = client.post("/predict_batch", json={"images": ["a", "b"]})
+    assert response.status_code == 413
+
+
+@patch("main.registry.active.model.predict")
+@patch("preprocessing.Image.open")
+@patch("main.history_writer")
+def test_predict_raw_jpeg_body(
+    mock_writer, mock_image_open, mock_model_predict, client
+):
+    """Test /predict decodes a raw image/jpeg body from the request stream."""
+    mock_image_open.return_value = Image.new("RGB", (100, 100))
+    mock_model_predict.return_value = [[0.0] * 4 + [0.9] + [0.0] * 21]
+
+    response = client.post("/predict", data=b"jpeg-bytes", content_type="image/jpeg")
+
+    assert response.status_code == 200
+    assert response.get_json()["prediction"] == "E"
+    mock_image_open.assert_called_once()
+
+
+@patch("main.registry.active.model.predict")
+@patch("preprocessing.Image.open")
+def test_predict_login_raw_tensor_body(mock_image_open, mock_model_predict, client):
+    """Test /predict_login accepts a raw 100x100 RGB uint8 tensor without decoding."""
+    mock_model_predict.return_value = [[0.0] * 25 + [0.9]]
+
+    response = client.post(
+        "/predict_login",
+        data=bytes(100 * 100 * 3),
+        content_type="application/x-rgb24",
+    )
+
+    assert response.status_code == 200
+    assert response.get_json()["prediction"] == "Z"
+    mock_image_open.assert_not_called()
+
+
+def test_predict_raw_tensor_wrong_size(client):
+    """Test /predict rejects a raw tensor body of the wrong size."""
+    response = client.post(
+        "/predict", data=b"\x00" * 10, content_type="application/x-rgb24"
+    )
+    assert response.status_code == 400
+
+
+def test_predict_empty_raw_body(client):
+    """Test /predict returns 400 on an empty binary upload."""
+    response = client.post("/predict", data=b"", content_type="image/jpeg")
+    assert response.status_code == 400
+    assert b"No image provided" in response.data
+
+
+@patch("main.MAX_FRAME_BYTES", 1000)
+@patch("main.registry.active.model.predict")
+def test_predict_rejects_oversize_frame(mock_model_predict, client):
+    """Test /predict answers 413 for a raw frame over MAX_FRAME_BYTES, unread."""
+    response = client.post("/predict", data=b"\xff" * 1001, content_type="image/jpeg")
+
+    assert response.status_code == 413
+    assert "error" in response.get_json()
+    mock_model_predict.assert_not_called()
+
+
+@patch("main.MAX_FRAME_BYTES", 1000)
+def test_predict_login_rejects_oversize_base64(client):
+    """Test /predict_login answers 413 with CORS headers for oversize JSON."""
+    image = base64.b64encode(b"\xff" * 3000).decode()
+    response = client.post(
+        "/predict_login",
+        json={"image": f"data:image/jpeg;base64,{image}"},
+        headers={"Origin": "http://localhost:5002"},
+    )
+
+    assert response.status_code == 413
+    assert response.headers["Access-Control-Allow-Origin"]
+
+
+@patch("main.MAX_FRAME_BYTES", 100 * 100 * 3)
+@patch("main.registry.active.model.predict")
+@patch("main.history_writer")
+def test_predict_accepts_frame_at_limit(mock_writer, mock_model_predict, client):
+    """Test a raw tensor exactly MAX_FRAME_BYTES long is still predicted."""
+    mock_model_predict.return_value = [[0.9] + [0.0] * 25]
+
+    response = client.post(
+        "/predict", data=bytes(100 * 100 * 3), content_type="application/x-rgb24"
+    )
+
+    assert response.status_code == 200
+    assert response.get_json()["prediction"] == "A"
+    mock_writer.write_many.assert_called_once()
+
+
+def test_predict_batch_rejects_oversize_request(client):
+    """Test /predict_batch answers 413 for a body over MAX_REQUEST_BYTES."""
+    limit = app.config["MAX_CONTENT_LENGTH"]
+    app.config["MAX_CONTENT_LENGTH"] = 2048
+    try:
+        response = client.post("/predict_batch", json={"images": ["a" * 4096]})
+    finally:
+        app.config["MAX_CONTENT_LENGTH"] = limit
+
+    assert response.status_code == 413
+
+
+@patch("main.HISTORY_WRITE_MODE", "inline")
+@patch("main.history_writer", None)
+@patch("main.SENSOR_DATA.insert_many")
+def test_save_predictions_inline(mock_insert):
+    """Test inline mode writes straight to MongoDB."""
+    save_predictions([{"prediction": "A"}])
+    mock_insert.assert_called_once_with([{"prediction": "A"}], ordered=False)
+
+
+@patch("main.history_writer", None)
+@patch("main.update_rollups")
+@patch("main.SENSOR_DATA.insert_many")
+def test_save_predictions_inline_partial_failure(mock_insert, mock_rollups):
+    """Test inline mode still rolls up the documents a failed bulk insert wrote."""
+    mock_insert.side_effect = BulkWriteError({"writeErrors": [{"index": 0}]})
+    docs = [{"prediction": "A"}, {"prediction": "B"}]
+
+    with pytest.raises(BulkWriteError):
+        save_predictions(docs)
+    mock_rollups.assert_called_once_with([{"prediction": "B"}])
+
+
+@patch("main.registry.active.model.predict")
+@patch("preprocessing.Image.open")
+@patch("main.history_writer")
+def test_predict_stores_user_id(
+    mock_writer, mock_image_open, mock_model_predict, client
+):
+    """Test /predict stores the caller's user_id as an ObjectId."""
+    mock_image_open.return_value = Image.new("RGB", (100, 100))
+    mock_model_predict.return_value = [[0.9] + [0.0] * 25]
+    user_id = ObjectId()
+
+    response = client.post(
+        f"/predict?user_id={user_id}", data=b"jpeg", content_type="image/jpeg"
+    )
+
+    assert response.status_code == 200
+    doc = mock_writer.write_many.call_args[0][0][0]
+    assert doc["user_id"] == user_id
+
+
+@patch("main.registry.active.model.predict")
+@patch("preprocessing.Image.open")
+@patch("main.history_writer")
+def test_predict_anonymous_user(
+    mock_writer, mock_image_open, mock_model_predict, client
+):
+    """Test /predict stores a null user_id when none is given."""
+    mock_image_open.return_value = Image.new("RGB", (100, 100))
+    mock_model_predict.return_value = [[0.9] + [0.0] * 25]
+
+    image_bytes = base64.b64encode(b"frame").decode("utf-8")
+    response = client.post("/predict", json={"image": image_bytes, "user_id": ""})
+
+    assert response.status_code == 200
+    assert mock_writer.write_many.call_args[0][0][0]["user_id"] is None
+
+
+@patch("main.prediction_cache", None)
+@patch("main.MODEL_LOAD_TIMEOUT_S", 60)
+@patch("main.BATCH_TIMEOUT_S", 30)
+def test_classify_waits_for_a_loading_model():
+    """Test a request waits for the model load on top of the batch timeout."""
+    version = MagicMock()
+    version.name = "v1"
+    version.predict.return_value = {"prediction": "A", "confidence": 0.9}
+
+    version.model.ready = False
+    main.classify(b"frame", lambda raw: raw, version)
+    assert version.predict.call_args.kwargs["timeout"] == 90
+
+    version.model.ready = True
+    main.classify(b"frame", lambda raw: raw, version)
+    assert version.predict.call_args.kwargs["timeout"] == 30
+
+
+def test_predict_invalid_user_id(client):
+    """Test /predict rejects a user_id that is not an ObjectId."""
+    image_bytes = base64.b64encode(b"frame").decode("utf-8")
+    response = client.post("/predict", json={"image": image_bytes, "user_id": "bob"})
+    assert response.status_code == 400
+    assert b"Invalid user_id" in response.data
+
+
+@pytest.fixture
+def live_server():
+    """Fixture running the app on a real socket for WebSocket tests."""
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+@patch("main.registry.active.model.predict")
+@patch("main.history_writer")
+def test_predict_stream_websocket(mock_writer, mock_model_predict, live_server):
+    """Test /ws/predict answers every frame sent over one connection."""
+    mock_model_predict.return_value = [[0.0] * 2 + [0.9] + [0.0] * 23]
+    frame = BytesIO()
+    Image.new("RGB", (100, 100)).save(frame, "JPEG")
+    user_id = ObjectId()
+
+    ws = simple_websocket.Client.connect(
+        f"ws://{live_server}/ws/predict?user_id={user_id}"
+    )
+    try:
+        replies = []
+        for _ in range(3):
+            ws.send(frame.getvalue())
+            replies.append(json.loads(ws.receive(timeout=10)))
+    finally:
+        ws.close()
+
+    assert [reply["prediction"] for reply in replies] == ["C", "C", "C"]
+    assert mock_writer.write_many.call_count == 3
+    assert mock_writer.write_many.call_args[0][0][0]["user_id"] == user_id
+
+
+@patch("main.registry.active.model.predict")
+@patch("preprocessing.Image.open")
+@patch("main.history_writer")
+def test_stream_session_skips_repeats_and_emits_stable_letter(
+    mock_writer, mock_image_open, mock_model_predict, client
+):
+    """Test a stream session runs only changed frames and emits a held sign once."""
+    mock_image_open.return_value = Image.new("RGB", (100, 100))
+    mock_model_predict.side_effect = lambda batch: [
+        [0.0] * 4 + [0.9] + [0.0] * 21  # Index 4 = "E"
+    ] * len(batch)
+    user_id = ObjectId()
+
+    response = client.post("/stream/sessions", json={"user_id": str(user_id)})
+    assert response.status_code == 201
+    session_id = response.get_json()["session_id"]
+
+    frames = [(BytesIO(b"frame"), f"{i}.jpg") for i in range(4)]
+    response = client.post(
+        f"/stream/sessions/{session_id}/frames",
+        data={"images": frames},
+        content_type="multipart/form-data",
+    )
+
+    result = response.get_json()
+    assert response.status_code == 200
+    assert result["skipped"] == 3
+    assert result["letters"] == ["E"] and result["stable"]
+    assert len(mock_model_predict.call_args[0][0]) == 1
+    saved = mock_writer.write_many.call_args[0][0]
+    assert [(doc["user_id"], doc["prediction"]) for doc in saved] == [(user_id, "E")]
+
+    response = client.delete(f"/stream/sessions/{session_id}")
+    assert response.get_json()["sequence"] == "E"
+
+
+def test_stream_unknown_session(client):
+    """Test frames for an unknown session get a 404."""
+    response = client.post("/stream/sessions/missing/frames", json={"images": ["x"]})
+    assert response.status_code == 404
+
+
+@patch("main.registry.active.model.predict")
+@patch("preprocessing.Image.open")
+@patch("main.history_writer")
+def test_repeated_frame_served_from_cache(
+    mock_writer, mock_image_open, mock_model_predict, client
+):
+    """Test resending the same bytes skips the decode and the forward pass."""
+    mock_image_open.return_value = Image.new("RGB", (100, 100))
+    mock_model_predict.return_value = [[0.0] * 4 + [0.9] + [0.0] * 21]
+
+    for _ in range(3):
+        response = client.post("/predict", data=b"same", content_type="image/jpeg")
+        assert response.get_json()["prediction"] == "E"
+
+    mock_image_open.assert_called_once()
+    mock_model_predict.assert_called_once()
+    assert mock_writer.write_many.call_count == 3
+    stats = prediction_cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+
+
+@patch("main.prediction_cache", None)
+@patch("main.registry.active.model.predict")
+@patch("preprocessing.Image.open")
+def test_prediction_cache_disabled(mock_image_open, mock_model_predict, client):
+    """Test every frame runs the model when the cache is turned off."""
+    mock_image_open.return_value = Image.new("RGB", (100, 100))
+    mock_model_predict.return_value = [[0.0] * 25 + [0.9]]
+
+    for _ in range(2):
+        client.post("/predict_login", data=b"same", content_type="image/jpeg")
+
+    assert mock_model_predict.call_count == 2
+    assert client.get("/metrics").get_json()["prediction_cache"] is None
+
+
+def test_healthz(client):
+    """Test the liveness probe answers without touching the model or MongoDB."""
+    response = client.get("/healthz")
+    assert response.status_code == 200
+    assert response.get_json() == {"status": "ok"}
+
+
+@patch("main.mongo_reachable", return_value=True)
+def test_readyz_when_warm(mock_ping, client):
+    """Test the readiness probe passes once the model is warm and MongoDB answers."""
+    assert main.registry.active.model.wait(timeout=60)
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.get_json() == {"ready": True, "model": True, "mongo": True}
+
+
+@patch("main.mongo_reachable", return_value=False)
+def test_readyz_without_mongo(mock_ping, client):
+    """Test the readiness probe fails while MongoDB is unreachable."""
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.get_json()["mongo"] is False
+
+
+@patch("main.registry.active.model.predict")
+@patch("preprocessing.Image.open")
+def test_feedback_counts_accuracy(mock_image_open, mock_model_predict, client):
+    """Test feedback on a served prediction updates its version's accuracy."""
+    mock_image_open.return_value = Image.new("RGB", (100, 100))
+    mock_model_predict.return_value = [[0.0] * 4 + [0.9] + [0.0] * 21]
+    result = client.post(
+        "/predict_login", data=b"feedback", content_type="image/jpeg"
+    ).get_json()
+    assert result["model_version"] == main.registry.active.name
+
+    before = main.registry.active.stats()["labeled"]
+    response = client.post("/feedback", json={**result, "label": "E"})
+    assert response.status_code == 200
+    assert main.registry.active.stats()["labeled"] == before + 1
+
+    response = client.post(
+        "/feedback", json={"model_version": "nope", "prediction": "E", "label": "E"}
+    )
+    assert response.status_code == 404
+    assert client.post("/feedback", json={"label": "E"}).status_code == 400
+
+
+def test_admin_models_requires_token(client):
+    """Test the admin endpoints are off without ADMIN_TOKEN and check the header."""
+    with patch("main.ADMIN_TOKEN", None):
+        assert client.get("/admin/models").status_code == 404
+    with patch("main.ADMIN_TOKEN", "secret"):
+        assert client.get("/admin/models").status_code == 401
+        response = client.get("/admin/models", headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 200
+        assert response.get_json()["active"] == main.registry.active.name
@@ -0,0 +1,74 @@
+"""Unit tests for background model loading."""
+
+import threading
+import numpy as np
+import pytest
+from model_loader import BackgroundModel, warmup_batch_sizes
+
+
+class FakeBackend:  # pylint: disable=too-few-public-methods
+    """Records the batch sizes it is asked to run."""
+
+    name = "fake"
+    path = "fake.h5"
+
+    def __init__(self):
+        self.sizes = []
+
+    def predict(self, batch):
+        """Return one row per input."""
+        self.sizes.append(len(batch))
+        return np.ones((len(batch), 26))
+
+
+def test_warmup_batch_sizes():
+    """Warm-up covers powers of two and the largest batch."""
+    assert warmup_batch_sizes(32) == [1, 2, 4, 8, 16, 32]
+    assert warmup_batch_sizes(12) == [1, 2, 4, 8, 12]
+    assert warmup_batch_sizes(1) == [1]
+
+
+def test_loads_and_warms_up_in_background():
+    """The model runs every warm-up size before it reports ready."""
+    backend = FakeBackend()
+    release = threading.Event()
+
+    def load():
+        release.wait(timeout=5)
+        return backend
+
+    model = BackgroundModel(load, warmup_sizes=[1, 4]).start()
+    assert not model.ready
+    release.set()
+
+    assert model.wait(timeout=5)
+    assert backend.sizes == [1, 4]
+    assert model.predict(np.zeros((2, 100, 100, 3))).shape == (2, 26)
+    assert model.stats()["backend"] == "fake"
+
+
+def test_failed_load_is_reported():
+    """A load error makes the model not ready and predict raise."""
+
+    def load():
+        raise FileNotFoundError("No keras model at sign_model.h5")
+
+    model = BackgroundModel(load).start()
+    assert not model.wait(timeout=5)
+    assert "sign_model.h5" in model.stats()["error"]
+    with pytest.raises(RuntimeError):
+        model.predict(np.zeros((1, 100, 100, 3)))
+
+
+def test_predict_times_out_while_loading():
+    """Requests do not hang forever on a model that never finishes loading."""
+    release = threading.Event()
+
+    def load():
+        release.wait(timeout=5)
+        return FakeBackend()
+
+    model = BackgroundModel(load, predict_timeout=0.01).start()
+    with pytest.raises(RuntimeError):
+        model.predict(np.zeros((1, 100, 100, 3)))
+    release.set()
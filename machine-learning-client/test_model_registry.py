@@ -0,0 +1,213 @@
+# pylint: disable=redefined-outer-name
+"""Unit tests for model_registry.py."""
+
+import json
+import os
+import time
+
+import numpy as np
+import pytest
+
+from model_registry import ModelRegistry, ModelVersion, load_labels
+
+
+class FakeModel:
+    """Stands in for a BackgroundModel; answers with one fixed class."""
+
+    def __init__(self, path, fail=False):
+        self.path = path
+        self.ready = not fail
+
+    def wait(self, timeout=None):  # pylint: disable=unused-argument
+        """Return whether loading succeeded."""
+        return self.ready
+
+    def predict(self, batch):
+        """Return class 0 with full confidence for every frame."""
+        return np.eye(3)[np.zeros(len(batch), dtype=int)]
+
+    def stats(self):
+        """Return the path the model was loaded from."""
+        return {"ready": self.ready, "path": self.path}
+
+
+def add_version(root, name, labels="A\nB\nC\n", model="sign_model.h5"):
+    """Create a version directory with a model file and labels."""
+    directory = root / name
+    directory.mkdir()
+    (directory / model).write_bytes(b"weights")
+    (directory / "labels.txt").write_text(labels, encoding="utf-8")
+
+
+def write_routing(root, **routing):
+    """Write routing.json."""
+    (root / "routing.json").write_text(json.dumps(routing), encoding="utf-8")
+
+
+@pytest.fixture
+def built():
+    """Names of the versions created, in order."""
+    return []
+
+
+@pytest.fixture
+def make_registry(tmp_path, built):
+    """Factory for registries over ``tmp_path`` whose bad versions fail to load."""
+
+    def make_version(name, model_path, labels):
+        built.append(name)
+        return ModelVersion(name, labels, FakeModel(model_path, fail="bad" in name))
+
+    def factory(**options):
+        return ModelRegistry(tmp_path, make_version, **options)
+
+    return factory
+
+
+def test_load_labels_fallback(tmp_path):
+    """Test a missing label file falls back to A-Z."""
+    labels = load_labels(tmp_path / "missing.txt")
+    assert labels[0] == "A" and labels[-1] == "Z" and len(labels) == 26
+
+
+def test_legacy_single_model(built):
+    """Test the single model file is served as "default" without a registry dir."""
+
+    def make_version(name, model_path, labels):
+        built.append(name)
+        return ModelVersion(name, labels, FakeModel(model_path))
+
+    registry = ModelRegistry(
+        "no-such-dir", make_version, default_path="sign_model.h5"
+    ).start()
+    assert registry.active.name == "default"
+    assert registry.active.model.path == "sign_model.h5"
+    assert registry.ready and registry.canary is None
+
+
+def test_latest_version_without_routing(tmp_path, make_registry):
+    """Test the newest version directory is served when there is no routing.json."""
+    add_version(tmp_path, "v1")
+    add_version(tmp_path, "v2")
+    registry = make_registry().start()
+    assert registry.active.name == "v2"
+    assert registry.active.labels == ["A", "B", "C"]
+
+
+def test_reload_swaps_and_retires(tmp_path, make_registry, built):
+    """Test a reload swaps in the new version and stops the retired one."""
+    add_version(tmp_path, "v1")
+    add_version(tmp_path, "v2", labels="X\nY\nZ\n")
+    write_routing(tmp_path, active="v1")
+    swaps = []
+    registry = make_registry(on_swap=lambda: swaps.append(True)).start()
+    old = registry.active
+    assert old.predict(np.zeros((100, 100, 3)), timeout=5)["prediction"] == "A"
+
+    write_routing(tmp_path, active="v2")
+    registry.reload()
+
+    assert registry.active.name == "v2"
+    assert registry.active.predict(np.zeros((100, 100, 3)))["prediction"] == "X"
+    assert registry.get("v1") is None
+    worker = old.batcher._worker  # pylint: disable=protected-access
+    worker.join(timeout=5)
+    assert not worker.is_alive()
+    assert swaps == [True]
+    assert built == ["v1", "v2"]
+
+
+def test_reload_keeps_unchanged_versions(tmp_path, make_registry, built):
+    """Test a reload with nothing changed does not load the model again."""
+    add_version(tmp_path, "v1")
+    registry = make_registry().start()
+    active = registry.active
+    registry.reload()
+    assert registry.active is active
+    assert built == ["v1"]
+
+
+def test_failed_load_keeps_serving(tmp_path, make_registry):
+    """Test a version that fails to load is never swapped in."""
+    add_version(tmp_path, "v1")
+    add_version(tmp_path, "bad")
+    write_routing(tmp_path, active="v1")
+    registry = make_registry().start()
+
+    write_routing(tmp_path, active="bad")
+    with pytest.raises(RuntimeError):
+        registry.reload()
+    assert registry.active.name == "v1"
+
+
+def test_canary_split_is_sticky_per_user(tmp_path, make_registry):
+    """Test a canary gets about its share of users, each always the same way."""
+    add_version(tmp_path, "v1")
+    add_version(tmp_path, "v2")
+    write_routing(tmp_path, active="v1", canary="v2", canary_percent=20)
+    registry = make_registry().start()
+
+    users = [f"user{i}" for i in range(2000)]
+    chosen = [registry.choose(user).name for user in users]
+    assert 0.15 < chosen.count("v2") / len(users) < 0.25
+    assert chosen == [registry.choose(user).name for user in users]
+    assert set(registry.stats()["versions"]) == {"v1", "v2"}
+
+
+def test_activate_writes_routing(tmp_path, make_registry):
+    """Test activating a split writes routing.json and serves it."""
+    add_version(tmp_path, "v1")
+    add_version(tmp_path, "v2")
+    registry = make_registry().start()
+    registry.activate("v1", canary="v2", canary_percent=50)
+
+    with open(tmp_path / "routing.json", encoding="utf-8") as f:
+        assert json.load(f) == {"active": "v1", "canary": "v2", "canary_percent": 50}
+    assert (registry.active.name, registry.canary.name) == ("v1", "v2")
+
+
+def test_activate_restores_routing_on_failure(tmp_path, make_registry):
+    """Test a failed activation puts the previous routing back."""
+    add_version(tmp_path, "v1")
+    add_version(tmp_path, "bad")
+    write_routing(tmp_path, active="v1")
+    registry = make_registry().start()
+
+    with pytest.raises(RuntimeError):
+        registry.activate("bad")
+    with pytest.raises(FileNotFoundError):
+        registry.activate("missing")
+    with pytest.raises(ValueError):
+        registry.activate("v1", canary="bad", canary_percent=150)
+    with open(tmp_path / "routing.json", encoding="utf-8") as f:
+        assert json.load(f) == {"active": "v1"}
+
+
+def test_watch_reloads_changed_model(tmp_path, make_registry, built):
+    """Test the file watch reloads a version whose model file was replaced."""
+    add_version(tmp_path, "v1")
+    registry = make_registry().start()
+    registry.watch(0.05)
+
+    path = tmp_path / "v1" / "sign_model.h5"
+    os.utime(path, (time.time() + 10, time.time() + 10))
+    deadline = time.monotonic() + 5
+    while built == ["v1"] and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert built == ["v1", "v1"]
+
+
+def test_version_stats():
+    """Test a version counts requests, latency, confidence and feedback."""
+    version = ModelVersion("v1", ["A", "B", "C"], FakeModel("m"))
+    for _ in range(3):
+        version.predict(np.zeros((100, 100, 3)), timeout=5)
+    version.record_feedback("A", "A")
+    version.record_feedback("A", "B")
+
+    stats = version.stats()
+    assert stats["requests"] == 3 and stats["errors"] == 0
+    assert stats["mean_confidence"] == 1.0
+    assert stats["latency_p50_ms"] is not None
+    assert stats["accuracy"] == 0.5
+    version.close()
@@ -0,0 +1,149 @@
+"""Unit tests for the packed dataset format and the packing tool."""
+
+import json
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from dataset_listing import list_dataset, split_dataset
+from input_pipeline import make_packed_dataset
+from pack_dataset import pack
+from packed_dataset import (
+    IMAGES_FILE,
+    MANIFEST_FILE,
+    PackedDataset,
+    PackWriter,
+    decode_frame,
+    is_packed,
+)
+
+
+def _save(folder, name, color, size=(120, 90)):
+    """Write a solid-color JPEG into ``folder``."""
+    folder.mkdir(parents=True, exist_ok=True)
+    Image.new("RGB", size, color).save(folder / name, "JPEG")
+
+
+@pytest.fixture(name="dataset_dir")
+def fixture_dataset_dir(tmp_path):
+    """Four images for each of the letters B and D."""
+    root = tmp_path / "train"
+    for index, label in enumerate(["B", "D"]):
+        for i in range(4):
+            _save(root / label, f"{label}{i}.jpg", (100 * index, 50 * i, 30))
+    return root
+
+
+def test_pack_matches_the_folder_images(dataset_dir, tmp_path):
+    """Every packed frame is the image load_image gives for its file."""
+    out = str(tmp_path / "packed")
+    assert pack(str(dataset_dir), out) == (8, 8, [])
+    assert is_packed(out) and not is_packed(str(dataset_dir))
+
+    packed = PackedDataset(out)
+    assert len(packed) == 8
+    assert packed.labels == ["B", "D"]
+    assert isinstance(packed.images, np.memmap)
+    assert packed.images.shape == (8, 100, 100, 3)
+    for key, frame, target in zip(packed.keys, packed.images, packed.targets):
+        assert np.array_equal(frame, decode_frame(str(dataset_dir / key)))
+        assert packed.labels[target] == key.split("/")[0]
+
+
+def test_repack_only_decodes_new_and_changed_images(dataset_dir, tmp_path):
+    """A new letter and an edited image are packed; the rest is left alone."""
+    out = str(tmp_path / "packed")
+    pack(str(dataset_dir), out)
+    _save(dataset_dir / "A", "A0.jpg", (0, 255, 0))
+    _save(dataset_dir / "B", "B1.jpg", (255, 255, 255), size=(200, 200))
+    os.remove(dataset_dir / "D" / "D3.jpg")
+
+    packed_count, total, removed = pack(str(dataset_dir), out)
+    assert (packed_count, total, removed) == (2, 9, ["D/D3.jpg"])
+    packed = PackedDataset(out)
+    assert packed.labels == ["A", "B", "D"]
+    assert packed.keys[-1] == "A/A0.jpg"
+    assert packed.targets.tolist() == [1, 1, 1, 1, 2, 2, 2, 2, 0]
+    assert packed.images[1].min() > 240
+
+    assert pack(str(dataset_dir), out, rebuild=True)[1:] == (8, [])
+
+
+def test_uncommitted_frames_are_invisible_and_trimmed(tmp_path):
+    """Readers see the last commit; a new writer drops the partial tail."""
+    out = str(tmp_path / "packed")
+    frame = np.full((100, 100, 3), 7, dtype=np.uint8)
+    with PackWriter(out) as writer:
+        writer.write("A/0.jpg", "A", frame)
+
+    writer = PackWriter(out)
+    writer.write("A/1.jpg", "A", frame)
+    writer._images.flush()  # pylint: disable=protected-access
+    assert len(PackedDataset(out)) == 1
+    assert os.path.getsize(os.path.join(out, IMAGES_FILE)) == 2 * frame.size
+
+    # Simulate a crash: the writer is dropped without committing
+    writer._images.close()  # pylint: disable=protected-access
+    with PackWriter(out) as writer:
+        assert len(writer) == 1
+    assert os.path.getsize(os.path.join(out, IMAGES_FILE)) == frame.size
+    with open(os.path.join(out, MANIFEST_FILE), encoding="utf-8") as f:
+        assert json.load(f)["count"] == 1
+
+    with pytest.raises(ValueError):
+        PackWriter(out).write("B/0.jpg", "B", frame[:50])
+
+
+def test_batches_and_gather(dataset_dir, tmp_path):
+    """Consecutive batches are views of the map; gathers keep the asked order."""
+    out = str(tmp_path / "packed")
+    pack(str(dataset_dir), out)
+    packed = PackedDataset(out)
+
+    batches = list(packed.batches(batch_size=3))
+    assert [len(images) for images, _ in batches] == [3, 3, 2]
+    assert all(np.shares_memory(images, packed.images) for images, _ in batches)
+
+    images, targets = packed.gather([6, 1, 4])
+    assert np.array_equal(images, packed.images[[6, 1, 4]])
+    assert targets.tolist() == [1, 0, 1]
+
+    shuffled = list(packed.batches(batch_size=8, shuffle=True, seed=1))
+    assert sorted(shuffled[0][1].tolist()) == packed.targets.tolist()
+
+
+def test_split_matches_the_folder_split(dataset_dir, tmp_path):
+    """A pack splits into the same training and validation images as its folder."""
+    out = str(tmp_path / "packed")
+    pack(str(dataset_dir), out)
+    packed = PackedDataset(out)
+    paths, targets, _ = list_dataset(str(dataset_dir))
+    _, (val_paths, _) = split_dataset(paths, targets, 0.25, seed=2)
+
+    train, validation = packed.split(0.25, seed=2)
+    assert not set(train) & set(validation)
+    assert len(train) + len(validation) == 8
+    assert [packed.keys[i] for i in validation] == [
+        os.path.relpath(path, dataset_dir) for path in val_paths
+    ]
+    assert sorted(packed.targets[packed.sample(4)].tolist()) == [0, 0, 1, 1]
+
+
+def test_packed_tf_dataset(dataset_dir, tmp_path):
+    """The tf.data pipeline over a pack yields scaled images and one-hot labels."""
+    out = str(tmp_path / "packed")
+    pack(str(dataset_dir), out)
+    packed = PackedDataset(out)
+    dataset = make_packed_dataset(packed, np.arange(8), 2, batch_size=5)
+    (images, labels), (rest, _) = list(dataset.as_numpy_iterator())
+    assert images.shape == (5, 100, 100, 3) and rest.shape == (3, 100, 100, 3)
+    assert images.dtype == np.float32
+    assert np.allclose(images, packed.images[:5] / 255.0)
+    assert np.array_equal(labels.argmax(axis=1), packed.targets[:5])
+
+    training = make_packed_dataset(packed, np.arange(8), 2, batch_size=8, training=True)
+    images, labels = next(iter(training.as_numpy_iterator()))
+    assert images.shape == (8, 100, 100, 3)
+    assert sorted(labels.argmax(axis=1).tolist()) == packed.targets.tolist()
@@ -0,0 +1,55 @@
+"""Unit tests for the prediction cache."""
+
+import numpy as np
+from prediction_cache import PredictionCache
+
+RESULT = {"prediction": "A", "confidence": 0.9}
+
+
+def frame(value):
+    """A 100x100 RGB frame, bright on the left half."""
+    pixels = np.zeros((100, 100, 3), dtype=np.float32)
+    pixels[:, :50] = value
+    return pixels
+
+
+def test_exact_bytes_hit():
+    """The same upload bytes return the cached result."""
+    cache = PredictionCache()
+    assert cache.get(b"frame") is None
+    cache.put(b"frame", frame(1.0), RESULT)
+    assert cache.get(b"frame") == RESULT
+    assert cache.get(b"other") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+
+def test_least_recently_used_evicted():
+    """Past the size limit the least recently used entry goes first."""
+    cache = PredictionCache(max_entries=2)
+    cache.put(b"one", frame(1.0), RESULT)
+    cache.put(b"two", frame(1.0), RESULT)
+    cache.get(b"one")
+    cache.put(b"three", frame(1.0), RESULT)
+    assert cache.get(b"two") is None
+    assert cache.get(b"one") == RESULT
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire():
+    """Entries older than the TTL are not returned."""
+    cache = PredictionCache(ttl_s=0)
+    cache.put(b"frame", frame(1.0), RESULT)
+    assert cache.get(b"frame") is None
+
+
+def test_perceptual_hit_for_reencoded_frame():
+    """A frame that looks the same but has different bytes hits perceptually."""
+    cache = PredictionCache(perceptual=True)
+    cache.put(b"original.jpg", frame(0.8), RESULT)
+
+    assert cache.get(b"recompressed.jpg") is None
+    assert cache.get_similar(frame(0.78)) == RESULT
+    assert cache.get_similar(frame(0.0) + 0.5) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["perceptual_hits"], stats["misses"]) == (1, 1, 1)
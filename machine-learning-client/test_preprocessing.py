@@ -0,0 +1,50 @@
+"""Unit tests for the shared preprocessing module."""
+
+from io import BytesIO
+import numpy as np
+import pytest
+from PIL import Image
+from preprocessing import (
+    preprocess_batch,
+    preprocess_image,
+    preprocess_rgb_bytes,
+)
+
+
+def _jpeg_bytes(size, color=(200, 100, 50)):
+    """Encode a solid-color JPEG of the given size."""
+    buffer = BytesIO()
+    Image.new("RGB", size, color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def test_large_jpeg_is_reduced_to_float32_input():
+    """A large JPEG decodes straight to a float32 100x100x3 array in [0, 1]."""
+    array = preprocess_image(_jpeg_bytes((1280, 720)))
+    assert array.shape == (100, 100, 3)
+    assert array.dtype == np.float32
+    assert 0.0 <= array.min() and array.max() <= 1.0
+    assert np.allclose(array[50, 50], [200 / 255, 100 / 255, 50 / 255], atol=0.03)
+
+
+def test_batch_matches_single_images():
+    """Batched preprocessing gives the same tensors as one-at-a-time."""
+    images = [_jpeg_bytes((100, 100), (10, 20, 30)), _jpeg_bytes((640, 480))]
+    batch = preprocess_batch(images)
+    assert batch.shape == (2, 100, 100, 3)
+    assert batch.dtype == np.float32
+    for i, image in enumerate(images):
+        assert np.array_equal(batch[i], preprocess_image(image))
+
+
+def test_rgb_bytes():
+    """Raw uint8 RGB buffers are scaled without decoding."""
+    array = preprocess_rgb_bytes(bytes([255]) * (100 * 100 * 3))
+    assert array.dtype == np.float32
+    assert np.all(array == 1.0)
+
+
+def test_rgb_bytes_wrong_size():
+    """Raw buffers must hold exactly one frame."""
+    with pytest.raises(ValueError):
+        preprocess_rgb_bytes(b"\x00" * 12)
@@ -0,0 +1,65 @@
+"""Unit tests for the per-user stats rollups."""
+
+from datetime import datetime
+from unittest.mock import MagicMock
+from bson.objectid import ObjectId
+import mongomock
+from rollups import apply_rollups, rollup_updates
+
+
+def _prediction(user_id, letter, confidence, day=8):
+    """Build one prediction document."""
+    return {
+        "user_id": user_id,
+        "timestamp": datetime(2025, 4, day, 12, 0),
+        "prediction": letter,
+        "confidence": confidence,
+    }
+
+
+def test_rollups_accumulate_across_batches():
+    """Counters add up with $inc and track min/max/last_seen."""
+    stats = mongomock.MongoClient().db.user_stats
+    user_id = ObjectId()
+    batches = [
+        [_prediction(user_id, "A", 0.5), _prediction(user_id, "B", 0.9)],
+        [_prediction(user_id, "A", 0.7, day=9), _prediction(None, "A", 0.1)],
+    ]
+    for batch in batches:
+        for query, update in rollup_updates(batch):
+            stats.update_one(query, update, upsert=True)
+
+    total = stats.find_one({"user_id": user_id, "scope": "total"})
+    assert total["count"] == 3
+    assert abs(total["confidence_sum"] - 2.1) < 1e-9
+    assert total["confidence_min"] == 0.5
+    assert total["confidence_max"] == 0.9
+    assert total["last_seen"] == datetime(2025, 4, 9, 12, 0)
+
+    letter_a = stats.find_one({"user_id": user_id, "scope": "letter", "key": "A"})
+    assert letter_a["count"] == 2
+    assert stats.count_documents({"user_id": user_id, "scope": "day"}) == 2
+    assert stats.count_documents({"user_id": None}) == 0
+
+
+def test_one_update_per_counter():
+    """A batch folds into one upsert per (user, scope, key)."""
+    user_id = ObjectId()
+    updates = rollup_updates([_prediction(user_id, "C", 0.4)] * 10)
+    assert len(updates) == 3
+    assert all(update["$inc"]["count"] == 10 for _, update in updates)
+
+
+def test_apply_rollups_uses_one_bulk_write():
+    """All upserts for a batch go out in a single bulk_write."""
+    collection = MagicMock()
+    apply_rollups(collection, [_prediction(ObjectId(), "A", 0.5)])
+    collection.bulk_write.assert_called_once()
+    assert len(collection.bulk_write.call_args[0][0]) == 3
+
+
+def test_apply_rollups_skips_anonymous():
+    """Anonymous predictions produce no writes."""
+    collection = MagicMock()
+    apply_rollups(collection, [_prediction(None, "A", 0.5)])
+    collection.bulk_write.assert_not_called()
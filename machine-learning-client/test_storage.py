@@ -0,0 +1,146 @@
+"""Unit tests for the prediction history storage layouts."""
+
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+from bson.objectid import ObjectId
+import mongomock
+import pytest
+from pymongo.errors import BulkWriteError
+from storage import BucketStore, bucket_start, open_history
+from migrate_storage import migrate
+
+
+def _prediction(user_id, minute, hour=12):
+    """Build one prediction document."""
+    return {
+        "user_id": user_id,
+        "timestamp": datetime(2025, 4, 8, hour, minute),
+        "prediction": "A",
+        "confidence": 0.5,
+    }
+
+
+def test_bucket_start_truncates_to_hour():
+    """Buckets are keyed on the start of the hour."""
+    assert bucket_start(datetime(2025, 4, 8, 12, 34, 56, 789)) == datetime(
+        2025, 4, 8, 12
+    )
+
+
+def test_bucket_store_groups_by_user_and_hour():
+    """One upsert is issued per (user, hour) bucket."""
+    collection = MagicMock()
+    collection.find_one.return_value = None
+    user_a, user_b = ObjectId(), ObjectId()
+    BucketStore(collection).insert_many(
+        [
+            _prediction(user_a, 1),
+            _prediction(user_a, 2),
+            _prediction(user_a, 1, hour=13),
+            _prediction(user_b, 5),
+        ]
+    )
+
+    ops = collection.bulk_write.call_args[0][0]
+    assert len(ops) == 3
+    # pylint: disable=protected-access
+    first = next(op for op in ops if op._filter["user_id"] == user_a)
+    assert first._filter["seq"] == 0
+    assert first._filter["count"] == {"$lte": 198}
+    assert first._doc["$inc"] == {"count": 2}
+    assert len(first._doc["$push"]["samples"]["$each"]) == 2
+
+
+def _full_bucket_error(*indexes):
+    """BulkWriteError for upserts that hit a full bucket's unique key."""
+    return BulkWriteError(
+        {"writeErrors": [{"index": i, "code": 11000} for i in indexes]}
+    )
+
+
+def test_bucket_store_overflows_into_next_seq():
+    """Chunks never exceed the cap and move to the next seq when a bucket is full."""
+    collection = MagicMock()
+    collection.find_one.return_value = {"seq": 3}
+    collection.bulk_write.side_effect = [_full_bucket_error(0), None, None]
+    user_id = ObjectId()
+    store = BucketStore(collection, max_samples=4)
+
+    store.insert_many([_prediction(user_id, m) for m in range(6)])
+
+    rounds = [call.args[0] for call in collection.bulk_write.call_args_list]
+    # pylint: disable=protected-access
+    assert [[op._filter["seq"] for op in ops] for ops in rounds[:2]] == [[3, 3], [4]]
+    assert [op._doc["$inc"]["count"] for op in rounds[0]] == [4, 2]
+    assert rounds[0][1]._filter["count"] == {"$lte": 2}
+    # The hour's bucket is remembered: no lookup for the next flush
+    store.insert_many([_prediction(user_id, 30)])
+    assert collection.bulk_write.call_count == 3
+    assert collection.bulk_write.call_args.args[0][0]._filter["seq"] == 4
+    collection.find_one.assert_called_once()
+
+
+def test_bucket_store_reports_failures_by_document():
+    """Other write errors name the documents of the failed bucket, like insert_many."""
+    collection = MagicMock()
+    collection.find_one.return_value = None
+    collection.bulk_write.side_effect = BulkWriteError(
+        {"writeErrors": [{"index": 1, "code": 121, "errmsg": "invalid"}]}
+    )
+    user_a, user_b = ObjectId(), ObjectId()
+    docs = [_prediction(user_a, 1), _prediction(user_b, 2), _prediction(user_b, 3)]
+
+    with pytest.raises(BulkWriteError) as raised:
+        BucketStore(collection).insert_many(docs)
+
+    assert raised.value.details["nInserted"] == 1
+    assert [e["index"] for e in raised.value.details["writeErrors"]] == [1, 2]
+
+
+def test_bucket_store_drops_the_legacy_unique_index():
+    """(user_id, hour) alone is no longer unique; the key includes seq."""
+    collection = mongomock.MongoClient().db.sensor_data_buckets
+    collection.create_index([("user_id", 1), ("hour", -1)], unique=True)
+    BucketStore(collection).ensure_indexes()
+    assert set(collection.index_information()) == {
+        "_id_",
+        "user_id_1_hour_-1_seq_-1",
+    }
+
+
+def test_open_history_documents_mode():
+    """The default layout is the plain sensor_data collection."""
+    db = mongomock.MongoClient().db
+    assert open_history(db).name == "sensor_data"
+
+
+def test_open_history_buckets_mode():
+    """Bucket mode returns a BucketStore over sensor_data_buckets."""
+    db = mongomock.MongoClient().db
+    store = open_history(db, "buckets")
+    assert isinstance(store, BucketStore)
+    assert store.collection.name == "sensor_data_buckets"
+
+
+def test_open_history_unknown_mode():
+    """Unknown layouts are rejected."""
+    with pytest.raises(ValueError):
+        open_history(mongomock.MongoClient().db, "sharded")
+
+
+def test_migrate_copies_in_batches():
+    """The migration copies every document, in _id-ordered batches."""
+    db = mongomock.MongoClient().db
+    user_id = ObjectId()
+    db.sensor_data.insert_many([_prediction(user_id, m) for m in range(7)])
+    target = MagicMock()
+
+    with patch("migrate_storage.open_history", return_value=target):
+        copied = migrate(db, "buckets", batch_size=3)
+
+    assert copied == 7
+    batches = [call.args[0] for call in target.insert_many.call_args_list]
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert [doc["timestamp"].minute for batch in batches for doc in batch] == list(
+        range(7)
+    )
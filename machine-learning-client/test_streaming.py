@@ -0,0 +1,78 @@
+"""Unit tests for video-stream sessions."""
+
+import numpy as np
+from streaming import SessionRegistry, StreamSession
+
+LABELS = ["A", "B", "C"]
+
+
+def frame(value):
+    """A flat 100x100 RGB frame at the given brightness."""
+    return np.full((100, 100, 3), value, dtype=np.float32)
+
+
+def one_hot(index, confidence=0.9):
+    """Class probabilities with ``confidence`` on one label."""
+    row = np.full(len(LABELS), (1 - confidence) / (len(LABELS) - 1))
+    row[index] = confidence
+    return row
+
+
+def test_near_duplicate_frames_are_skipped():
+    """Only frames that changed noticeably reach the model."""
+    calls = []
+
+    def predict_fn(batch):
+        calls.append(len(batch))
+        return [one_hot(0)] * len(batch)
+
+    session = StreamSession(LABELS, diff_threshold=0.02)
+    frames = [frame(0.5), frame(0.505), frame(0.51), frame(0.8), frame(0.8)]
+    session.process(frames, predict_fn)
+
+    assert calls == [2]
+    assert session.frames == 5 and session.skipped == 3
+
+
+def test_held_sign_is_emitted_once():
+    """A steady prediction emits its letter once, not once per frame."""
+    session = StreamSession(LABELS, window=3, stable_frames=3)
+    emitted = [session.observe(one_hot(1)) for _ in range(6)]
+    assert emitted == [None, None, "B", None, None, None]
+    assert session.letters == ["B"]
+
+
+def test_jitter_is_smoothed_out():
+    """A single outlier frame does not change the emitted letter."""
+    session = StreamSession(LABELS, window=5, stable_frames=3, min_confidence=0.5)
+    for probabilities in [one_hot(0)] * 3 + [one_hot(2)] + [one_hot(0)] * 3:
+        session.observe(probabilities)
+    assert session.letters == ["A"]
+
+
+def test_repeated_letter_after_pause():
+    """The same letter is emitted again once the prediction dropped in between."""
+    session = StreamSession(LABELS, window=1, stable_frames=2, min_confidence=0.6)
+    for probabilities in [one_hot(0)] * 2 + [one_hot(1, 0.4)] + [one_hot(0)] * 2:
+        session.observe(probabilities)
+    assert session.letters == ["A", "A"]
+
+
+def test_registry_drops_least_recently_used():
+    """Opening a session past the cap drops the least recently used one."""
+    registry = SessionRegistry(max_sessions=2)
+    first = registry.create(LABELS)
+    second = registry.create(LABELS)
+    registry.get(first.id)
+    third = registry.create(LABELS)
+
+    assert registry.get(second.id) is None
+    assert registry.get(first.id) is first and registry.get(third.id) is third
+    assert registry.stats()["sessions"] == 2
+
+
+def test_registry_expires_idle_sessions():
+    """Sessions idle for longer than the TTL are gone."""
+    registry = SessionRegistry(ttl_s=0)
+    session = registry.create(LABELS)
+    assert registry.get(session.id) is None
@@ -9,24 +9,41 @@ from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Conv2D, MaxPooling2D, Flatten, Dense, Dropout
 from tensorflow.keras.callbacks import ModelCheckpoint, EarlyStopping
 
+from dataset_listing import list_dataset, split_dataset
+from input_pipeline import (
+    GENERATOR_AUGMENTATION,
+    ThroughputLogger,
+    make_dataset,
+    make_packed_dataset,
+)
+from packed_dataset import PackedDataset
+from preprocessing import IMG_SIZE
+
 # from tensorflow.keras.regularizers import l2
 
 # === CONFIG ===
 DATASET_PATH = "dataset/asl_alphabet_train"
-IMG_SIZE = 100
 EPOCHS = 100
 BATCH_SIZE = 32
 MODEL_NAME = "sign_model.h5"
 LABELS_FILE = "labels.txt"
-
-print("📁 Scanning dataset directory...")
-LABELS = sorted(
-    [
-        d
-        for d in os.listdir(DATASET_PATH)
-        if os.path.isdir(os.path.join(DATASET_PATH, d))
-    ]
-)
+VALIDATION_SPLIT = 0.2
+SPLIT_SEED = 0
+# "tfdata" (decode once, cache, parallel augmentation), "packed" (tf.data
+# reading the pack from pack_dataset.py) or "generator" (the old
+# ImageDataGenerator, which decodes every image every epoch)
+INPUT_PIPELINE = os.getenv("INPUT_PIPELINE", "tfdata")
+# Where tfdata keeps decoded images: "memory" or a cache file path prefix
+INPUT_CACHE = os.getenv("INPUT_CACHE", "memory")
+PACKED_DATASET_PATH = os.getenv("PACKED_DATASET_PATH", "dataset/asl_alphabet_packed")
+
+if INPUT_PIPELINE == "packed":
+    print("📁 Opening packed dataset...")
+    PACKED = PackedDataset(PACKED_DATASET_PATH)
+    LABELS = PACKED.labels
+else:
+    print("📁 Scanning dataset directory...")
+    PATHS, TARGETS, LABELS = list_dataset(DATASET_PATH)
 print("✅ Found labels:", LABELS)
 
 # === Save label map ===
@@ -36,37 +53,69 @@ with open(LABELS_FILE, "w", encoding="utf-8") as f:
         f.write(f"{label}\n")
 print("✅ Label map saved.")
 
-# === Data Augmentation ===
-print("🔄 Creating data generators with augmentation...")
-datagen = ImageDataGenerator(
-    rescale=1.0 / 255,
-    rotation_range=30,
-    width_shift_range=0.2,
-    height_shift_range=0.2,
-    zoom_range=0.2,
-    horizontal_flip=True,
-    validation_split=0.2,
-)
-
-print("📦 Preparing training generator...")
-train_gen = datagen.flow_from_directory(
-    DATASET_PATH,
-    target_size=(IMG_SIZE, IMG_SIZE),
-    batch_size=BATCH_SIZE,
-    class_mode="categorical",
-    subset="training",
-    shuffle=True,
-)
-
-print("📦 Preparing validation generator...")
-val_gen = datagen.flow_from_directory(
-    DATASET_PATH,
-    target_size=(IMG_SIZE, IMG_SIZE),
-    batch_size=BATCH_SIZE,
-    class_mode="categorical",
-    subset="validation",
-    shuffle=True,
-)
+if INPUT_PIPELINE == "packed":
+    print(f"📦 Preparing tf.data pipelines over {len(PACKED)} packed images...")
+    train_indices, val_indices = PACKED.split(VALIDATION_SPLIT, SPLIT_SEED)
+    train_gen = make_packed_dataset(
+        PACKED,
+        train_indices,
+        len(LABELS),
+        batch_size=BATCH_SIZE,
+        training=True,
+        seed=SPLIT_SEED,
+    )
+    val_gen = make_packed_dataset(
+        PACKED, val_indices, len(LABELS), batch_size=BATCH_SIZE
+    )
+    TRAIN_IMAGES = len(train_indices)
+elif INPUT_PIPELINE == "tfdata":
+    print("📦 Preparing tf.data pipelines...")
+    (train_paths, train_targets), (val_paths, val_targets) = split_dataset(
+        PATHS, TARGETS, validation_split=VALIDATION_SPLIT, seed=SPLIT_SEED
+    )
+    cache = {"train": INPUT_CACHE, "val": INPUT_CACHE}
+    if INPUT_CACHE not in ("memory", ""):
+        cache = {subset: f"{INPUT_CACHE}.{subset}" for subset in cache}
+    train_gen = make_dataset(
+        train_paths,
+        train_targets,
+        len(LABELS),
+        batch_size=BATCH_SIZE,
+        training=True,
+        cache=cache["train"],
+        seed=SPLIT_SEED,
+    )
+    val_gen = make_dataset(
+        val_paths, val_targets, len(LABELS), batch_size=BATCH_SIZE, cache=cache["val"]
+    )
+    TRAIN_IMAGES = len(train_paths)
+else:
+    # === Data Augmentation ===
+    print("🔄 Creating data generators with augmentation...")
+    datagen = ImageDataGenerator(
+        **GENERATOR_AUGMENTATION, validation_split=VALIDATION_SPLIT
+    )
+
+    print("📦 Preparing training generator...")
+    train_gen = datagen.flow_from_directory(
+        DATASET_PATH,
+        target_size=(IMG_SIZE, IMG_SIZE),
+        batch_size=BATCH_SIZE,
+        class_mode="categorical",
+        subset="training",
+        shuffle=True,
+    )
+
+    print("📦 Preparing validation generator...")
+    val_gen = datagen.flow_from_directory(
+        DATASET_PATH,
+        target_size=(IMG_SIZE, IMG_SIZE),
+        batch_size=BATCH_SIZE,
+        class_mode="categorical",
+        subset="validation",
+        shuffle=True,
+    )
+    TRAIN_IMAGES = train_gen.samples
 
 # === Build Model ===
 print("🛠️ Building CNN model...")
@@ -94,11 +143,15 @@ print("✅ Model compiled.")
 # === Callbacks ===
 checkpoint = ModelCheckpoint(MODEL_NAME, monitor="val_accuracy", save_best_only=True)
 earlystop = EarlyStopping(monitor="val_loss", patience=5)
+throughput = ThroughputLogger(TRAIN_IMAGES)
 
 # === Train ===
-print("🚀 Starting training...")
+print(f"🚀 Starting training ({INPUT_PIPELINE} input pipeline)...")
 model.fit(
-    train_gen, validation_data=val_gen, epochs=EPOCHS, callbacks=[checkpoint, earlystop]
+    train_gen,
+    validation_data=val_gen,
+    epochs=EPOCHS,
+    callbacks=[checkpoint, earlystop, throughput],
 )
 
 print(f"🎉 Training complete! Best model saved as {MODEL_NAME}")
@@ -5,8 +5,13 @@ the latest data collected and analyzed by the ML client.
 """
 
 import os
+import json
+import logging
+import queue
+import threading
 from flask import (
     Flask,
+    Response,
     jsonify,
     render_template,
     redirect,
@@ -18,17 +23,21 @@ from flask import (
 from flask_login import (
     LoginManager,
     UserMixin,
+    current_user,
     login_user,
     logout_user,
 )
-from pymongo import MongoClient
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError, PyMongoError
 from bson.objectid import ObjectId
 from bson.errors import InvalidId
 from dotenv import load_dotenv
-from werkzeug.security import (
-    generate_password_hash,
-    check_password_hash,
-)
+import db as mongo
+from history_store import make_history_store
+from latest_cache import LatestCache
+from live_feed import Broker, predictions_from_change, start_polling, to_event
+from passwords import HasherBusy, PasswordHasher
+from user_cache import UserCache
 
 app = Flask(__name__)
 
@@ -42,11 +51,47 @@ app.secret_key = os.getenv("SECRET_KEY")  # Get secret key from the .env file
 user = os.getenv("MONGO_INITDB_ROOT_USERNAME")
 pwd = os.getenv("MONGO_INITDB_ROOT_PASSWORD")
 
-# Connect to MongoDB (inside a container named "mongodb")
-client = MongoClient(os.getenv("URI"))
-db = client["ml_database"]
-collection = db["sensor_data"]
+# Connect to MongoDB (inside a container named "mongodb"); pool, timeout and
+# compression settings are in db.py
+client = mongo.make_client(appname="web-app")
+db = mongo.get_database(client)
 users = db["users"]
+# Per-user counters kept up to date by the ML client on every prediction write
+user_stats = db["user_stats"]
+STATS_RECENT_DAYS = 30
+
+# Prediction history layout written by the ML client: "documents",
+# "timeseries" or "buckets" (see history_store.py)
+STORAGE_MODE = os.getenv("STORAGE_MODE", "documents")
+history_store = make_history_store(db, STORAGE_MODE)
+collection = history_store.collection
+
+# Signing history is paged newest-first with a keyset cursor
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "20"))
+HISTORY_MAX_PAGE_SIZE = 100
+
+# Password hashing policy (a werkzeug method such as "scrypt:32768:8:1" or
+# "pbkdf2:sha256:1000000"); hashes run in a process pool, PASSWORD_HASH_WORKERS=0
+# runs them on the request thread
+password_hasher = PasswordHasher(
+    method=os.getenv("PASSWORD_HASH_METHOD", "scrypt"),
+    workers=int(os.getenv("PASSWORD_HASH_WORKERS", "2")),
+    max_pending=int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32")),
+    timeout=float(os.getenv("PASSWORD_HASH_TIMEOUT_S", "10")),
+)
+
+# The pages crop camera frames to a centered square and scale them to the
+# model's input size before upload; CAPTURE_JPEG_QUALITY is the browser's
+# JPEG quality (0-1) for those frames
+CAPTURE_SIZE = 100
+CAPTURE_JPEG_QUALITY = float(os.getenv("CAPTURE_JPEG_QUALITY", "0.9"))
+
+
+@app.context_processor
+def capture_settings():
+    """Frame size and JPEG quality for the camera scripts in the templates."""
+    return {"capture_size": CAPTURE_SIZE, "capture_quality": CAPTURE_JPEG_QUALITY}
+
 
 # For login and logout with flash-login
 login_manager = LoginManager()
@@ -75,9 +120,18 @@ class User(UserMixin):
         return self.id
 
 
-@login_manager.user_loader
-def load_user(user_id):
-    """For flask-login use"""
+def ensure_indexes():
+    """Create the indexes the login, history and stats queries rely on."""
+    users.create_index("username", unique=True)
+    history_store.ensure_indexes()
+    user_stats.create_index(
+        [("user_id", ASCENDING), ("scope", ASCENDING), ("key", DESCENDING)],
+        unique=True,
+    )
+
+
+def fetch_user(user_id):
+    """Look a user up in MongoDB by id; None if there is no such user."""
     user_data = users.find_one({"_id": ObjectId(user_id)})
     if user_data:
         return User(
@@ -87,6 +141,21 @@ def load_user(user_id):
     return None
 
 
+# Identity for authenticated requests comes from memory; USER_CACHE_SIZE=0
+# sends every request to MongoDB
+user_cache = UserCache(
+    fetch_user,
+    max_entries=int(os.getenv("USER_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("USER_CACHE_TTL", "60")),
+)
+
+
+@login_manager.user_loader
+def load_user(user_id):
+    """For flask-login use"""
+    return user_cache.get(user_id)
+
+
 @app.route("/")
 def home():
     """Render the home page (index.html)."""
@@ -100,9 +169,85 @@ def home():
     except InvalidId:
         return render_template("index.html", latest=[])
 
-    latest = collection.find({"user_id": user_id}, sort=[("_id", -1)])
+    latest, next_cursor = history_store.page(user_id, limit=HISTORY_PAGE_SIZE)
+
+    return render_template(
+        "index.html", latest=latest, user_id=user_id, next_cursor=next_cursor
+    )
+
+
+@app.route("/history")
+def history():
+    """Return the next page of the logged-in user's history as JSON."""
+    if not session.get("user_id"):
+        return jsonify({"error": "Not logged in."}), 401
+
+    limit = request.args.get("limit", HISTORY_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
+    try:
+        rows, next_cursor = history_store.page(
+            ObjectId(session["user_id"]), before=request.args.get("before"), limit=limit
+        )
+    except (InvalidId, ValueError):
+        return jsonify({"error": "Invalid user or cursor."}), 400
+
+    return jsonify(
+        {
+            "items": [
+                {
+                    "timestamp": row["timestamp"].strftime("%Y-%m-%d %H:%M:%S"),
+                    "prediction": row["prediction"],
+                    "confidence": row["confidence"],
+                }
+                for row in rows
+            ],
+            "next": next_cursor,
+        }
+    )
+
+
+def summarize_stats(doc):
+    """Turn one rollup counter document into its JSON summary."""
+    return {
+        "count": doc["count"],
+        "avg_confidence": doc["confidence_sum"] / doc["count"],
+        "min_confidence": doc["confidence_min"],
+        "max_confidence": doc["confidence_max"],
+        "last_seen": doc["last_seen"].isoformat(),
+    }
+
+
+@app.route("/stats")
+def stats():
+    """Return the logged-in user's signing statistics from the rollup counters.
+
+    Only the pre-aggregated ``user_stats`` documents are read: one total, one
+    per letter and one per recent day, never the raw history.
+    """
+    if not session.get("user_id"):
+        return jsonify({"error": "Not logged in."}), 401
+    try:
+        user_id = ObjectId(session["user_id"])
+    except InvalidId:
+        return jsonify({"error": "Invalid user."}), 400
+
+    result = {"total": None, "letters": {}, "days": []}
+    for doc in user_stats.find(
+        {"user_id": user_id, "scope": {"$in": ["total", "letter"]}}
+    ):
+        if doc["scope"] == "total":
+            result["total"] = summarize_stats(doc)
+        else:
+            result["letters"][doc["key"]] = summarize_stats(doc)
+
+    for doc in user_stats.find(
+        {"user_id": user_id, "scope": "day"},
+        sort=[("key", DESCENDING)],
+        limit=STATS_RECENT_DAYS,
+    ):
+        result["days"].append({"day": doc["key"], **summarize_stats(doc)})
 
-    return render_template("index.html", latest=latest, user_id=user_id)
+    return jsonify(result)
 
 
 @app.route("/login", methods=["GET", "POST"])
@@ -117,7 +262,19 @@ def login():
 
         if user_data:
             # check database for password
-            if check_password_hash(user_data["password"], password):
+            try:
+                matches, new_hash = password_hasher.verify(
+                    user_data["password"], password
+                )
+            except HasherBusy:
+                flash("Too many logins right now. Please try again.", "danger")
+                return render_template("login.html"), 503
+            if matches:
+                if new_hash:
+                    # Stored under an older hashing policy; upgrade it
+                    users.update_one(
+                        {"_id": user_data["_id"]}, {"$set": {"password": new_hash}}
+                    )
                 user_object = User(
                     user_id=user_data["_id"],
                     username=user_data["username"],
@@ -125,6 +282,7 @@ def login():
                 )
 
                 session["user_id"] = str(user_data["_id"])
+                user_cache.put(user_object.id, user_object)
 
                 login_user(user_object)
                 flash("Logged in successfully!", "success")
@@ -140,6 +298,7 @@ def login():
 @app.route("/logout")
 def logout():
     """Log user out and redirect to login page"""
+    user_cache.invalidate(current_user.get_id())
     logout_user()
     session.pop("_flashes", None)
     session.pop("user_id", None)
@@ -160,8 +319,20 @@ def register():
             flash("Username already exists. Please try again.", "error")
             return redirect(url_for("register"))
 
-        hashed_password = generate_password_hash(password)
-        users.insert_one({"username": username, "password": hashed_password})
+        try:
+            hashed_password = password_hasher.hash(password)
+        except HasherBusy:
+            flash("Too many sign-ups right now. Please try again.", "error")
+            return redirect(url_for("register"))
+        try:
+            result = users.insert_one(
+                {"username": username, "password": hashed_password}
+            )
+        except DuplicateKeyError:
+            # Registered by a concurrent request since the lookup above
+            flash("Username already exists. Please try again.", "error")
+            return redirect(url_for("register"))
+        user_cache.invalidate(str(result.inserted_id))
 
         flash("Signed up successfully! Please login.", "success")
         return redirect(url_for("login"))
@@ -170,14 +341,116 @@ def register():
     return render_template("register.html")
 
 
-@app.route("/data")
-def get_data():
-    """Return the most recent sensor data as JSON."""
-    latest = collection.find_one(sort=[("_id", -1)])
+def load_latest():
+    """Fetch the most recent prediction as a JSON-ready dict, or None."""
+    latest = history_store.latest()
 
     if latest:
-        latest["_id"] = str(latest["_id"])
-    return jsonify(latest or {"message": "No data found."})
+        for field in ("_id", "user_id"):
+            if field in latest:
+                latest[field] = str(latest[field])
+    return latest
+
+
+# Dashboards poll /data; serve it from memory and reload after change-stream events
+latest_cache = LatestCache(load_latest, ttl=float(os.getenv("DATA_CACHE_TTL", "2")))
+
+
+# New predictions are pushed to each user's open /stream connections
+broker = Broker()
+SSE_KEEPALIVE_S = 15
+
+
+def publish_change(change):
+    """Publish the predictions added by one change-stream event."""
+    for user_id, doc in predictions_from_change(change):
+        broker.publish(str(user_id), to_event(doc))
+
+
+@app.route("/stream")
+def stream():
+    """Server-sent events stream of the logged-in user's new predictions."""
+    user_id = session.get("user_id")
+    if not user_id:
+        return jsonify({"error": "Not logged in."}), 401
+
+    def events():
+        subscriber = broker.subscribe(user_id)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    item = subscriber.get(timeout=SSE_KEEPALIVE_S)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"data: {json.dumps(item)}\n\n"
+        finally:
+            broker.unsubscribe(user_id, subscriber)
+
+    return Response(
+        events(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/data")
+def get_data():
+    """Return the most recent sensor data as JSON.
+
+    Supports If-None-Match, so a poll that already has the current ETag gets
+    an empty 304 and, while the cache is fresh, never reaches MongoDB.
+    """
+    latest, etag = latest_cache.get()
+
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = jsonify(latest or {"message": "No data found."})
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+@app.route("/metrics")
+def metrics():
+    """MongoDB pool and in-process cache counters."""
+    return jsonify({"mongo": mongo.metrics(), "user_cache": user_cache.stats()})
+
+
+# === Per-process startup ===
+_startup_lock = threading.Lock()
+_started = threading.Event()
+
+
+def init_app():
+    """Run the once-per-process startup work; return False if it already ran.
+
+    Called before the first request, so it runs under a WSGI server,
+    ``flask run`` and ``python app.py`` alike. Under the debug reloader only
+    the child process that serves requests runs it.
+    """
+    with _startup_lock:
+        if _started.is_set():
+            return False
+        _started.set()
+    # Fork the hashing pool before this process starts its own threads
+    password_hasher.start()
+    try:
+        ensure_indexes()
+    except PyMongoError as e:
+        logging.error("❌ Could not create MongoDB indexes: %s", e)
+    latest_cache.watch(collection, on_change=publish_change)
+    start_polling(latest_cache, broker)
+    return True
+
+
+@app.before_request
+def start_on_first_request():
+    """Run init_app once; tests call it themselves."""
+    if not app.testing:
+        init_app()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,149 @@
+"""Benchmark logins per second against concurrent page-load latency.
+
+Serves the app on a local threaded server with in-memory (mongomock)
+collections. Login clients post the right password back to back while page
+clients load ``/`` and ``/data``, which need no password hashing. Each
+hashing setup is run in turn, inline on the request threads and in process
+pools of the given sizes:
+
+    python bench_auth.py --workers 0 1 2 --logins 8 --pages 4 --duration 10
+"""
+
+import argparse
+import http.client
+import logging
+import os
+import statistics
+import threading
+import time
+from unittest.mock import patch
+from urllib.parse import urlencode
+
+import mongomock
+from werkzeug.security import generate_password_hash
+from werkzeug.serving import make_server
+
+import app as web
+from history_store import DocumentHistory
+from passwords import PasswordHasher
+
+PASSWORD = "benchmark-password"
+
+
+def client_loop(port, stop, send, latencies, errors):
+    """Repeat ``send(conn)`` on one keep-alive connection until ``stop`` is set."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            response = send(conn)
+            response.read()
+            if response.status >= 400:
+                errors.append(response.status)
+                continue
+        except (OSError, http.client.HTTPException):
+            errors.append("connection")
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+def login(conn):
+    """Post a correct login."""
+    conn.request(
+        "POST",
+        "/login",
+        body=urlencode({"username": "bench", "password": PASSWORD}),
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    return conn.getresponse()
+
+
+def page_load(conn):
+    """Load the home page and the latest-prediction poll."""
+    conn.request("GET", "/")
+    conn.getresponse().read()
+    conn.request("GET", "/data")
+    return conn.getresponse()
+
+
+def run(port, logins, pages, duration):
+    """Return (logins/s, login p50, page p50, page p99, errors) for one run."""
+    stop = threading.Event()
+    login_ms, page_ms, errors = [], [], []
+    clients = [
+        threading.Thread(target=client_loop, args=(port, stop, login, login_ms, errors))
+        for _ in range(logins)
+    ] + [
+        threading.Thread(
+            target=client_loop, args=(port, stop, page_load, page_ms, errors)
+        )
+        for _ in range(pages)
+    ]
+    for client in clients:
+        client.start()
+    time.sleep(duration)
+    stop.set()
+    for client in clients:
+        client.join()
+
+    page_ms.sort()
+    nan = float("nan")
+    return (
+        len(login_ms) / duration,
+        statistics.median(login_ms) if login_ms else nan,
+        statistics.median(page_ms) if page_ms else nan,
+        page_ms[int(len(page_ms) * 0.99)] if page_ms else nan,
+        len(errors),
+    )
+
+
+def main():
+    """Parse arguments and print one row per hashing setup."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--method", default=os.getenv("PASSWORD_HASH_METHOD", "scrypt"))
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2])
+    parser.add_argument("--logins", type=int, default=8)
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--port", type=int, default=5052)
+    args = parser.parse_args()
+
+    database = mongomock.MongoClient().db
+    database.users.insert_one(
+        {"username": "bench", "password": generate_password_hash(PASSWORD, args.method)}
+    )
+    web.app.secret_key = web.app.secret_key or "bench"
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    print(f"{os.cpu_count()} CPU cores, method {args.method}")
+    print(f"{args.logins} login clients, {args.pages} page-load clients\n")
+    print(
+        f"{'hashing':<10}{'logins/s':>10}{'login p50':>11}"
+        f"{'page p50':>10}{'page p99':>10}{'errors':>8}"
+    )
+    for workers in args.workers:
+        hasher = PasswordHasher(method=args.method, workers=workers).start()
+        with patch.object(web, "users", database.users), patch.object(
+            web, "history_store", DocumentHistory(database.sensor_data)
+        ), patch.object(web, "password_hasher", hasher):
+            server = make_server("127.0.0.1", args.port, web.app, threaded=True)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                web.latest_cache.invalidate()
+                rate, login_p50, page_p50, page_p99, errors = run(
+                    args.port, args.logins, args.pages, args.duration
+                )
+            finally:
+                server.shutdown()
+                hasher.close()
+        label = f"pool {workers}" if workers else "inline"
+        print(
+            f"{label:<10}{rate:>10.1f}{login_p50:>11.1f}"
+            f"{page_p50:>10.1f}{page_p99:>10.1f}{errors:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
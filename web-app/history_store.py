@@ -0,0 +1,182 @@
+"""Read access to prediction history in each storage layout.
+
+The ML client writes predictions in one of three layouts, chosen by
+``STORAGE_MODE`` (see machine-learning-client/storage.py). The classes here
+give the web app the same two reads over each of them: a keyset-paginated
+page of one user's history, newest first, and the latest prediction overall.
+Cursors are opaque strings handed back to the client.
+"""
+
+from datetime import datetime
+
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+STORAGE_MODES = ("documents", "timeseries", "buckets")
+HISTORY_PROJECTION = {"timestamp": 1, "prediction": 1, "confidence": 1}
+
+
+class DocumentHistory:
+    """One document per prediction, paged on ``_id``."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def ensure_indexes(self):
+        """Create the indexes the history queries rely on."""
+        self.collection.create_index([("user_id", ASCENDING), ("_id", DESCENDING)])
+        self.collection.create_index([("_id", DESCENDING)])
+
+    def page(self, user_id, before=None, limit=20):
+        """Return (rows, next_cursor) for the page after ``before``."""
+        query = {"user_id": user_id}
+        if before:
+            try:
+                query["_id"] = {"$lt": ObjectId(before)}
+            except (InvalidId, TypeError) as e:
+                raise ValueError("Invalid cursor") from e
+        rows = list(
+            self.collection.find(
+                query, HISTORY_PROJECTION, sort=[("_id", DESCENDING)], limit=limit + 1
+            )
+        )
+        next_cursor = str(rows[limit - 1]["_id"]) if len(rows) > limit else None
+        return rows[:limit], next_cursor
+
+    def latest(self):
+        """Return the most recent prediction, or None."""
+        return self.collection.find_one(sort=[("_id", DESCENDING)])
+
+
+class TimeSeriesHistory:
+    """A MongoDB time-series collection, paged on (timestamp, _id)."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def ensure_indexes(self):
+        """Create the (user_id, timestamp) index the history queries use."""
+        self.collection.create_index(
+            [("user_id", ASCENDING), ("timestamp", DESCENDING)]
+        )
+
+    def page(self, user_id, before=None, limit=20):
+        """Return (rows, next_cursor) for the page after ``before``."""
+        query = {"user_id": user_id}
+        if before:
+            try:
+                timestamp, last_id = before.split("|")
+                timestamp = datetime.fromisoformat(timestamp)
+                last_id = ObjectId(last_id)
+            except (ValueError, InvalidId) as e:
+                raise ValueError("Invalid cursor") from e
+            query["$or"] = [
+                {"timestamp": {"$lt": timestamp}},
+                {"timestamp": timestamp, "_id": {"$lt": last_id}},
+            ]
+        rows = list(
+            self.collection.find(
+                query,
+                HISTORY_PROJECTION,
+                sort=[("timestamp", DESCENDING), ("_id", DESCENDING)],
+                limit=limit + 1,
+            )
+        )
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = f"{last['timestamp'].isoformat()}|{last['_id']}"
+        return rows[:limit], next_cursor
+
+    def latest(self):
+        """Return the most recent prediction, or None."""
+        return self.collection.find_one(sort=[("timestamp", DESCENDING)])
+
+
+class BucketHistory:
+    """Per-user hourly bucket documents, paged on (timestamp, rows-at-timestamp).
+
+    An hour can span several capped buckets (``seq`` 0, 1, ...). Pages read
+    buckets newest first and stop at the first one that is wholly older
+    than the page, so only the buckets holding the page are loaded.
+    """
+
+    PAGE_ORDER = [("hour", DESCENDING), ("last", DESCENDING), ("seq", DESCENDING)]
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def ensure_indexes(self):
+        """Create the bucket key, page and latest-bucket indexes."""
+        self.collection.create_index(
+            [("user_id", ASCENDING), ("hour", DESCENDING), ("seq", DESCENDING)],
+            unique=True,
+        )
+        self.collection.create_index(
+            [("user_id", ASCENDING), *self.PAGE_ORDER],
+        )
+        self.collection.create_index([("last", DESCENDING)])
+
+    @staticmethod
+    def _newest_first(samples):
+        """Return samples newest first (stable for equal timestamps)."""
+        return sorted(samples, key=lambda sample: sample["timestamp"], reverse=True)
+
+    def page(self, user_id, before=None, limit=20):
+        """Return (rows, next_cursor) for the page after ``before``."""
+        query = {"user_id": user_id}
+        timestamp, skip = None, 0
+        if before:
+            try:
+                timestamp, skip = before.split("|")
+                timestamp, skip = datetime.fromisoformat(timestamp), int(skip)
+            except ValueError as e:
+                raise ValueError("Invalid cursor") from e
+            query["first"] = {"$lte": timestamp}
+
+        # Rows at the cursor's timestamp sort first; the first ``skip`` of
+        # them were on earlier pages
+        rows = []
+        for bucket in self.collection.find(query, sort=self.PAGE_ORDER):
+            if len(rows) > skip + limit and (
+                bucket["last"] < rows[skip + limit - 1]["timestamp"]
+            ):
+                break
+            rows = self._newest_first(
+                rows
+                + [
+                    sample
+                    for sample in reversed(bucket.get("samples", []))
+                    if timestamp is None or sample["timestamp"] <= timestamp
+                ]
+            )
+        rows = rows[skip:]
+
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]["timestamp"]
+            same = sum(1 for row in rows[:limit] if row["timestamp"] == last)
+            if timestamp == last:
+                same += skip
+            next_cursor = f"{last.isoformat()}|{same}"
+        return rows[:limit], next_cursor
+
+    def latest(self):
+        """Return the most recent prediction, or None."""
+        bucket = self.collection.find_one(sort=[("last", DESCENDING)])
+        if not bucket or not bucket.get("samples"):
+            return None
+        samples = reversed(bucket["samples"])
+        return {"user_id": bucket["user_id"], **self._newest_first(samples)[0]}
+
+
+def make_history_store(db, mode="documents"):
+    """Return the history reader for the configured storage layout."""
+    if mode == "timeseries":
+        return TimeSeriesHistory(db["sensor_data_ts"])
+    if mode == "buckets":
+        return BucketHistory(db["sensor_data_buckets"])
+    if mode == "documents":
+        return DocumentHistory(db["sensor_data"])
+    raise ValueError(f"Unknown STORAGE_MODE {mode!r}, expected {STORAGE_MODES}")
@@ -0,0 +1,100 @@
+"""In-process cache of the latest prediction for ``GET /data``.
+
+The cached document is invalidated by a MongoDB change stream on the history
+collection whenever something is written to it, and reloaded by the next
+read. A bulk insert of many predictions therefore costs one reload, not one
+query per inserted document. When change streams are not
+available (a standalone mongod, or a time-series collection) the cache falls
+back to expiring after a short TTL. Each cached value carries an ETag so
+unchanged polls can be answered with 304 without touching the database.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+
+class LatestCache:
+    """Caches the result of ``loader()`` together with its ETag."""
+
+    def __init__(self, loader, ttl=2.0):
+        self.loader = loader
+        self.ttl = ttl
+        self.live = False  # True while a change stream keeps the cache current
+        self._lock = threading.Lock()
+        self._entry = (None, None)  # (document, etag)
+        self._loaded_at = None
+        self._generation = 0  # Bumped by invalidate()
+
+    def get(self):
+        """Return (document, etag), reloading only if the cache is stale."""
+        with self._lock:
+            if self._loaded_at is not None and (
+                self.live or time.monotonic() - self._loaded_at < self.ttl
+            ):
+                return self._entry
+        return self.refresh()
+
+    def refresh(self):
+        """Reload the document from the database and return (document, etag).
+
+        A load that raced with an invalidation is returned but not cached,
+        so a write seen by the change stream is never masked.
+        """
+        with self._lock:
+            generation = self._generation
+        value = self.loader()
+        etag = hashlib.sha1(
+            json.dumps(value, default=str, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        with self._lock:
+            if generation == self._generation:
+                self._entry = (value, etag)
+                self._loaded_at = time.monotonic()
+        return value, etag
+
+    def invalidate(self):
+        """Drop the cached document so the next read goes to the database."""
+        with self._lock:
+            self._loaded_at = None
+            self._generation += 1
+
+    def watch(self, collection, on_change=None):
+        """Start a background thread that invalidates the cache on every change.
+
+        ``on_change``, if given, is also called with each change event. Falls
+        back to TTL expiry if the server does not support change streams.
+        """
+        thread = threading.Thread(
+            target=self._watch,
+            args=(collection, on_change),
+            name="latest-cache-watch",
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def _watch(self, collection, on_change):
+        """Change-stream loop; reconnects after transient errors."""
+        while True:
+            try:
+                with collection.watch(full_document="updateLookup") as stream:
+                    self.live = True
+                    self.invalidate()
+                    for change in stream:
+                        self.invalidate()
+                        if on_change is not None:
+                            on_change(change)
+            except OperationFailure as e:
+                # Standalone servers and time-series collections cannot be watched
+                self.live = False
+                logging.warning("Change streams unavailable, using TTL cache: %s", e)
+                return
+            except PyMongoError as e:
+                self.live = False
+                logging.warning("Change stream interrupted, retrying: %s", e)
+                time.sleep(1)
@@ -0,0 +1,129 @@
+"""In-process pub/sub that pushes new predictions to connected browsers.
+
+New predictions come from the history collection's change stream (see
+LatestCache.watch) or, where change streams are unavailable, from polling
+the latest prediction. Each one is published to the subscribers of the
+user it belongs to, which ``GET /stream`` relays as server-sent events.
+"""
+
+import logging
+import queue
+import threading
+import time
+
+
+class Broker:
+    """Fans published items out to per-key subscriber queues."""
+
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, key):
+        """Register a new subscriber for ``key`` and return its queue."""
+        subscriber = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.setdefault(key, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, key, subscriber):
+        """Remove a subscriber queue."""
+        with self._lock:
+            subscribers = self._subscribers.get(key, set())
+            subscribers.discard(subscriber)
+            if not subscribers:
+                self._subscribers.pop(key, None)
+
+    def publish(self, key, item):
+        """Deliver ``item`` to every subscriber of ``key``.
+
+        A subscriber that has fallen behind loses its oldest item rather than
+        blocking the publisher.
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(key, ()))
+        for subscriber in subscribers:
+            while True:
+                try:
+                    subscriber.put_nowait(item)
+                    break
+                except queue.Full:
+                    try:
+                        subscriber.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def subscriber_count(self):
+        """Return the number of connected subscribers."""
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+def to_event(doc):
+    """Format a prediction for the browser."""
+    return {
+        "timestamp": doc["timestamp"].strftime("%Y-%m-%d %H:%M:%S"),
+        "prediction": doc["prediction"],
+        "confidence": doc["confidence"],
+    }
+
+
+def predictions_from_change(change):
+    """Return the (user_id, prediction) pairs a change event adds.
+
+    Handles inserted prediction documents and, for the hourly bucket layout,
+    inserted buckets and samples appended to existing ones.
+    """
+    doc = change.get("fullDocument") or {}
+    user_id = doc.get("user_id")
+    if user_id is None:
+        return []
+
+    if change.get("operationType") == "insert":
+        if "samples" in doc:
+            return [(user_id, sample) for sample in doc["samples"]]
+        if "prediction" in doc:
+            return [(user_id, doc)]
+        return []
+
+    if change.get("operationType") == "update":
+        fields = change.get("updateDescription", {}).get("updatedFields", {})
+        samples = []
+        for field, value in fields.items():
+            if field == "samples":
+                samples.extend(value)
+            elif field.startswith("samples."):
+                samples.append(value)
+        return [(user_id, sample) for sample in samples]
+
+    return []
+
+
+def start_polling(cache, broker, interval=2.0):
+    """Publish the latest prediction whenever it changes, while the cache is not live.
+
+    Fallback feed for servers without change streams. Only the newest
+    prediction at each poll is seen, so bursts between polls are collapsed.
+    """
+
+    def poll():
+        last_etag = None
+        while True:
+            time.sleep(interval)
+            if cache.live or not broker.subscriber_count():
+                last_etag = None
+                continue
+            try:
+                latest, etag = cache.get()
+            except Exception:  # pylint: disable=broad-exception-caught
+                logging.exception("Polling the latest prediction failed")
+                continue
+            if last_etag is not None and etag != last_etag and latest:
+                if latest.get("user_id"):
+                    broker.publish(str(latest["user_id"]), to_event(latest))
+            last_etag = etag
+
+    thread = threading.Thread(target=poll, name="live-feed-poll", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,112 @@
+"""Password hashing policy, run off the request threads.
+
+Password hashes are deliberately slow KDFs. Run inline, a burst of logins
+keeps every request thread busy and starves the dashboard routes. Hashing
+and verification run in a small process pool instead, with a cap on how
+many requests may wait for it. When the pool is saturated, further logins
+fail fast instead of queueing behind each other.
+
+The policy is a werkzeug method string such as ``scrypt:32768:8:1`` or
+``pbkdf2:sha256:1000000``. A stored hash made under a different policy
+still verifies, and is replaced with one under the current policy on the
+user's next successful login.
+"""
+
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HasherBusy(Exception):
+    """Raised when too many requests are already waiting for the pool."""
+
+
+def hash_password(password, method):
+    """Hash ``password`` under ``method``; runs in a pool process."""
+    return generate_password_hash(password, method)
+
+
+def verify_password(stored_hash, password, method, prefix):
+    """Check a password and rehash it if the stored hash is out of date.
+
+    Returns ``(matches, new_hash)``, where ``new_hash`` is None unless the
+    password matched and ``stored_hash`` does not start with the policy's
+    ``prefix``. Runs in a pool process.
+    """
+    if not check_password_hash(stored_hash, password):
+        return False, None
+    if stored_hash.split("$", 1)[0] == prefix:
+        return True, None
+    return True, generate_password_hash(password, method)
+
+
+def policy_prefix(method):
+    """Return the parameter prefix werkzeug stores for hashes made by ``method``.
+
+    ``method`` may leave parameters out (``"scrypt"``); werkzeug fills in
+    its defaults, which the prefix then includes. Costs one hash.
+    """
+    return generate_password_hash("", method).split("$", 1)[0]
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords under one policy in a process pool.
+
+    ``workers=0`` runs everything on the calling thread. At most
+    ``max_pending`` calls wait for the pool at once; a call that cannot get
+    in within ``timeout`` seconds raises HasherBusy.
+    """
+
+    def __init__(self, method="scrypt", workers=2, max_pending=32, timeout=10.0):
+        self.method = method
+        self.workers = workers
+        self.timeout = timeout
+        self.prefix = policy_prefix(method)  # Also rejects an invalid method
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def start(self):
+        """Start the pool processes.
+
+        Call before starting other threads, because the processes are
+        forked from the current one. Otherwise they start on first use.
+        """
+        with self._lock:
+            if self._pool is None and self.workers > 0:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                self._pool.submit(int).result()  # Fork the workers now
+        return self
+
+    def _run(self, fn, *args):
+        """Run ``fn(*args)`` in the pool, or inline without one."""
+        if self.workers <= 0:
+            return fn(*args)
+        # The slot is held until the pool returns, released in the finally
+        if not self._slots.acquire(  # pylint: disable=consider-using-with
+            timeout=self.timeout
+        ):
+            raise HasherBusy("Too many password checks in progress")
+        try:
+            self.start()
+            return self._pool.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        """Return a hash of ``password`` under the current policy."""
+        return self._run(hash_password, password, self.method)
+
+    def verify(self, stored_hash, password):
+        """Return ``(matches, new_hash)``; see ``verify_password``."""
+        return self._run(
+            verify_password, stored_hash, password, self.method, self.prefix
+        )
+
+    def close(self):
+        """Shut the pool processes down."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
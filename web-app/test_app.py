@@ -4,12 +4,29 @@ Unit testing for the web app code
 
 # pylint: disable=redefined-outer-name
 
+import threading
 from datetime import datetime
 from unittest.mock import patch
 from bson.errors import InvalidId
+from bson.objectid import ObjectId
 from werkzeug.security import generate_password_hash
+import mongomock
 import pytest
-from app import app
+from app import (
+    app,
+    broker,
+    collection,
+    ensure_indexes,
+    init_app,
+    latest_cache,
+    load_user,
+    password_hasher,
+    publish_change,
+    user_cache,
+    HISTORY_PAGE_SIZE,
+)
+from history_store import DocumentHistory
+from passwords import HasherBusy
 
 
 @pytest.fixture
@@ -19,6 +36,8 @@ def client_fixture():
     """
     app.config["TESTING"] = True
     app.config["SECRET_KEY"] = "testing"
+    latest_cache.invalidate()
+    user_cache.clear()
     with app.test_client() as client:
         yield client
 
@@ -91,7 +110,7 @@ def test_register_get_request(client_fixture):
 
 
 @patch("app.users.find_one", return_value=None)
-@patch("app.users.insert_one", return_value=None)
+@patch("app.users.insert_one")
 def test_register_new_user(mock_insert_one, mock_find_one, client_fixture):
     """
     Test the register route with post request and ensures a new user is successfully registered
@@ -125,6 +144,16 @@ def test_login_get_request(client_fixture):
     assert b"Login" in response.data
 
 
+@patch("app.CAPTURE_JPEG_QUALITY", 0.75)
+def test_login_page_capture_settings(client_fixture):
+    """
+    Test the login page crops frames to the model size at the set JPEG quality
+    """
+    response = client_fixture.get("/login")
+    assert b"const CAPTURE_SIZE = 100;" in response.data
+    assert b"const CAPTURE_QUALITY = 0.75;" in response.data
+
+
 @patch(
     "app.users.find_one",
     return_value={
@@ -164,6 +193,44 @@ def test_login_hashed_password(mock_find_one, client_fixture):
     assert response.status_code == 302
 
 
+@patch("app.users.update_one")
+@patch(
+    "app.users.find_one",
+    return_value={
+        "_id": "1234567890",
+        "username": "olduser",
+        "password": generate_password_hash("oldpassword", "pbkdf2:sha256:1000"),
+    },
+)
+def test_login_rehashes_old_policy(mock_find_one, mock_update_one, client_fixture):
+    """
+    Test a login with a hash from an older policy stores a new hash
+    """
+    response = client_fixture.post(
+        "/login", data={"username": "olduser", "password": "oldpassword"}
+    )
+    assert response.status_code == 302
+    mock_find_one.assert_called_once()
+    new_hash = mock_update_one.call_args[0][1]["$set"]["password"]
+    assert new_hash.startswith(password_hasher.prefix + "$")
+
+
+@patch("app.password_hasher.verify", side_effect=HasherBusy("busy"))
+@patch(
+    "app.users.find_one",
+    return_value={"_id": "1", "username": "u", "password": "x"},
+)
+def test_login_busy(mock_find_one, mock_verify, client_fixture):
+    """
+    Test logins fail fast with 503 while the hashing pool is saturated
+    """
+    response = client_fixture.post("/login", data={"username": "u", "password": "p"})
+    mock_find_one.assert_called_once()
+    mock_verify.assert_called_once_with("x", "p")
+    assert response.status_code == 503
+    assert b"Too many logins" in response.data
+
+
 @patch("app.users.find_one", return_value=None)
 def test_login_failure(mock_find_one, client_fixture):
     """
@@ -183,3 +250,276 @@ def test_logout(client_fixture):
     """
     response = client_fixture.get("/logout")
     assert response.status_code == 302
+
+
+def test_load_user_is_cached(client_fixture):
+    """
+    Test authenticated requests load the user from MongoDB once, until logout
+    """
+    user_id = ObjectId()
+    with patch(
+        "app.users.find_one", return_value={"_id": user_id, "username": "cached"}
+    ) as mock_find_one:
+        assert load_user(str(user_id)).username == "cached"
+        assert load_user(str(user_id)).username == "cached"
+        assert mock_find_one.call_count == 1
+
+        with client_fixture.session_transaction() as sess:
+            sess["_user_id"] = str(user_id)
+        client_fixture.get("/logout")
+        assert mock_find_one.call_count == 1
+        load_user(str(user_id))
+        assert mock_find_one.call_count == 2
+
+
+@pytest.fixture
+def history_collection():
+    """
+    Replace the sensor_data collection with an in-memory mongomock collection.
+    """
+    mock_collection = mongomock.MongoClient().db.sensor_data
+    with patch("app.history_store", DocumentHistory(mock_collection)):
+        yield mock_collection
+
+
+def _insert_history(mock_collection, user_id, count):
+    """
+    Insert ``count`` predictions for a user, oldest first.
+    """
+    mock_collection.insert_many(
+        [
+            {
+                "user_id": user_id,
+                "timestamp": datetime(2025, 4, 8, 12, 0, i),
+                "prediction": "A",
+                "confidence": 0.5,
+            }
+            for i in range(count)
+        ]
+    )
+
+
+def test_ensure_indexes(history_collection):
+    """
+    Test that startup creates the history indexes and the unique stats index
+    """
+    stats_collection = mongomock.MongoClient().db.user_stats
+    users_collection = mongomock.MongoClient().db.users
+    with patch("app.user_stats", stats_collection), patch(
+        "app.users", users_collection
+    ):
+        ensure_indexes()
+    assert any(
+        index.get("unique") and index["key"] == [("username", 1)]
+        for index in users_collection.index_information().values()
+    )
+    keys = [index["key"] for index in history_collection.index_information().values()]
+    assert [("user_id", 1), ("_id", -1)] in keys
+    assert [("_id", -1)] in keys
+    stats_indexes = stats_collection.index_information().values()
+    assert any(index.get("unique") for index in stats_indexes)
+
+
+@patch("app._started", threading.Event())
+@patch("app.password_hasher.start")
+@patch("app.start_polling")
+@patch("app.latest_cache.watch")
+@patch("app.ensure_indexes")
+def test_init_app_runs_once_on_first_request(
+    mock_ensure_indexes, mock_watch, mock_polling, mock_hasher_start, client_fixture
+):
+    """
+    Test startup runs before the first request outside tests, and only once
+    """
+    app.config["TESTING"] = False
+    try:
+        client_fixture.get("/login")
+        client_fixture.get("/login")
+    finally:
+        app.config["TESTING"] = True
+    mock_ensure_indexes.assert_called_once()
+    mock_watch.assert_called_once_with(collection, on_change=publish_change)
+    mock_polling.assert_called_once_with(latest_cache, broker)
+    mock_hasher_start.assert_called_once_with()
+    assert init_app() is False
+
+
+def test_history_pages_with_cursor(history_collection, client_fixture):
+    """
+    Test the history route pages through a user's rows newest first
+    """
+    user_id = ObjectId()
+    _insert_history(history_collection, user_id, 25)
+    _insert_history(history_collection, ObjectId(), 3)
+    with client_fixture.session_transaction() as sess:
+        sess["user_id"] = str(user_id)
+
+    seen = []
+    cursor = None
+    while True:
+        url = "/history?limit=10" + (f"&before={cursor}" if cursor else "")
+        data = client_fixture.get(url).get_json()
+        seen.extend(data["items"])
+        cursor = data["next"]
+        if not cursor:
+            break
+
+    assert len(seen) == 25
+    assert seen[0]["timestamp"] == "2025-04-08 12:00:24"
+    assert seen[-1]["timestamp"] == "2025-04-08 12:00:00"
+    assert set(seen[0]) == {"timestamp", "prediction", "confidence"}
+
+
+def test_history_requires_login(client_fixture):
+    """
+    Test the history route rejects anonymous requests
+    """
+    response = client_fixture.get("/history")
+    assert response.status_code == 401
+
+
+def test_history_invalid_cursor(client_fixture):
+    """
+    Test the history route rejects a malformed cursor
+    """
+    with client_fixture.session_transaction() as sess:
+        sess["user_id"] = str(ObjectId())
+    response = client_fixture.get("/history?before=not-an-id")
+    assert response.status_code == 400
+
+
+def test_home_renders_first_page(history_collection, client_fixture):
+    """
+    Test the home route renders one page of history and a load-more cursor
+    """
+    user_id = ObjectId()
+    _insert_history(history_collection, user_id, HISTORY_PAGE_SIZE + 5)
+    with client_fixture.session_transaction() as sess:
+        sess["user_id"] = str(user_id)
+
+    response = client_fixture.get("/")
+    assert response.status_code == 200
+    assert response.data.count(b"<td>A</td>") == HISTORY_PAGE_SIZE
+    assert b'id="load-more-btn"' in response.data
+
+
+def test_stats_reads_rollups(client_fixture):
+    """
+    Test the stats route summarizes the user's rollup counters
+    """
+    user_id = ObjectId()
+    stats_collection = mongomock.MongoClient().db.user_stats
+    counter = {
+        "user_id": user_id,
+        "count": 4,
+        "confidence_sum": 3.0,
+        "confidence_min": 0.5,
+        "confidence_max": 0.9,
+        "last_seen": datetime(2025, 4, 8, 12, 0),
+    }
+    stats_collection.insert_many(
+        [
+            {**counter, "scope": "total", "key": None},
+            {**counter, "scope": "letter", "key": "A"},
+            {**counter, "scope": "day", "key": "2025-04-08"},
+            {**counter, "user_id": ObjectId(), "scope": "total", "key": None},
+        ]
+    )
+    with client_fixture.session_transaction() as sess:
+        sess["user_id"] = str(user_id)
+
+    with patch("app.user_stats", stats_collection):
+        data = client_fixture.get("/stats").get_json()
+
+    assert data["total"]["count"] == 4
+    assert data["total"]["avg_confidence"] == 0.75
+    assert data["letters"]["A"]["max_confidence"] == 0.9
+    assert data["days"][0]["day"] == "2025-04-08"
+
+
+def test_stats_requires_login(client_fixture):
+    """
+    Test the stats route rejects anonymous requests
+    """
+    assert client_fixture.get("/stats").status_code == 401
+
+
+@patch("app.collection.find_one")
+def test_data_route_etag(mock_find_one, client_fixture):
+    """
+    Test the data route answers a matching If-None-Match with 304 from the cache
+    """
+    mock_find_one.return_value = {
+        "_id": "61d6c1d7f1b1c314ce875f23",
+        "prediction": "B",
+        "confidence": 0.7,
+    }
+    first = client_fixture.get("/data")
+    etag = first.headers["ETag"]
+
+    second = client_fixture.get("/data", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.data == b""
+    mock_find_one.assert_called_once()
+
+
+@patch("app.collection.find_one")
+def test_data_route_cache_refreshes_after_invalidate(mock_find_one, client_fixture):
+    """
+    Test a new document changes the ETag once the cache is invalidated
+    """
+    mock_find_one.return_value = {"_id": "1", "prediction": "A"}
+    etag = client_fixture.get("/data").headers["ETag"]
+
+    mock_find_one.return_value = {"_id": "2", "prediction": "C"}
+    latest_cache.invalidate()
+    response = client_fixture.get("/data", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert b'"prediction":"C"' in response.data
+
+
+def test_stream_pushes_user_predictions(client_fixture):
+    """
+    Test the stream route relays change-stream predictions for the logged-in user
+    """
+    user_id = ObjectId()
+    with client_fixture.session_transaction() as sess:
+        sess["user_id"] = str(user_id)
+
+    response = client_fixture.get("/stream", buffered=False)
+    assert response.mimetype == "text/event-stream"
+    chunks = iter(response.response)
+    assert next(chunks).startswith(b"retry:")
+
+    publish_change(
+        {
+            "operationType": "insert",
+            "fullDocument": {
+                "user_id": user_id,
+                "timestamp": datetime(2025, 4, 8, 19, 56, 6),
+                "prediction": "L",
+                "confidence": 0.6,
+            },
+        }
+    )
+    assert b'"prediction": "L"' in next(chunks)
+    response.close()
+
+
+def test_stream_requires_login(client_fixture):
+    """
+    Test the stream route rejects anonymous requests
+    """
+    assert client_fixture.get("/stream").status_code == 401
+
+
+def test_metrics_reports_pool_and_caches(client_fixture):
+    """
+    Test the metrics route reports the MongoDB pool settings and the user cache
+    """
+    response = client_fixture.get("/metrics")
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["mongo"]["max_pool_size"] > 0
+    assert "in_use" in body["mongo"] and "max_waiting" in body["mongo"]
+    assert body["user_cache"]["entries"] == 0
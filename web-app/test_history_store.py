@@ -0,0 +1,152 @@
+"""
+Unit testing for the history readers of each storage layout
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+from bson.objectid import ObjectId
+import mongomock
+import pytest
+from history_store import (
+    BucketHistory,
+    DocumentHistory,
+    TimeSeriesHistory,
+    make_history_store,
+)
+
+START = datetime(2025, 4, 8, 11, 50)
+
+
+def _samples(count):
+    """
+    Build ``count`` predictions a minute apart, with every pair sharing a timestamp
+    """
+    return [
+        {
+            "timestamp": START + timedelta(minutes=i // 2),
+            "prediction": chr(ord("A") + i % 26),
+            "confidence": i / 100,
+        }
+        for i in range(count)
+    ]
+
+
+def _read_all(store, user_id, limit):
+    """
+    Follow cursors until the history is exhausted
+    """
+    rows, cursor = store.page(user_id, limit=limit)
+    while cursor:
+        page, cursor = store.page(user_id, before=cursor, limit=limit)
+        rows.extend(page)
+    return rows
+
+
+def _expected(samples):
+    """
+    Expected (timestamp, prediction) order: newest first, later inserts first
+    """
+    return [(s["timestamp"], s["prediction"]) for s in reversed(samples)]
+
+
+@pytest.mark.parametrize("store_class", [DocumentHistory, TimeSeriesHistory])
+def test_flat_layouts_page_through_everything(store_class):
+    """
+    Test document and time-series layouts return every row once, newest first
+    """
+    user_id = ObjectId()
+    samples = _samples(15)
+    collection = mongomock.MongoClient().db.history
+    collection.insert_many([{"user_id": user_id, **s} for s in samples])
+    collection.insert_many([{"user_id": ObjectId(), **s} for s in samples])
+
+    rows = _read_all(store_class(collection), user_id, limit=4)
+
+    assert [(r["timestamp"], r["prediction"]) for r in rows] == _expected(samples)
+
+
+def _buckets(user_id, samples, bucket_size):
+    """
+    Split samples into hourly buckets of at most ``bucket_size``, numbered by seq
+    """
+    hours = {}
+    for sample in samples:
+        hours.setdefault(sample["timestamp"].replace(minute=0), []).append(sample)
+    buckets = []
+    for hour, hour_samples in hours.items():
+        for seq, start in enumerate(range(0, len(hour_samples), bucket_size)):
+            chunk = hour_samples[start : start + bucket_size]
+            buckets.append(
+                {
+                    "user_id": user_id,
+                    "hour": hour,
+                    "seq": seq,
+                    "samples": chunk,
+                    "count": len(chunk),
+                    "first": chunk[0]["timestamp"],
+                    "last": chunk[-1]["timestamp"],
+                }
+            )
+    return buckets
+
+
+@pytest.mark.parametrize("bucket_size", [60, 3])
+def test_bucket_layout_pages_through_everything(bucket_size):
+    """
+    Test capped hourly buckets return every sample once, newest first, across hours
+    """
+    user_id = ObjectId()
+    samples = _samples(40)
+    collection = mongomock.MongoClient().db.sensor_data_buckets
+    collection.insert_many(_buckets(user_id, samples, bucket_size))
+    store = BucketHistory(collection)
+
+    for limit in (3, 4, 7):
+        rows = _read_all(store, user_id, limit=limit)
+        assert [(r["timestamp"], r["prediction"]) for r in rows] == _expected(samples)
+
+    latest = store.latest()
+    assert latest["timestamp"] == samples[-1]["timestamp"]
+    assert latest["user_id"] == user_id
+
+
+def test_bucket_page_reads_only_the_buckets_it_needs():
+    """
+    Test a page stops reading at the first bucket older than its last row
+    """
+    user_id = ObjectId()
+    newest_first = list(reversed(_buckets(user_id, _samples(40), 3)))
+    read = []
+    collection = MagicMock()
+    collection.find.return_value = (read.append(b) or b for b in newest_first)
+
+    rows, cursor = BucketHistory(collection).page(user_id, limit=4)
+
+    assert len(rows) == 4 and cursor
+    assert len(read) == 3
+
+
+def test_invalid_cursor_raises():
+    """
+    Test malformed cursors are rejected as ValueError
+    """
+    collection = mongomock.MongoClient().db.history
+    for store in (
+        DocumentHistory(collection),
+        TimeSeriesHistory(collection),
+        BucketHistory(collection),
+    ):
+        with pytest.raises(ValueError):
+            store.page(ObjectId(), before="garbage")
+
+
+def test_make_history_store():
+    """
+    Test the storage mode picks the matching reader and collection
+    """
+    db = mongomock.MongoClient().db
+    assert isinstance(make_history_store(db), DocumentHistory)
+    assert make_history_store(db, "timeseries").collection.name == "sensor_data_ts"
+    assert isinstance(make_history_store(db, "buckets"), BucketHistory)
+    with pytest.raises(ValueError):
+        make_history_store(db, "unknown")
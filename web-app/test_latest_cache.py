@@ -0,0 +1,86 @@
+"""
+Unit testing for the latest-prediction cache
+"""
+
+from unittest.mock import MagicMock
+from pymongo.errors import OperationFailure
+from latest_cache import LatestCache
+
+
+def test_cache_serves_from_memory_within_ttl():
+    """
+    Test the loader runs once while the cached value is fresh
+    """
+    loader = MagicMock(return_value={"prediction": "A"})
+    cache = LatestCache(loader, ttl=60)
+    first = cache.get()
+    second = cache.get()
+    assert first == second
+    loader.assert_called_once()
+
+
+def test_cache_expires_after_ttl():
+    """
+    Test a zero TTL reloads on every read
+    """
+    loader = MagicMock(return_value=None)
+    cache = LatestCache(loader, ttl=0)
+    cache.get()
+    cache.get()
+    assert loader.call_count == 2
+
+
+def test_etag_follows_content():
+    """
+    Test the ETag changes only when the document does
+    """
+    loader = MagicMock(return_value={"prediction": "A"})
+    cache = LatestCache(loader, ttl=0)
+    _, etag_a = cache.get()
+    _, etag_a_again = cache.get()
+    loader.return_value = {"prediction": "B"}
+    _, etag_b = cache.get()
+    assert etag_a == etag_a_again
+    assert etag_a != etag_b
+
+
+def test_change_stream_invalidates_without_querying():
+    """
+    Test change events only invalidate; one read reloads once for many events
+    """
+    loader = MagicMock(side_effect=[{"n": 1}, {"n": 2}])
+    collection = MagicMock()
+    inserts = [{"op": "insert"}] * 500
+    collection.watch.return_value.__enter__.return_value = iter(inserts)
+    # After the events, the next watch() fails like a standalone server
+    collection.watch.side_effect = [
+        collection.watch.return_value,
+        OperationFailure("not a replica set"),
+    ]
+    events = []
+    cache = LatestCache(loader, ttl=60)
+
+    cache.watch(collection, on_change=events.append).join(timeout=5)
+
+    assert events == inserts
+    loader.assert_not_called()
+    assert cache.get()[0] == {"n": 1}
+    assert cache.get()[0] == {"n": 1}
+    loader.assert_called_once()
+    assert cache.live is False
+
+
+def test_load_racing_an_invalidation_is_not_cached():
+    """
+    Test a document loaded before a change event is not kept as current
+    """
+    cache = LatestCache(MagicMock(), ttl=60)
+
+    def stale_load():
+        cache.invalidate()  # a write lands while the query runs
+        return {"n": 1}
+
+    cache.loader = stale_load
+    assert cache.get()[0] == {"n": 1}
+    cache.loader = MagicMock(return_value={"n": 2})
+    assert cache.get()[0] == {"n": 2}
@@ -0,0 +1,66 @@
+"""
+Unit testing for the live prediction feed
+"""
+
+from datetime import datetime
+from bson.objectid import ObjectId
+from live_feed import Broker, predictions_from_change
+
+
+def test_broker_routes_by_key():
+    """
+    Test published items only reach subscribers of the same key
+    """
+    broker = Broker()
+    alice = broker.subscribe("alice")
+    bob = broker.subscribe("bob")
+    broker.publish("alice", {"prediction": "A"})
+
+    assert alice.get_nowait() == {"prediction": "A"}
+    assert bob.empty()
+    broker.unsubscribe("alice", alice)
+    broker.unsubscribe("bob", bob)
+    assert broker.subscriber_count() == 0
+
+
+def test_broker_drops_oldest_when_full():
+    """
+    Test a slow subscriber keeps the newest items
+    """
+    broker = Broker(max_queue=2)
+    subscriber = broker.subscribe("key")
+    for i in range(5):
+        broker.publish("key", i)
+    assert [subscriber.get_nowait(), subscriber.get_nowait()] == [3, 4]
+
+
+def test_change_for_inserted_prediction():
+    """
+    Test an inserted prediction document is published for its user
+    """
+    user_id = ObjectId()
+    doc = {"user_id": user_id, "timestamp": datetime.now(), "prediction": "A"}
+    change = {"operationType": "insert", "fullDocument": doc}
+    assert predictions_from_change(change) == [(user_id, doc)]
+
+
+def test_change_for_bucket_append():
+    """
+    Test samples pushed onto an hourly bucket are published
+    """
+    user_id = ObjectId()
+    sample = {"timestamp": datetime.now(), "prediction": "B", "confidence": 0.4}
+    change = {
+        "operationType": "update",
+        "fullDocument": {"user_id": user_id, "samples": [sample]},
+        "updateDescription": {"updatedFields": {"samples.3": sample, "count": 4}},
+    }
+    assert predictions_from_change(change) == [(user_id, sample)]
+
+
+def test_change_for_anonymous_prediction():
+    """
+    Test predictions without a user are not published
+    """
+    change = {"operationType": "insert", "fullDocument": {"prediction": "C"}}
+    assert not predictions_from_change(change)
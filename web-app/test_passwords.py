@@ -0,0 +1,98 @@
+"""
+Unit testing for the password hashing policy
+"""
+
+import threading
+import pytest
+from werkzeug.security import generate_password_hash
+from passwords import HasherBusy, PasswordHasher
+
+FAST = "pbkdf2:sha256:1000"
+
+
+def test_hash_and_verify_in_pool():
+    """
+    Test a pool-made hash follows the policy and verifies
+    """
+    hasher = PasswordHasher(method=FAST, workers=1)
+    try:
+        stored = hasher.hash("secret")
+        assert stored.startswith(FAST + "$")
+        assert hasher.verify(stored, "secret") == (True, None)
+        assert hasher.verify(stored, "wrong") == (False, None)
+    finally:
+        hasher.close()
+
+
+def test_policy_change_rehashes_on_verify():
+    """
+    Test a hash from an older policy verifies and comes back rehashed
+    """
+    hasher = PasswordHasher(method=FAST, workers=0)
+    old = generate_password_hash("secret", "pbkdf2:sha256:500")
+    matches, new_hash = hasher.verify(old, "secret")
+    assert matches
+    assert new_hash.startswith(FAST + "$")
+    assert hasher.verify(new_hash, "secret") == (True, None)
+
+
+def test_wrong_password_is_not_rehashed():
+    """
+    Test a failed check never produces a new hash
+    """
+    hasher = PasswordHasher(method=FAST, workers=0)
+    old = generate_password_hash("secret", "pbkdf2:sha256:500")
+    assert hasher.verify(old, "wrong") == (False, None)
+
+
+def test_method_defaults_are_filled_in():
+    """
+    Test a method without parameters compares against werkzeug's defaults
+    """
+    hasher = PasswordHasher(method="pbkdf2", workers=0)
+    assert hasher.prefix.startswith("pbkdf2:sha256:")
+    assert hasher.verify(hasher.hash("secret"), "secret") == (True, None)
+
+
+def test_invalid_method_rejected():
+    """
+    Test an unknown hashing method fails at startup
+    """
+    with pytest.raises(ValueError):
+        PasswordHasher(method="md5", workers=0)
+
+
+def test_busy_when_pending_limit_reached():
+    """
+    Test a call that cannot get a slot in time raises HasherBusy
+    """
+    hasher = PasswordHasher(method=FAST, workers=1, max_pending=1, timeout=0.01)
+    try:
+        # pylint: disable=protected-access, consider-using-with
+        hasher._slots.acquire()
+        with pytest.raises(HasherBusy):
+            hasher.hash("secret")
+        hasher._slots.release()
+        assert hasher.hash("secret").startswith(FAST)
+    finally:
+        hasher.close()
+
+
+def test_pool_serves_concurrent_calls():
+    """
+    Test several threads can hash through a small pool at once
+    """
+    hasher = PasswordHasher(method=FAST, workers=2)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(hasher.hash("pw")))
+        for _ in range(6)
+    ]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(results) == 6
+    finally:
+        hasher.close()
@@ -0,0 +1,80 @@
+"""
+Unit testing for the logged-in user cache
+"""
+
+from unittest.mock import MagicMock
+from user_cache import UserCache
+
+
+def test_cache_loads_each_user_once():
+    """
+    Test repeated lookups of one user hit the loader once
+    """
+    loader = MagicMock(side_effect=lambda user_id: {"id": user_id})
+    cache = UserCache(loader, ttl=60)
+    assert cache.get("a") == cache.get("a") == {"id": "a"}
+    loader.assert_called_once_with("a")
+    assert cache.stats()["hits"] == 1
+
+
+def test_cache_remembers_missing_users():
+    """
+    Test an unknown id is not looked up again within the TTL
+    """
+    loader = MagicMock(return_value=None)
+    cache = UserCache(loader, ttl=60)
+    assert cache.get("gone") is None
+    assert cache.get("gone") is None
+    loader.assert_called_once()
+
+
+def test_cache_expires_after_ttl():
+    """
+    Test a zero TTL reloads on every lookup
+    """
+    loader = MagicMock(return_value={"id": "a"})
+    cache = UserCache(loader, ttl=0)
+    cache.get("a")
+    cache.get("a")
+    assert loader.call_count == 2
+
+
+def test_invalidate_drops_one_user():
+    """
+    Test invalidating a user reloads only that user
+    """
+    loader = MagicMock(side_effect=lambda user_id: {"id": user_id})
+    cache = UserCache(loader, ttl=60)
+    cache.get("a")
+    cache.get("b")
+    cache.invalidate("a")
+    cache.get("a")
+    cache.get("b")
+    assert [call.args[0] for call in loader.call_args_list] == ["a", "b", "a"]
+
+
+def test_least_recently_used_evicted():
+    """
+    Test the least recently used user is dropped when the cache is full
+    """
+    loader = MagicMock(side_effect=lambda user_id: {"id": user_id})
+    cache = UserCache(loader, max_entries=2, ttl=60)
+    cache.get("a")
+    cache.get("b")
+    cache.get("a")
+    cache.get("c")
+    assert cache.stats()["entries"] == 2
+    cache.get("a")
+    cache.get("b")
+    assert [call.args[0] for call in loader.call_args_list] == ["a", "b", "c", "b"]
+
+
+def test_zero_size_disables_cache():
+    """
+    Test a cache of size zero always asks the loader
+    """
+    loader = MagicMock(return_value={"id": "a"})
+    cache = UserCache(loader, max_entries=0)
+    cache.get("a")
+    cache.get("a")
+    assert loader.call_count == 2
@@ -0,0 +1,83 @@
+"""In-process cache of the logged-in users looked up by flask-login.
+
+flask-login calls ``load_user`` on every authenticated request. Caching
+the ``User`` objects by id means most page loads need no MongoDB round trip
+to know who is asking. Entries expire after a TTL and the least recently
+used are dropped first, so a deleted or renamed account is picked up within
+the TTL even if nothing invalidates it. Misses are cached too, so a stale
+session cookie does not hit the database on every request either.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class UserCache:
+    """LRU + TTL cache of ``loader(user_id)`` results."""
+
+    def __init__(self, loader, max_entries=1024, ttl=60.0):
+        self.loader = loader
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def _lookup(self, user_id):
+        """Return a live entry's value, or _MISSING; call with the lock held."""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return _MISSING
+        value, expires = entry
+        if expires < time.monotonic():
+            del self._entries[user_id]
+            return _MISSING
+        self._entries.move_to_end(user_id)
+        return value
+
+    def get(self, user_id):
+        """Return the user for ``user_id``, loading it only on a miss."""
+        with self._lock:
+            value = self._lookup(user_id)
+            if value is not _MISSING:
+                self._hits += 1
+                return value
+            self._misses += 1
+        value = self.loader(user_id)
+        self.put(user_id, value)
+        return value
+
+    def put(self, user_id, value):
+        """Cache ``value`` as the user for ``user_id``."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        """Drop one user so the next lookup goes to the database."""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = 0
+
+    def stats(self):
+        """Return the hit/miss counters and current size."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+            }